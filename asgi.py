@@ -1,22 +1,36 @@
 """ASGI entry point — runs the bot inside uvicorn's event loop via lifespan."""
 
 import asyncio
+import json
 from typing import List
 
+from executors import shutdown_executors
 from http_client import close_http_session
 from logger import LOGGER
+from loop_monitor import loop_watchdog
+from metrics import render
+from tracing import MemoryExporter, tracer
 
 from broiestbot.bot import Bot
-from clients import claude
+from broiestbot.data import persistence_queue
+from broiestbot.dispatch import router
+from broiestbot.outbound import outbound
+from broiestbot.triggers import start_trigger_refresh, stop_trigger_refresh
+from clients import close_clients
 from config import (
     CHATANGO_ROOMS,
     CHATANGO_TEST_ROOM,
     CHATANGO_USERS,
+    COMMAND_PRELOAD,
     ENVIRONMENT,
+    TRACE_EXPORTER,
+    TRACE_FILE,
+    TRACE_MEMORY_SIZE,
 )
 from database import init_db
 
 _bot_task: asyncio.Task = None
+_preload_task: asyncio.Task = None
 
 
 async def _run_bot(rooms: List[str]) -> None:
@@ -35,47 +49,95 @@ async def _run_bot(rooms: List[str]) -> None:
         bot.stop()
 
 
+async def _preload_commands() -> None:
+    loaded = await router.preload()
+    LOGGER.info(f"Preloaded {loaded} command handlers")
+
+
 async def app(scope, receive, send) -> None:
     if scope["type"] == "lifespan":
         await _handle_lifespan(receive, send)
     elif scope["type"] == "http":
-        await _handle_http(send)
+        await _handle_http(scope, send)
 
 
 async def _handle_lifespan(receive, send) -> None:
-    global _bot_task
+    global _bot_task, _preload_task
     while True:
         message = await receive()
         if message["type"] == "lifespan.startup":
+            _configure_tracing()
+            loop_watchdog.start()
             await init_db()
+            await start_trigger_refresh()
             rooms = CHATANGO_ROOMS if ENVIRONMENT == "production" else [CHATANGO_TEST_ROOM]
             LOGGER.info(f'Starting bot in {ENVIRONMENT} mode, joining: {", ".join(rooms)}')
             _bot_task = asyncio.create_task(_run_bot(rooms))
+            if COMMAND_PRELOAD:
+                _preload_task = asyncio.create_task(_preload_commands())
             await send({"type": "lifespan.startup.complete"})
         elif message["type"] == "lifespan.shutdown":
+            if _preload_task and not _preload_task.done():
+                _preload_task.cancel()
+            await outbound.close()
             if _bot_task and not _bot_task.done():
                 _bot_task.cancel()
                 try:
                     await _bot_task
                 except asyncio.CancelledError:
                     pass
+            await persistence_queue.close()
+            await stop_trigger_refresh()
             await close_http_session()
-            await claude.close()
+            await close_clients()
+            shutdown_executors()
+            await loop_watchdog.stop()
+            tracer.close()
             await send({"type": "lifespan.shutdown.complete"})
             return
 
 
-async def _handle_http(send) -> None:
+def _configure_tracing() -> None:
+    """Export spans as configured by `TRACE_EXPORTER`; the bot runs untraced if the exporter is unavailable."""
+    try:
+        tracer.configure(TRACE_EXPORTER, filepath=TRACE_FILE, size=TRACE_MEMORY_SIZE)
+    except ValueError as e:
+        LOGGER.warning(f"Tracing disabled: {e}")
+        return
+    if tracer.enabled:
+        LOGGER.info(f"Exporting traces to {TRACE_EXPORTER}")
+
+
+async def _handle_http(scope, send) -> None:
+    """Serve Prometheus metrics at `/metrics`, the bot's health at `/healthz` & recent traces at `/traces`."""
+    path = scope.get("path", "/")
+    if path == "/metrics":
+        await _respond(send, 200, render().encode(), content_type=b"text/plain; version=0.0.4; charset=utf-8")
+    elif path == "/healthz":
+        if _bot_task is not None and not _bot_task.done():
+            await _respond(send, 200, b"ok")
+        else:
+            await _respond(send, 503, b"bot is not running")
+    elif path == "/traces" and isinstance(tracer.exporter, MemoryExporter):
+        body = json.dumps(list(tracer.exporter.traces), default=str).encode()
+        await _respond(send, 200, body, content_type=b"application/json")
+    elif path == "/":
+        await _respond(send, 200, b"broiestbot is running")
+    else:
+        await _respond(send, 404, b"not found")
+
+
+async def _respond(send, status: int, body: bytes, content_type: bytes = b"text/plain; charset=utf-8") -> None:
     await send(
         {
             "type": "http.response.start",
-            "status": 200,
-            "headers": [(b"content-type", b"text/plain; charset=utf-8")],
+            "status": status,
+            "headers": [(b"content-type", content_type)],
         }
     )
     await send(
         {
             "type": "http.response.body",
-            "body": b"broiestbot is running",
+            "body": body,
         }
     )
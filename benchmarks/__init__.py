@@ -0,0 +1 @@
+"""Benchmarks for measuring the bot's hot paths; run each module with `python -m benchmarks.<name>`."""
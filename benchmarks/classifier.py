@@ -0,0 +1,77 @@
+"""
+Benchmark classifying chats against the cascade of regexes & substring checks it replaced.
+
+Every line of `fixtures/chat_lines.txt` is classified by both, and the results must agree:
+
+    python -m benchmarks.classifier
+"""
+
+import re
+import timeit
+from os import path
+from typing import List, Optional
+
+from broiestbot.classifier import (
+    INTENT_BANNED_WORD,
+    INTENT_BOT_MENTION,
+    INTENT_SILENT_BAN,
+    INTENT_TWITTER_PREVIEW,
+    INTENT_WIKI_PREVIEW,
+    INTENT_YOUTUBE_PREVIEW,
+    classify_message,
+)
+from config import YOUTUBE_VIDEO_ID_REGEX
+
+CORPUS_PATH = path.join(path.dirname(__file__), "fixtures", "chat_lines.txt")
+ITERATIONS = 200
+
+
+def load_corpus(filepath: str = CORPUS_PATH) -> List[str]:
+    """
+    Load chat lines to classify, one per line.
+
+    :param str filepath: Path to a file of chat lines.
+
+    :returns: List[str]
+    """
+    with open(filepath, "r", encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def cascade(chat_message: str) -> Optional[str]:
+    """Classify a chat the way `Bot.on_message` did before triggers were compiled together."""
+    if YOUTUBE_VIDEO_ID_REGEX.search(chat_message):
+        return INTENT_YOUTUBE_PREVIEW
+    elif re.match(r"((https?):\/\/)?(www.)?x\.com(\/@?(\w){1,15})\/status\/[0-9]{19}", chat_message):
+        return INTENT_TWITTER_PREVIEW
+    elif re.match(r".+(wikipedia.org)", chat_message):
+        return INTENT_WIKI_PREVIEW
+    elif "https://i.imgur.com/wppfinC.png" in chat_message:
+        return INTENT_SILENT_BAN
+    elif re.match(r"bl\/S+b", chat_message) and "south" not in chat_message:
+        return INTENT_BANNED_WORD
+    elif chat_message == "image not found :(":
+        return INTENT_SILENT_BAN
+    elif "http://broiestbro." in chat_message:
+        return INTENT_SILENT_BAN
+    elif "https://i.imgur.com/bQJxsBV.png" in chat_message:
+        return INTENT_SILENT_BAN
+    elif re.search(r"@bro(?![a-zA-Z0-9])", chat_message):
+        return INTENT_BOT_MENTION
+    elif "idk wtf u did but bot is ded now, thanks" in chat_message:
+        return INTENT_SILENT_BAN
+    return None
+
+
+def main():
+    corpus = load_corpus()
+    mismatches = [line for line in corpus if classify_message(line) != cascade(line)]
+    if mismatches:
+        raise SystemExit(f"Classifier disagrees with the cascade on: {mismatches}")
+    for label, func in (("cascade", cascade), ("compiled", classify_message)):
+        best = min(timeit.repeat(lambda: [func(line) for line in corpus], number=ITERATIONS, repeat=5))
+        print(f"{label:>8}: {best / (ITERATIONS * len(corpus)) * 1e6:.2f} µs/chat over {len(corpus)} chats")
+
+
+if __name__ == "__main__":
+    main()
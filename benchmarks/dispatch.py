@@ -0,0 +1,48 @@
+"""
+Benchmark resolving command types to handlers.
+
+Dispatch is a single dictionary lookup, so resolving the first declared command type
+should cost the same as resolving the last:
+
+    python -m benchmarks.dispatch
+"""
+
+import timeit
+
+from broiestbot.dispatch import CommandContext, router
+
+ITERATIONS = 200_000
+
+CTX = CommandContext(
+    content="content",
+    command="cmd",
+    args="args",
+    room_name="room",
+    user_name="user",
+    bot_username="broiestbot",
+)
+
+
+def time_resolve(cmd_type: str, iterations: int = ITERATIONS) -> float:
+    """
+    Average time taken to resolve a command type to its handler.
+
+    :param str cmd_type: `Type` of command to resolve.
+    :param int iterations: Number of times to resolve the command type.
+
+    :returns: float
+    """
+    best = min(timeit.repeat(lambda: router.resolve(cmd_type, CTX), number=iterations, repeat=5))
+    return best / iterations
+
+
+def main():
+    handlers = list(router)
+    first, last = handlers[0].cmd_type, handlers[-1].cmd_type
+    print(f"{len(handlers)} command types registered")
+    for label, cmd_type in (("first", first), ("last", last), ("unknown", "__unknown__")):
+        print(f"{label:>8} ({cmd_type}): {time_resolve(cmd_type) * 1e9:.0f} ns/dispatch")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+In-process stand-ins for Chatango, the database, Redis, upstream APIs & blocking SDKs.
+
+`Services` installs all of them at once, so the bot's real code paths (`Bot.on_message`,
+the dispatch pipeline, `http_client`, persistence) run end to end without leaving the
+process, while every database query, HTTP request & SDK call is counted.
+"""
+
+import asyncio
+import operator
+import sys
+from collections import Counter, deque
+from contextlib import ExitStack
+from time import perf_counter, sleep
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from unittest.mock import AsyncMock, MagicMock, patch
+from urllib.parse import urlsplit
+
+from tests.aiohttp_mocks import FakeResponse, FakeSession
+
+
+class ReplayRoom:
+    """Chatango room which records what the bot sends & every moderation action it takes."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.history: deque = deque(maxlen=50)
+        self.sent: List[Tuple[float, str]] = []
+        self.actions: Counter = Counter()
+
+    async def send_message(self, body: str, **_kwargs) -> None:
+        self.sent.append((perf_counter(), body))
+
+    async def delete_message(self, *_args) -> None:
+        self.actions["delete_message"] += 1
+
+    async def ban_message(self, *_args) -> None:
+        self.actions["ban_message"] += 1
+
+    async def ban_user(self, *_args) -> None:
+        self.actions["ban_user"] += 1
+
+    async def clear_user(self, *_args) -> None:
+        self.actions["clear_user"] += 1
+
+    def set_font(self, **_kwargs) -> None:
+        pass
+
+
+class _Pending:
+    """Response which only becomes available after the upstream's simulated latency."""
+
+    def __init__(self, response: FakeResponse, delay: float, error: Optional[BaseException]):
+        self._response = response
+        self._delay = delay
+        self._error = error
+
+    async def __aenter__(self) -> FakeResponse:
+        if self._delay:
+            await asyncio.sleep(self._delay)
+        if self._error is not None:
+            raise self._error
+        return self._response
+
+    async def __aexit__(self, *_exc) -> bool:
+        return False
+
+
+class RoutedSession(FakeSession):
+    """
+    `FakeSession` installed beneath `http_client`, serving a canned response per upstream host.
+
+    Requests still pass through `http_client.HttpSession`, so deadlines & request metrics apply.
+    Subclasses override `delay` & `error` to simulate slow or failing upstreams.
+
+    :param Dict[str, FakeResponse] routes: Response served for each host.
+    :param FakeResponse default: Response served for hosts without a route.
+    """
+
+    closed = False
+
+    def __init__(self, routes: Optional[Dict[str, FakeResponse]] = None, default: Optional[FakeResponse] = None):
+        super().__init__([default or FakeResponse(json_data={})])
+        self.routes = routes or {}
+        self.hosts: Counter = Counter()
+
+    def delay(self, host: str) -> float:
+        """Seconds the upstream takes to respond."""
+        return 0
+
+    def error(self, host: str) -> Optional[BaseException]:
+        """Exception raised instead of responding, if the upstream fails this request."""
+        return None
+
+    def _next(self, method: str, url: str, **kwargs) -> _Pending:
+        response = super()._next(method, url, **kwargs)
+        host = urlsplit(str(url)).hostname or ""
+        self.hosts[host] += 1
+        return _Pending(self.routes.get(host, response), self.delay(host), self.error(host))
+
+    def request(self, method: str, url: str, **kwargs) -> _Pending:
+        return self._next(method, url, **kwargs)
+
+    async def close(self) -> None:
+        pass
+
+
+class _Rows:
+    def __init__(self, rows: List[Any]):
+        self._rows = rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def all(self) -> List[Any]:
+        return list(self._rows)
+
+    def first(self) -> Optional[Any]:
+        return self._rows[0] if self._rows else None
+
+    def one_or_none(self) -> Optional[Any]:
+        return self._rows[0] if len(self._rows) == 1 else None
+
+
+class _Result(_Rows):
+    def scalars(self) -> _Rows:
+        return _Rows(self._rows)
+
+    def scalar_one_or_none(self) -> Optional[Any]:
+        return self.one_or_none()
+
+
+def _equalities(clause) -> List[Tuple[str, Any]]:
+    """`(column, value)` pairs of a `WHERE` clause made of `column == value` comparisons; others match any row."""
+    if clause is None:
+        return []
+    if hasattr(clause, "clauses"):
+        return [pair for child in clause.clauses for pair in _equalities(child)]
+    key, value = getattr(clause.left, "key", None), getattr(clause.right, "value", None)
+    return [(key, value)] if key and clause.operator is operator.eq else []
+
+
+class _Session:
+    """Stand-in for an `AsyncSession`; queries return the rows stored for their model."""
+
+    def __init__(self, database: "FakeDatabase", commit_on_exit: bool = False):
+        self._database = database
+        self._commit_on_exit = commit_on_exit
+
+    async def execute(self, statement, *_args, **_kwargs) -> _Result:
+        self._database.queries += 1
+        if self._database.latency:
+            await asyncio.sleep(self._database.latency)
+        descriptions = getattr(statement, "column_descriptions", None) or [{}]
+        rows = self._database.tables.get(descriptions[0].get("entity"), [])
+        conditions = _equalities(getattr(statement, "whereclause", None))
+        return _Result([row for row in rows if all(getattr(row, key) == value for key, value in conditions)])
+
+    def add(self, row: Any) -> None:
+        self._database.writes += 1
+        self._database.tables.setdefault(type(row), []).append(row)
+
+    async def commit(self) -> None:
+        self._database.commits += 1
+        if self._database.latency:
+            await asyncio.sleep(self._database.latency)
+
+    async def rollback(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def __aenter__(self) -> "_Session":
+        return self
+
+    async def __aexit__(self, exc_type, *_exc) -> bool:
+        if self._commit_on_exit and exc_type is None:
+            await self.commit()
+        return False
+
+
+class FakeDatabase:
+    """
+    Stand-in for `database.async_session`, counting queries, writes & commits.
+
+    :param Dict[type, List] tables: Rows returned when a model is selected, ie: `{Command: [...]}`; added rows join them.
+    :param float latency: Simulated seconds per database round trip.
+    """
+
+    def __init__(self, tables: Optional[Dict[type, List[Any]]] = None, latency: float = 0):
+        self.tables = tables or {}
+        self.latency = latency
+        self.queries = 0
+        self.writes = 0
+        self.commits = 0
+
+    def __call__(self) -> _Session:
+        return _Session(self)
+
+    def begin(self) -> _Session:
+        return _Session(self, commit_on_exit=True)
+
+    @property
+    def calls(self) -> int:
+        """Round trips made to the database."""
+        return self.queries + self.commits
+
+
+class FakeRedis:
+    """Dictionary-backed stand-in for the synchronous & asynchronous Redis clients, counting commands."""
+
+    def __init__(self):
+        self.store: Dict[str, Any] = {}
+        self.commands: Counter = Counter()
+
+    def _count(self, command: str) -> None:
+        self.commands[command] += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        self._count("get")
+        return self.store.get(key)
+
+    def set(self, key: str, value: Any, nx: bool = False, **_kwargs) -> Optional[bool]:
+        self._count("set")
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    def delete(self, *keys: str) -> int:
+        self._count("delete")
+        return sum(self.store.pop(key, None) is not None for key in keys)
+
+    def expire(self, *_args) -> bool:
+        self._count("expire")
+        return True
+
+    def hgetall(self, key: str) -> Dict[str, Any]:
+        self._count("hgetall")
+        return dict(self.store.get(key, {}))
+
+    def hget(self, key: str, field: str) -> Optional[Any]:
+        self._count("hget")
+        return self.store.get(key, {}).get(field)
+
+    def hset(self, key: str, field: Optional[str] = None, value: Any = None, mapping: Optional[Dict] = None) -> int:
+        self._count("hset")
+        values = self.store.setdefault(key, {})
+        values.update(mapping or {field: value})
+        return 1
+
+    def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        self._count("hincrby")
+        values = self.store.setdefault(key, {})
+        values[field] = int(values.get(field, 0)) + amount
+        return values[field]
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        self._count("incr")
+        self.store[key] = int(self.store.get(key, 0)) + amount
+        return self.store[key]
+
+    def publish(self, *_args) -> int:
+        self._count("publish")
+        return 0
+
+
+class FakeAsyncRedis(FakeRedis):
+    """`FakeRedis` with the coroutine interface of `redis.asyncio.Redis`."""
+
+    def __getattribute__(self, name: str) -> Any:
+        attr = super().__getattribute__(name)
+        if name.startswith("_") or name in ("store", "commands") or not callable(attr):
+            return attr
+
+        async def command(*args, **kwargs):
+            return attr(*args, **kwargs)
+
+        return command
+
+
+class BlockingSdk(MagicMock):
+    """Stand-in SDK whose calls block the calling thread for `latency` seconds, as a real request would."""
+
+    latency = 0.0
+
+    def _mock_call(self, *args, **kwargs):
+        if self.latency:
+            sleep(self.latency)
+        return super()._mock_call(*args, **kwargs)
+
+
+class Services:
+    """
+    Install every stand-in at once for the duration of a `with` block.
+
+    :param FakeDatabase database: Stand-in for the database.
+    :param RoutedSession session: Stand-in for upstream APIs.
+    :param FakeRedis redis: Stand-in for Redis.
+    :param float sdk_latency: Seconds each blocking SDK call holds its thread (or the event loop).
+    """
+
+    # Functions in `broiestbot.bot` which call blocking SDKs directly (ie: YouTube search).
+    BOT_BLOCKING_CALLS = ("search_youtube_video", "generate_youtube_video_preview")
+    # Our own clients, which make their requests through `http_client` & are built for real.
+    HTTP_CLIENTS = ("sch", "cch")
+    # Stand-in SDK methods which are awaited.
+    ASYNC_METHODS = {"claude": ("generate_response",)}
+
+    def __init__(
+        self,
+        database: Optional[FakeDatabase] = None,
+        session: Optional[RoutedSession] = None,
+        redis: Optional[FakeRedis] = None,
+        sdk_latency: float = 0,
+    ):
+        self.database = database or FakeDatabase()
+        self.session = session or RoutedSession()
+        self.redis = redis or FakeRedis()
+        self.sdks: Dict[str, MagicMock] = {}
+        self._sdk_type = type("BlockingSdk", (BlockingSdk,), {"latency": sdk_latency})
+        self._stack: Optional[ExitStack] = None
+
+    @property
+    def sdk_calls(self) -> int:
+        """Calls made to stand-in SDK clients & blocking functions."""
+        return sum(len(sdk.mock_calls) for sdk in self.sdks.values())
+
+    def reset(self) -> None:
+        """Zero every call count, ie: once a warm-up pass has imported modules & built clients."""
+        self.database.queries = self.database.writes = self.database.commits = 0
+        self.session.hosts.clear()
+        self.redis.commands.clear()
+        for sdk in self.sdks.values():
+            sdk.reset_mock()
+
+    def __enter__(self) -> "Services":
+        import http_client
+
+        import broiestbot.commands
+        import clients
+        import database
+        from clients.registry import substitute
+
+        stack = self._stack = ExitStack()
+        # Modules which already imported `async_session` hold their own reference to it.
+        for module in self._modules_referencing(database.async_session):
+            stack.enter_context(patch.object(module, "async_session", self.database))
+        stack.enter_context(patch.object(http_client, "_session", self.session))
+        for name, client in clients.registry.clients.items():
+            if name == "r":
+                substitute(client, self.redis)
+            elif name in ("async_r", "async_r_bytes"):
+                substitute(client, FakeAsyncRedis())
+            elif name not in self.HTTP_CLIENTS:
+                substitute(client, self._stand_in(name))
+        # The bot imports these from `broiestbot.commands` on first use; setting them directly
+        # bypasses its lazy `__getattr__`, so the real YouTube modules are never imported.
+        stand_ins = {
+            name: self.sdks.setdefault(name, self._sdk_type(return_value=None)) for name in self.BOT_BLOCKING_CALLS
+        }
+        stack.enter_context(patch.dict(broiestbot.commands.__dict__, stand_ins))
+        return self
+
+    def __exit__(self, *_exc) -> bool:
+        import clients
+        from clients.registry import substitute
+
+        self._stack.close()
+        for client in clients.registry.clients.values():
+            substitute(client, None)
+        return False
+
+    def _stand_in(self, name: str) -> MagicMock:
+        sdk = self.sdks.setdefault(name, self._sdk_type(name=name))
+        for method in self.ASYNC_METHODS.get(name, ()):
+            setattr(sdk, method, AsyncMock(return_value=None))
+        return sdk
+
+    @staticmethod
+    def _modules_referencing(value: Any) -> Iterable[Any]:
+        for module in list(sys.modules.values()):
+            if getattr(module, "async_session", None) is value:
+                yield module
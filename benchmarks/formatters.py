@@ -0,0 +1,304 @@
+"""
+Benchmark the cost of rendering command responses from upstream payloads.
+
+Each formatter renders the canned payloads from the command test conftests (scaled up to
+a busy match day, ie: a full timeline of events rather than a single goal), so render cost
+is measured on exactly the shapes the tests already pin down. Results are normalized
+against a fixed pure-Python workload timed on the same machine, so a baseline recorded on
+one machine remains comparable on another. The tracked baseline lives alongside the
+benchmark; a formatter which slows past `--max-regression` fails the run:
+
+    python -m benchmarks.formatters
+    python -m benchmarks.formatters --save
+    python -m benchmarks.formatters --only parse_fixture_odds --max-regression 10
+"""
+
+import argparse
+import inspect
+import json
+import platform
+import sys
+import timeit
+from copy import deepcopy
+from datetime import datetime, timedelta, timezone
+from importlib import import_module
+from os import path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BASELINE = path.join(path.dirname(path.abspath(__file__)), "baselines", "formatters.json")
+REPEAT = 30
+# Seconds per timed batch; short batches are less likely to be interrupted.
+BATCH_SECONDS = 0.01
+MAX_REGRESSION = 25
+
+
+def conftest_payload(package: str, name: str) -> Any:
+    """
+    Build a payload from a pytest fixture in a command's test conftest, resolving the fixtures it depends on.
+
+    :param str package: Command package whose `tests/conftest.py` declares the fixture, ie: `footy`.
+    :param str name: Name of the fixture.
+
+    :returns: Any
+    """
+    conftest = import_module(f"broiestbot.commands.{package}.tests.conftest")
+    func = inspect.unwrap(getattr(conftest, name))
+    return func(*(conftest_payload(package, dependency) for dependency in inspect.signature(func).parameters))
+
+
+def live_events() -> List[dict]:
+    """A full match's timeline: every kind of event in the footy conftest, three times over."""
+    names = (
+        "event_normal_goal",
+        "event_penalty_goal",
+        "event_own_goal_with_assist",
+        "event_own_goal_no_assist",
+        "event_yellow_card",
+        "event_red_card",
+        "event_var_disallowed_goal",
+        "event_substitution",
+    )
+    return [conftest_payload("footy", name) for name in names] * 3
+
+
+def live_fixture_stats() -> Tuple[List[dict], Tuple[int, int]]:
+    """Both teams' statistics for the footy conftest's live fixture, and its score."""
+    fixture = conftest_payload("footy", "live_fixture")
+    stats = []
+    for side, possession in (("home", "44%"), ("away", "56%")):
+        statistics = {
+            "Shots on Goal": 4,
+            "Total Shots": 11,
+            "Fouls": 9,
+            "Yellow Cards": 2,
+            "Red Cards": None,
+            "Ball Possession": possession,
+            "Passes %": "84%",
+            "expected_goals": "1.32",
+        }
+        stats.append(
+            {
+                "team": fixture["teams"][side],
+                "statistics": [{"type": key, "value": value} for key, value in statistics.items()],
+            }
+        )
+    return stats, (fixture["goals"]["home"], fixture["goals"]["away"])
+
+
+def fixtures_with_odds(count: int = 7) -> Tuple[List[dict], List[dict]]:
+    """A day of fixtures, each copied from the footy conftest's fixture & odds under its own ID."""
+    fixture, odds = conftest_payload("footy", "today_fixture"), conftest_payload("footy", "today_odds_response")[0]
+    fixtures, fixtures_odds = [], []
+    for i in range(count):
+        fixtures.append(deepcopy(fixture))
+        fixtures[-1]["fixture"]["id"] += i
+        fixtures_odds.append(deepcopy(odds))
+        fixtures_odds[-1]["fixture"]["id"] += i
+    return fixtures, fixtures_odds
+
+
+def torikumi_bouts(count: int = 21) -> List[dict]:
+    """A day of top-division bouts, alternating the sumo conftest's completed & upcoming bouts."""
+    torikumi = conftest_payload("sumo", "torikumi_day_3")["torikumi"]
+    return [torikumi[i % len(torikumi)] for i in range(count)]
+
+
+def top_coins(count: int = 10) -> List[dict]:
+    """Top coins by market cap, as returned by CoinMarketCap's latest listings."""
+    return [
+        {
+            "name": f"Coin {i}",
+            "symbol": f"C{i}",
+            "quote": {"USD": {"price": 64213.51 / (i + 1), "percent_change_24h": -1.37 * i, "percent_change_7d": 4.2}},
+        }
+        for i in range(count)
+    ]
+
+
+def golden_boot_players(count: int = 20) -> List[dict]:
+    """League top scorers, as returned by API-Football's `/players/topscorers`."""
+    return [
+        {
+            "player": {"name": f"Striker {i}"},
+            "statistics": [
+                {
+                    "team": {"name": f"Team {i % 6}"},
+                    "goals": {"total": 25 - i, "assists": i % 4 or None},
+                    "shots": {"on": 40 - i, "total": 80 - i},
+                }
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+def twitch_stream() -> dict:
+    """Live stream, as returned by Twitch's `/helix/streams`."""
+    started_at = (datetime.now(timezone.utc) - timedelta(minutes=95)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return {
+        "user_name": "broiestbro",
+        "game_name": "EA Sports FC 26",
+        "title": "ranked grind until we hit elite",
+        "viewer_count": 1432,
+        "started_at": started_at,
+        "thumbnail_url": "https://static-cdn.jtvnw.net/previews-ttv/live_user_broiestbro-{width}x{height}.jpg",
+    }
+
+
+LLM_RESPONSE = """**Short answer:** Portugal, but it's closer than the odds suggest.
+
+The *United States* have pressed well all half:
+- 56% possession since the break
+- 4 shots on target
+- two yellow cards for **Portugal** midfielders
+
+If the US keep the ball in wide areas, a late equalizer is *very* possible."""
+
+
+def cases() -> Dict[str, Callable[[], Any]]:
+    """
+    Every formatter under test, bound to the payload it renders.
+
+    :returns: Dict[str, Callable[[], Any]]
+    """
+    from broiestbot.commands.footy.goldenboot import parse_golden_boot_leaders
+    from broiestbot.commands.footy.live import parse_events_per_live_fixture
+    from broiestbot.commands.footy.predicts import parse_fixture_odds
+    from broiestbot.commands.footy.stats import parse_live_fixture_stats
+    from broiestbot.commands.markets import format_top_crypto_response
+    from broiestbot.commands.sumo.matches import _format_bout
+    from broiestbot.commands.video import format_twitch_response
+    from clients.llm import LLMClient
+
+    events = live_events()
+    stats, score = live_fixture_stats()
+    fixtures, fixtures_odds = fixtures_with_odds()
+    bouts = torikumi_bouts()
+    coins = top_coins()
+    players = golden_boot_players()
+    stream = twitch_stream()
+    return {
+        "parse_events_per_live_fixture": lambda: parse_events_per_live_fixture(events, subs=True),
+        "parse_live_fixture_stats": lambda: parse_live_fixture_stats(stats, score),
+        "parse_fixture_odds": lambda: parse_fixture_odds("World Cup", fixtures, fixtures_odds, "room", "user"),
+        "format_top_crypto_response": lambda: format_top_crypto_response(coins),
+        "parse_golden_boot_leaders": lambda: parse_golden_boot_leaders(players),
+        "format_twitch_response": lambda: format_twitch_response(stream),
+        "LLMClient.format_response_for_html": lambda: LLMClient.format_response_for_html(LLM_RESPONSE),
+        "sumo._format_bout": lambda: "\n".join(_format_bout(bout) for bout in bouts),
+    }
+
+
+def _reference() -> str:
+    """Fixed pure-Python workload of string building & dictionary lookups, to normalize timings by."""
+    row = {"name": "reference", "value": 1.5}
+    text = ""
+    for i in range(200):
+        text += f"<b>{row['name']}</b> {row['value'] * i:.2f}\n"
+    return text
+
+
+def _batch_size(func: Callable[[], Any]) -> int:
+    """Calls per timed batch, so that each batch takes about `BATCH_SECONDS`."""
+    timer, number = timeit.Timer(func), 1
+    while timer.timeit(number) < BATCH_SECONDS:
+        number *= 2
+    return number
+
+
+def time_relative(func: Callable[[], Any], repeat: int) -> Tuple[float, float]:
+    """
+    Fastest time of a single call, and of the reference workload timed in between its batches.
+
+    Alternating many short batches of the two means a machine which speeds up or slows down
+    mid-run (ie: a noisy neighbour, CPU frequency scaling) affects both alike, and the fastest
+    batch of each is the one least disturbed.
+
+    :param Callable func: Function to time.
+    :param int repeat: Number of timed batches of each; the fastest is kept.
+
+    :returns: Tuple[float, float]
+    """
+    timers = ((timeit.Timer(func), _batch_size(func)), (timeit.Timer(_reference), _batch_size(_reference)))
+    best = [float("inf"), float("inf")]
+    for _ in range(repeat):
+        for i, (timer, number) in enumerate(timers):
+            best[i] = min(best[i], timer.timeit(number) / number)
+    return best[0], best[1]
+
+
+def run(only: Optional[List[str]], repeat: int) -> Dict:
+    """
+    Time every formatter, normalized by the reference workload.
+
+    :param Optional[List[str]] only: Names of the formatters to time; all of them if empty.
+    :param int repeat: Number of timed batches per formatter.
+
+    :returns: Dict
+    """
+    results = {}
+    for name, func in cases().items():
+        if only and name not in only:
+            continue
+        if not func():
+            # A formatter which raised & logged renders nothing; timing its error path would mislead.
+            raise RuntimeError(f"`{name}` rendered nothing from its payload")
+        seconds, reference = time_relative(func, repeat)
+        results[name] = {"us": seconds * 1e6, "relative": seconds / reference}
+    reference = min(result["us"] / result["relative"] for result in results.values()) if results else 0
+    return {"python": platform.python_version(), "reference_us": reference, "formatters": results}
+
+
+def compare(results: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    """
+    Print how each formatter's normalized cost changed since the baseline.
+
+    :returns: List[str]
+    """
+    regressions = []
+    for name, result in results["formatters"].items():
+        then = baseline.get("formatters", {}).get(name)
+        if not then:
+            print(f"{name:>36}: {result['us']:9.2f}µs (no baseline)")
+            continue
+        change = (result["relative"] - then["relative"]) / then["relative"] * 100
+        flag = ""
+        if change > max_regression:
+            regressions.append(name)
+            flag = "  << regression"
+        print(f"{name:>36}: {result['us']:9.2f}µs ({change:+.0f}% vs baseline){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", default=BASELINE, help="Baseline to compare against, as JSON.")
+    parser.add_argument("--save", action="store_true", help="Record this run as the new baseline.")
+    parser.add_argument("--only", action="append", help="Formatter to time; repeatable. Times all by default.")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="Timed batches per formatter; the fastest is kept.")
+    parser.add_argument(
+        "--max-regression", type=float, default=MAX_REGRESSION, help="Percent slowdown at which a formatter fails."
+    )
+    options = parser.parse_args()
+
+    results = run(options.only, options.repeat)
+    print(f"{'reference':>36}: {results['reference_us']:9.2f}µs")
+    if options.save:
+        with open(options.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        for name, result in results["formatters"].items():
+            print(f"{name:>36}: {result['us']:9.2f}µs")
+        print(f"Saved baseline to {options.baseline}")
+        return
+    baseline = {}
+    if path.exists(options.baseline):
+        with open(options.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, options.max_regression)
+    if regressions:
+        print(f"Slower than baseline by more than {options.max_regression:.0f}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
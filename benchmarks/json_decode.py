@@ -0,0 +1,132 @@
+"""
+Benchmark decoding upstream JSON bodies, the way `aiohttp` does vs. the HTTP layer's fast path.
+
+Bodies are built from the canned payloads in the command test conftests, scaled up to the
+sizes the bot actually receives (a day of friendlies, a day's odds markets, a season of
+Hyprace pages, a day of sumo bouts) and serialized once. Each is then decoded by:
+
+- `aiohttp`: `ClientResponse.json()`'s default, stdlib `json.loads` of the body decoded to text.
+- `stdlib`: stdlib `json.loads` straight from the raw bytes.
+- `http_json`: `http_json.loads` from the raw bytes, which is `orjson` when it's installed.
+
+    python -m benchmarks.json_decode
+    python -m benchmarks.json_decode --scale 3 --repeat 50
+"""
+
+import argparse
+import json
+import timeit
+from copy import deepcopy
+from typing import Any, Callable, Dict, List
+
+from benchmarks.formatters import conftest_payload
+
+REPEAT = 20
+# Seconds per timed batch; short batches are less likely to be interrupted.
+BATCH_SECONDS = 0.02
+
+
+def _copies(payload: dict, count: int, key: str) -> List[dict]:
+    """`count` copies of a payload, each under its own ID at `payload[key]["id"]` (or `payload["id"]`)."""
+    copies = []
+    for i in range(count):
+        copy = deepcopy(payload)
+        target = copy[key] if key else copy
+        target["id"] = f"{target['id']}-{i}" if isinstance(target["id"], str) else target["id"] + i
+        copies.append(copy)
+    return copies
+
+
+def bodies(scale: int = 1) -> Dict[str, bytes]:
+    """
+    Serialized response bodies, as upstream APIs send them.
+
+    :param int scale: Multiplier of each body's size.
+
+    :returns: Dict[str, bytes]
+    """
+    fixture = conftest_payload("footy", "today_fixture")
+    odds = conftest_payload("footy", "today_odds_response")[0]
+    live_odds = conftest_payload("footy", "live_odds_response_fixture")[0]
+    race = conftest_payload("f1", "race_completed")
+    torikumi = conftest_payload("sumo", "torikumi_day_3")
+    bouts = torikumi["torikumi"]
+    payloads = {
+        "footy friendlies": {"results": 600 * scale, "response": _copies(fixture, 600 * scale, "fixture")},
+        "footy odds markets": {"results": 300 * scale, "response": _copies(odds, 300 * scale, "fixture")},
+        "footy live odds": {"results": 40 * scale, "response": _copies(live_odds, 40 * scale, "fixture")},
+        "hyprace pages": {"items": _copies(race, 10 * 24 * scale, ""), "pageNumber": 1, "totalPages": 24},
+        "sumo torikumi": {**torikumi, "torikumi": [bouts[i % len(bouts)] for i in range(21 * 15 * scale)]},
+    }
+    return {name: json.dumps(payload).encode() for name, payload in payloads.items()}
+
+
+def decoders() -> Dict[str, Callable[[bytes], Any]]:
+    """
+    Every way of decoding a body under test.
+
+    :returns: Dict[str, Callable[[bytes], Any]]
+    """
+    from http_json import loads
+
+    return {
+        "aiohttp": lambda body: json.loads(body.decode("utf-8")),
+        "stdlib": json.loads,
+        "http_json": loads,
+    }
+
+
+def time_best(func: Callable[[], Any], repeat: int) -> float:
+    """
+    Fastest time of a single call.
+
+    :param Callable func: Function to time.
+    :param int repeat: Number of timed batches; the fastest is kept.
+
+    :returns: float
+    """
+    timer, number = timeit.Timer(func), 1
+    while timer.timeit(number) < BATCH_SECONDS:
+        number *= 2
+    return min(timer.timeit(number) / number for _ in range(repeat))
+
+
+def run(scale: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Time every decoder on every body.
+
+    :param int scale: Multiplier of each body's size.
+    :param int repeat: Number of timed batches per decoder & body.
+
+    :returns: Dict[str, Dict[str, float]]
+    """
+    results = {}
+    for name, body in bodies(scale).items():
+        expected = json.loads(body)
+        results[name] = {"bytes": len(body)}
+        for decoder, loads in decoders().items():
+            if loads(body) != expected:
+                raise RuntimeError(f"`{decoder}` decoded `{name}` differently")
+            results[name][decoder] = time_best(lambda: loads(body), repeat) * 1e6
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1, help="Multiplier of each body's size.")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="Timed batches per decoder; the fastest is kept.")
+    options = parser.parse_args()
+
+    from http_json import orjson
+
+    print(f"http_json decodes with {'orjson ' + orjson.__version__ if orjson else 'the stdlib (orjson not installed)'}")
+    names = list(decoders())
+    print(f"{'body':>20} {'KB':>8} " + " ".join(f"{name + ' µs':>14}" for name in names) + f" {'speedup':>8}")
+    for body, result in run(options.scale, options.repeat).items():
+        timings = " ".join(f"{result[name]:14.1f}" for name in names)
+        speedup = result["aiohttp"] / result["http_json"]
+        print(f"{body:>20} {result['bytes'] / 1024:8.1f} {timings} {speedup:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,462 @@
+"""
+Find the throughput ceiling of one bot process, and where messages queue on the way to it.
+
+Chats from a replay fixture are sent from N rooms × M users through `Bot.on_message`
+(with the stand-ins from `benchmarks.doubles`) at increasing target rates. Arrivals are
+open-loop, as they are in a busy room: a slow reply never delays the next chat. Each
+upstream host can be given a latency distribution (median & p95, in seconds) and an error
+rate; blocking SDK calls & database round trips take a fixed time.
+
+Each stage reports achieved throughput, reply latency, and queueing in the event loop,
+every executor's thread pool, the persistence queue (database writes) & outbound queues.
+Stages stop once the bot falls behind its target rate, its p95 exceeds the SLO or chat logs are dropped:
+
+    python -m benchmarks.load --rooms 20 --users 50 --rates 50,100,200,400
+    python -m benchmarks.load --mix command=0.5,chat=0.5 --latency "*=0.1:0.4" \\
+        --latency api-football-v1.p.rapidapi.com=0.3:1.5 --errors api.klipy.com=0.05
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+from unittest.mock import patch
+
+from aiohttp import ClientConnectionError
+from benchmarks.doubles import (
+    FakeDatabase,
+    FakeRedis,
+    ReplayRoom,
+    RoutedSession,
+    Services,
+)
+from benchmarks.replay import (
+    BOT_USERNAME,
+    CLASSES,
+    FIXTURE,
+    GEO_LOOKUP,
+    classify,
+    load_fixture,
+    room_message,
+)
+
+RATES = "25,50,100,200,400,800"
+DURATION = 10
+SLO = 2.0
+# Share of the target rate a stage must sustain to count towards the ceiling.
+SUSTAINED = 0.9
+# 95th percentile of a standard normal distribution, used to spread latencies around their median.
+Z_95 = 1.645
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """
+    Parse a message mix such as `command=0.3,phrase=0.2,preview=0.1,chat=0.4` into weights.
+
+    :param str value: Comma-separated `class=weight` pairs.
+
+    :returns: Dict[str, float]
+    """
+    mix = {}
+    for pair in value.split(","):
+        kind, weight = pair.split("=")
+        if kind not in CLASSES:
+            raise argparse.ArgumentTypeError(f"Unknown message class `{kind}`; expected one of {CLASSES}")
+        mix[kind] = float(weight)
+    return mix
+
+
+def parse_host_values(values: List[str]) -> Dict[str, str]:
+    """
+    Parse repeated `host=value` options; `*` applies to every host without its own value.
+
+    :param List[str] values: Values of a repeated option.
+
+    :returns: Dict[str, str]
+    """
+    return dict(value.split("=", 1) for value in values)
+
+
+class UpstreamProfile:
+    """
+    Latency & error distributions of each upstream host.
+
+    Latencies are log-normal, which fits the long tail of real API response times.
+
+    :param Dict[str, str] latency: `median[:p95]` seconds per host.
+    :param Dict[str, str] errors: Share of requests which fail, per host.
+    :param int seed: Seed for reproducible runs.
+    """
+
+    def __init__(self, latency: Dict[str, str], errors: Dict[str, str], seed: int = 0):
+        self._latency = {host: self._parse_latency(value) for host, value in latency.items()}
+        self._errors = {host: float(value) for host, value in errors.items()}
+        self._random = random.Random(seed)
+
+    @staticmethod
+    def _parse_latency(value: str) -> Tuple[float, float]:
+        median, _, p95 = value.partition(":")
+        median = float(median)
+        sigma = math.log(float(p95) / median) / Z_95 if p95 and median else 0.0
+        return median, sigma
+
+    def delay(self, host: str) -> float:
+        """Seconds a request to `host` takes to respond."""
+        median, sigma = self._latency.get(host, self._latency.get("*", (0.0, 0.0)))
+        if not median:
+            return 0
+        return self._random.lognormvariate(math.log(median), sigma) if sigma else median
+
+    def error(self, host: str) -> Optional[BaseException]:
+        """Exception raised instead of responding, if this request to `host` fails."""
+        rate = self._errors.get(host, self._errors.get("*", 0.0))
+        if rate and self._random.random() < rate:
+            return ClientConnectionError(f"Injected failure from {host}")
+        return None
+
+
+class SimulatedSession(RoutedSession):
+    """`RoutedSession` whose upstreams respond slowly, or fail, according to an `UpstreamProfile`."""
+
+    def __init__(self, routes: Dict, profile: UpstreamProfile):
+        super().__init__(routes)
+        self.profile = profile
+
+    def delay(self, host: str) -> float:
+        return self.profile.delay(host)
+
+    def error(self, host: str) -> Optional[BaseException]:
+        return self.profile.error(host)
+
+
+class TimedPersistenceQueue:
+    """Record how long each persistence job waits for a worker, ie: queueing in front of the database."""
+
+    def __init__(self, queue):
+        self.queue = queue
+        self.waits: List[float] = []
+        self.max_depth = 0
+
+    def submit(self, func, *args) -> bool:
+        submitted = time.perf_counter()
+
+        async def job(*job_args) -> None:
+            self.waits.append(time.perf_counter() - submitted)
+            await func(*job_args)
+
+        job.__name__ = func.__name__
+        accepted = self.queue.submit(job, *args)
+        self.max_depth = max(self.max_depth, self.queue.depth)
+        return accepted
+
+
+def _histogram(histogram, labels: List[str]) -> Dict[str, Tuple[int, float]]:
+    return {label: (histogram.count(label), histogram.sum(label)) for label in labels}
+
+
+def _waited(before: Dict[str, Tuple[int, float]], after: Dict[str, Tuple[int, float]]) -> Dict[str, Dict]:
+    """Mean wait per label observed between two histogram snapshots."""
+    waits = {}
+    for label, (count, total) in after.items():
+        calls = count - before[label][0]
+        if calls:
+            waits[label] = {"calls": calls, "mean_wait_ms": (total - before[label][1]) / calls * 1000}
+    return waits
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    cuts = statistics.quantiles(values, n=100) if len(values) > 1 else [values[0]] * 99
+    return {"p50_ms": cuts[49] * 1000, "p95_ms": cuts[94] * 1000, "p99_ms": cuts[98] * 1000}
+
+
+class LoadGenerator:
+    """
+    Drive one bot with synthetic chat from many rooms & users.
+
+    :param Dict[str, List[Dict]] chats: Fixture chats, grouped by message class.
+    :param Dict[str, float] mix: Weight of each message class.
+    :param int rooms: Number of simulated rooms.
+    :param int users: Number of simulated users per room.
+    :param int seed: Seed for reproducible runs.
+    """
+
+    def __init__(self, chats: Dict[str, List[Dict]], mix: Dict[str, float], rooms: int, users: int, seed: int = 0):
+        self.kinds = [kind for kind in mix if chats.get(kind)]
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.chats = chats
+        self.rooms = {f"loadroom{i}": ReplayRoom(f"loadroom{i}") for i in range(rooms)}
+        self.users = users
+        self._random = random.Random(seed)
+
+    def next_chat(self) -> Tuple[str, ReplayRoom, Dict]:
+        """Pick the next chat's class, room & user."""
+        kind = self._random.choices(self.kinds, self.weights)[0]
+        room = self._random.choice(list(self.rooms.values()))
+        user = self._random.randrange(self.users)
+        chat = dict(self._random.choice(self.chats[kind]), room=room.name, user=f"{room.name}user{user}")
+        # Each user chats from the same IP, so their details are only looked up on their first chat.
+        chat["ip"] = f"198.51.{user // 254 % 256}.{user % 254 + 1}"
+        return kind, room, chat
+
+    async def stage(self, bot, rate: float, duration: float, slo: float) -> Dict:
+        """
+        Send chats at `rate` per second for `duration` seconds, then wait for them to be handled.
+
+        :returns: Dict
+        """
+        from executors import EXECUTOR_POOLS, EXECUTOR_QUEUE_SECONDS, EXECUTOR_REJECTED
+        from loop_monitor import EVENT_LOOP_STALLS, LoopWatchdog
+
+        from broiestbot.data import PERSISTENCE_DROPPED, PersistenceQueue
+        from broiestbot.dispatch.cache import response_cache
+        from broiestbot.outbound import (
+            OUTBOUND_DROPPED,
+            OUTBOUND_QUEUE_SECONDS,
+            OutboundQueues,
+        )
+        from config import PERSISTENCE_QUEUE_SIZE, PERSISTENCE_WORKERS
+
+        response_cache.clear()
+        outbound = OutboundQueues()
+        persistence = TimedPersistenceQueue(
+            PersistenceQueue(maxsize=PERSISTENCE_QUEUE_SIZE, workers=PERSISTENCE_WORKERS)
+        )
+        executors_before = _histogram(EXECUTOR_QUEUE_SECONDS, list(EXECUTOR_POOLS))
+        outbound_before = _histogram(OUTBOUND_QUEUE_SECONDS, list(self.rooms))
+        rejected_before = {name: EXECUTOR_REJECTED.value(name) for name in EXECUTOR_POOLS}
+        dropped_before = OUTBOUND_DROPPED.total()
+        persistence_dropped_before = PERSISTENCE_DROPPED.total()
+        stalls_before = EVENT_LOOP_STALLS.total()
+        latencies: Dict[str, List[float]] = defaultdict(list)
+        errors: Counter = Counter()
+        lateness: List[float] = []
+        tasks = []
+
+        async def handle(kind: str, room: ReplayRoom, chat: Dict) -> None:
+            started = time.perf_counter()
+            try:
+                await bot.on_message(room, room_message(chat))
+            except Exception:
+                errors[kind] += 1
+            latencies[kind].append(time.perf_counter() - started)
+
+        watchdog = LoopWatchdog(interval=0.05)
+        with patch("broiestbot.bot.outbound", outbound), patch("broiestbot.bot.persistence_queue", persistence):
+            watchdog.start()
+            started = time.perf_counter()
+            due = 0.0
+            while due < duration:
+                due += self._random.expovariate(rate)
+                delay = started + due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # Arrivals which fire late are waiting on the event loop, not on the bot's handlers.
+                lateness.append(max(time.perf_counter() - started - due, 0.0))
+                tasks.append(asyncio.create_task(handle(*self.next_chat())))
+            sent = time.perf_counter() - started
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+            await outbound.close()
+            await persistence.queue.close()
+            await watchdog.stop()
+
+        handled = [latency for values in latencies.values() for latency in values]
+        overall = _percentiles(handled)
+        # Arrivals fall behind the target rate once the event loop can't keep up with scheduling them.
+        achieved = len(handled) / sent
+        persistence_dropped = PERSISTENCE_DROPPED.total() - persistence_dropped_before
+        return {
+            "target_rate": rate,
+            "messages": len(handled),
+            "achieved_rate": achieved,
+            "drain_seconds": elapsed - sent,
+            "errors": sum(errors.values()),
+            "latency": overall,
+            "classes": {kind: {**_percentiles(values), "errors": errors[kind]} for kind, values in latencies.items()},
+            # Chat logs dropped by a full persistence queue are lost, however quickly replies went out.
+            "sustained": (
+                achieved >= rate * SUSTAINED and overall.get("p95_ms", 0) <= slo * 1000 and not persistence_dropped
+            ),
+            "queueing": {
+                "event_loop": {**_percentiles(lateness), "stalls": EVENT_LOOP_STALLS.total() - stalls_before},
+                "executors": {
+                    name: {
+                        **wait,
+                        "rejected": EXECUTOR_REJECTED.value(name) - rejected_before[name],
+                    }
+                    for name, wait in _waited(
+                        executors_before, _histogram(EXECUTOR_QUEUE_SECONDS, list(EXECUTOR_POOLS))
+                    ).items()
+                },
+                "database": {
+                    **_percentiles(persistence.waits),
+                    "max_depth": persistence.max_depth,
+                    "dropped": persistence_dropped,
+                },
+                "outbound": {
+                    "mean_wait_ms": statistics.fmean(
+                        [wait["mean_wait_ms"] for wait in self._outbound_waits(outbound_before).values()] or [0]
+                    ),
+                    "dropped": OUTBOUND_DROPPED.total() - dropped_before,
+                },
+            },
+        }
+
+    def _outbound_waits(self, before: Dict[str, Tuple[int, float]]) -> Dict[str, Dict]:
+        from broiestbot.outbound import OUTBOUND_QUEUE_SECONDS
+
+        return _waited(before, _histogram(OUTBOUND_QUEUE_SECONDS, list(self.rooms)))
+
+
+def bottleneck(stage: Dict) -> str:
+    """
+    Name the queue where messages waited longest during a stage.
+
+    :param Dict stage: Results of a stage.
+
+    :returns: str
+    """
+    queueing = stage["queueing"]
+    waits = {
+        "event loop": queueing["event_loop"].get("p95_ms", 0),
+        "database (persistence queue)": queueing["database"].get("p95_ms", 0),
+        "outbound queues": queueing["outbound"]["mean_wait_ms"],
+    }
+    for name, executor in queueing["executors"].items():
+        waits[f"executor `{name}`"] = executor["mean_wait_ms"]
+    name, wait = max(waits.items(), key=lambda item: item[1])
+    return f"{name} ({wait:.1f}ms)" if wait >= 1 else "none"
+
+
+def report(stage: Dict) -> None:
+    """Print a stage's results."""
+    latency = stage["latency"]
+    queueing = stage["queueing"]
+    print(
+        f"{stage['target_rate']:>6.0f}/s target: {stage['achieved_rate']:7.1f}/s achieved, "
+        f"p50={latency.get('p50_ms', 0):.1f}ms p95={latency.get('p95_ms', 0):.1f}ms "
+        f"p99={latency.get('p99_ms', 0):.1f}ms, {stage['errors']} errors"
+        f"{'' if stage['sustained'] else '  << not sustained'}"
+    )
+    loop = queueing["event_loop"]
+    print(f"{'event loop':>20}: arrival lag p95={loop.get('p95_ms', 0):.1f}ms, {loop['stalls']:.0f} stalls")
+    for name, executor in queueing["executors"].items():
+        print(
+            f"{'executor ' + name:>20}: {executor['calls']} calls, mean wait={executor['mean_wait_ms']:.1f}ms, "
+            f"{executor['rejected']:.0f} rejected"
+        )
+    database = queueing["database"]
+    print(
+        f"{'database':>20}: persistence wait p95={database.get('p95_ms', 0):.1f}ms, "
+        f"max depth={database['max_depth']}, {database['dropped']} dropped"
+    )
+    outbound = queueing["outbound"]
+    print(f"{'outbound':>20}: mean wait={outbound['mean_wait_ms']:.1f}ms, {outbound['dropped']:.0f} dropped")
+    print(f"{'bottleneck':>20}: {bottleneck(stage)}")
+
+
+async def run(options: argparse.Namespace) -> Dict:
+    """
+    Run every stage, stopping at the first which the bot can't sustain.
+
+    :param argparse.Namespace options: Parsed command-line options.
+
+    :returns: Dict
+    """
+    from broiestbot.bot import Bot
+    from broiestbot.triggers import command_index, phrase_index
+    from database.models import Command, Phrase
+
+    commands, phrases, routes, fixture_chats = load_fixture(options.fixture)
+    profile = UpstreamProfile(parse_host_values(options.latency), parse_host_values(options.errors), options.seed)
+    services = Services(
+        database=FakeDatabase({Command: commands, Phrase: phrases}, latency=options.db_latency),
+        session=SimulatedSession(routes, profile),
+        redis=FakeRedis(),
+        sdk_latency=options.sdk_latency,
+    )
+    bot = Bot(username=BOT_USERNAME, password="", rooms=[])
+    stages = []
+    with (
+        services,
+        patch("broiestbot.data.chats.PERSIST_CHAT_DATA", True),
+        patch("broiestbot.data.users.PERSIST_USER_DATA", True),
+    ):
+        services.sdks["geo"].lookup_user_by_ip.return_value = GEO_LOOKUP
+        await command_index.load()
+        await phrase_index.load()
+        chats: Dict[str, List[Dict]] = defaultdict(list)
+        for chat in fixture_chats:
+            chats[classify(chat["message"])].append(chat)
+        generator = LoadGenerator(chats, parse_mix(options.mix), options.rooms, options.users, options.seed)
+        # Untimed warm-up, so the first stage doesn't pay for importing command modules.
+        await generator.stage(bot, rate=len(fixture_chats), duration=1, slo=math.inf)
+        for rate in (float(rate) for rate in options.rates.split(",")):
+            stage = await generator.stage(bot, rate, options.duration, options.slo)
+            report(stage)
+            stages.append(stage)
+            if not stage["sustained"]:
+                break
+    sustained = [stage["target_rate"] for stage in stages if stage["sustained"]]
+    return {
+        "rooms": options.rooms,
+        "users": options.users,
+        "mix": parse_mix(options.mix),
+        "ceiling": max(sustained) if sustained else None,
+        "bottleneck": bottleneck(stages[-1]) if stages else None,
+        "stages": stages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default=FIXTURE, help="Replay fixture to draw chats from, as JSON lines.")
+    parser.add_argument("--rooms", type=int, default=10, help="Number of simulated rooms.")
+    parser.add_argument("--users", type=int, default=25, help="Number of simulated users per room.")
+    parser.add_argument("--rates", default=RATES, help="Comma-separated target rates, in chats per second.")
+    parser.add_argument("--duration", type=float, default=DURATION, help="Seconds to sustain each rate.")
+    parser.add_argument(
+        "--mix", default="command=0.3,phrase=0.15,preview=0.05,chat=0.5", help="Weight of each message class."
+    )
+    parser.add_argument(
+        "--latency",
+        action="append",
+        default=[],
+        help="Upstream latency as `host=median[:p95]` seconds; `*` for every other host. Repeatable.",
+    )
+    parser.add_argument(
+        "--errors",
+        action="append",
+        default=[],
+        help="Share of failed requests as `host=rate`; `*` for every other host.",
+    )
+    parser.add_argument("--db-latency", type=float, default=0.005, help="Seconds per database round trip.")
+    parser.add_argument("--sdk-latency", type=float, default=0.1, help="Seconds per blocking SDK call.")
+    parser.add_argument("--slo", type=float, default=SLO, help="p95 reply latency, in seconds, a stage must meet.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for reproducible runs.")
+    parser.add_argument("--output", help="File to write results to, as JSON.")
+    options = parser.parse_args()
+    if not options.latency:
+        options.latency = ["*=0.15:0.6"]
+
+    from logger import LOGGER
+
+    # Every chat is logged at INFO; keep the run's output to its results.
+    LOGGER.remove()
+    results = asyncio.run(run(options))
+    print(f"Ceiling: {results['ceiling'] or 'below the first stage'} chats/s; bottleneck: {results['bottleneck']}")
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote results to {options.output}")
+
+
+if __name__ == "__main__":
+    main()
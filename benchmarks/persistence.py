@@ -0,0 +1,109 @@
+"""
+Benchmark how long a `!command` waits for its reply while chat logs & user data are persisted.
+
+Persistence is replaced with coroutines sleeping for a simulated database round trip. The
+`inline` run awaits them ahead of `Bot.on_message`, as the bot did before persistence moved
+to a background queue; the `queued` run submits them to `persistence_queue` instead:
+
+    python -m benchmarks.persistence --messages 200 --db-latency 0.03
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+from typing import List, Optional
+from unittest.mock import AsyncMock, patch
+
+from broiestbot.bot import Bot
+from broiestbot.data import PersistenceQueue
+
+
+class StubRoom:
+    """Chatango room which records when replies are handed to the outbound queue."""
+
+    def __init__(self, name: str = "benchmarkroom"):
+        self.name = name
+        self.replied_at: List[float] = []
+
+    async def delete_message(self, *_args, **_kwargs) -> None:
+        pass
+
+
+class StubOutbound:
+    """Outbound queues which timestamp each reply on its room rather than pacing it out to Chatango."""
+
+    def send(self, room: StubRoom, *_args, **_kwargs) -> bool:
+        room.replied_at.append(time.perf_counter())
+        return True
+
+
+class StubIndex:
+    """Trigger index which answers every lookup with the same canned trigger (or none)."""
+
+    loaded = True
+
+    def __init__(self, trigger: Optional[SimpleNamespace] = None):
+        self.trigger = trigger
+
+    def get(self, *_args) -> Optional[SimpleNamespace]:
+        return self.trigger
+
+
+def _message(i: int) -> SimpleNamespace:
+    user = SimpleNamespace(name=f"benchmarkuser{i % 20}", isanon=False)
+    return SimpleNamespace(user=user, body="!ping", ip="203.0.113.1")
+
+
+async def _measure(messages: int, db_latency: float, inline: bool) -> List[float]:
+    """Reply latency of every message, in seconds."""
+
+    async def persist(*_args) -> None:
+        await asyncio.sleep(db_latency)
+
+    bot = Bot(username="broiestbot", password="", rooms=[])
+    room = StubRoom()
+    queue = PersistenceQueue(maxsize=messages * 2, workers=2)
+    latencies = []
+    with (
+        patch("broiestbot.bot.persist_user_data", persist),
+        patch("broiestbot.bot.persist_chat_logs", persist),
+        patch("broiestbot.bot.persistence_queue", queue),
+        patch("broiestbot.bot.outbound", StubOutbound()),
+        patch("broiestbot.bot.command_index", StubIndex(SimpleNamespace(type="basic", response="pong"))),
+        patch("broiestbot.bot.phrase_index", StubIndex()),
+        patch("broiestbot.bot.check_blacklisted_users", AsyncMock()),
+        patch("broiestbot.bot.ban_daddy_anons", AsyncMock()),
+        patch("broiestbot.bot.LOGGER"),
+    ):
+        for i in range(messages):
+            message = _message(i)
+            started = time.perf_counter()
+            if inline:
+                # User lookup (SELECT), then the user & chat INSERTs, awaited one after another.
+                await persist()
+                await persist()
+                await persist()
+            await bot.on_message(room, message)
+            latencies.append(room.replied_at[-1] - started)
+        await queue.close()
+    return latencies
+
+
+def _report(label: str, latencies: List[float]) -> None:
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"{label:>7}: p50={cuts[49] * 1000:.2f}ms p95={cuts[94] * 1000:.2f}ms p99={cuts[98] * 1000:.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--db-latency", type=float, default=0.03, help="Simulated seconds per database round trip.")
+    options = parser.parse_args()
+    _report("inline", asyncio.run(_measure(options.messages, options.db_latency, inline=True)))
+    _report("queued", asyncio.run(_measure(options.messages, options.db_latency, inline=False)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Replay recorded chat through `Bot.on_message` to measure throughput & latency per kind of message.
+
+Chatango, the database, Redis, upstream APIs & blocking SDKs are replaced with the
+in-process stand-ins from `benchmarks.doubles`, so every chat runs the bot's real code
+path while database queries, HTTP requests & SDK calls are counted rather than made.
+
+A fixture is JSON lines, each of which is a command (`{"command", "type", "response"}`),
+a trigger phrase (`{"phrase", "response"}`), a canned upstream response (`{"host", "json"}`)
+or a chat (`{"room", "user", "message", "ip"}`). Recent chat can be exported from the
+`chat` table (along with the `commands` & `phrases` tables) to replay real traffic:
+
+    python -m benchmarks.replay
+    python -m benchmarks.replay --export replay.jsonl --limit 5000
+    python -m benchmarks.replay --fixture replay.jsonl --loops 3 --output replay.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter, defaultdict
+from os import path
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+from unittest.mock import patch
+
+from benchmarks.doubles import (
+    FakeDatabase,
+    FakeRedis,
+    ReplayRoom,
+    RoutedSession,
+    Services,
+)
+
+from tests.aiohttp_mocks import FakeResponse
+
+FIXTURE = path.join(path.dirname(path.abspath(__file__)), "fixtures", "chat_replay.jsonl")
+BOT_USERNAME = "broiestbot"
+
+CLASS_COMMAND = "command"
+CLASS_PHRASE = "phrase"
+CLASS_PREVIEW = "preview"
+CLASS_CHAT = "chat"
+CLASSES = (CLASS_COMMAND, CLASS_PHRASE, CLASS_PREVIEW, CLASS_CHAT)
+
+# Sample IP lookup returned by the stand-in `geo` client, so user data is persisted in full.
+GEO_LOOKUP = {"city": "Philadelphia", "region": "Pennsylvania", "country_name": "United States", "languages": []}
+
+
+def load_fixture(fixture: str) -> Tuple[List, List, Dict[str, FakeResponse], List[Dict]]:
+    """
+    Parse a replay fixture into commands, phrases, upstream responses & chats.
+
+    :param str fixture: Path to a JSON lines replay fixture.
+
+    :returns: Tuple[List, List, Dict[str, FakeResponse], List[Dict]]
+    """
+    from database.models import Command, Phrase
+
+    commands, phrases, routes, chats = [], [], {}, []
+    with open(fixture, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if "command" in row:
+                commands.append(Command(command=row["command"], type=row["type"], response=row.get("response")))
+            elif "phrase" in row:
+                phrases.append(Phrase(phrase=row["phrase"], response=row["response"]))
+            elif "host" in row:
+                routes[row["host"]] = FakeResponse(status=row.get("status", 200), json_data=row.get("json"))
+            else:
+                chats.append(row)
+    return commands, phrases, routes, chats
+
+
+async def export_fixture(fixture: str, limit: int) -> int:
+    """
+    Write the `commands` & `phrases` tables and the most recent chats to a replay fixture.
+
+    :param str fixture: Path to write the JSON lines fixture to.
+    :param int limit: Number of recent chats to export.
+
+    :returns: int
+    """
+    from sqlalchemy import select
+
+    from database import async_session
+    from database.models import Chat, Command, Phrase
+
+    async with async_session() as db:
+        commands = (await db.execute(select(Command))).scalars().all()
+        phrases = (await db.execute(select(Phrase))).scalars().all()
+        chats = (await db.execute(select(Chat).order_by(Chat.id.desc()).limit(limit))).scalars().all()
+    with open(fixture, "w", encoding="utf-8") as f:
+        for command in commands:
+            f.write(json.dumps({"command": command.command, "type": command.type, "response": command.response}) + "\n")
+        for phrase in phrases:
+            f.write(json.dumps({"phrase": phrase.phrase, "response": phrase.response}) + "\n")
+        for chat in reversed(chats):
+            # The `chat` table doesn't record IPs, so exported chats skip user data lookups.
+            f.write(json.dumps({"room": chat.room, "user": chat.username, "message": chat.message, "ip": None}) + "\n")
+    return len(chats)
+
+
+def classify(chat_message: str) -> str:
+    """
+    Kind of message a chat is, by the path `Bot.on_message` takes to respond to it.
+
+    :param str chat_message: Chat sent by a user.
+
+    :returns: str
+    """
+    from broiestbot.classifier import (
+        INTENT_TWITTER_PREVIEW,
+        INTENT_WIKI_PREVIEW,
+        INTENT_YOUTUBE_PREVIEW,
+        classify_message,
+    )
+    from broiestbot.triggers import phrase_index
+
+    if chat_message.startswith("!"):
+        return CLASS_COMMAND
+    if chat_message.startswith("?") and len(chat_message) > 3:
+        return CLASS_PREVIEW
+    intent = classify_message(chat_message, youtube_previews=True)
+    if intent in (INTENT_YOUTUBE_PREVIEW, INTENT_TWITTER_PREVIEW, INTENT_WIKI_PREVIEW):
+        return CLASS_PREVIEW
+    if phrase_index.get(chat_message) is not None or chat_message.lower() == "tm":
+        return CLASS_PHRASE
+    return CLASS_CHAT
+
+
+def room_message(chat: Dict) -> SimpleNamespace:
+    """Chatango message, as `Bot.on_message` receives it, for a fixture chat."""
+    user_name = chat["user"]
+    user = SimpleNamespace(name=user_name, isanon=user_name.startswith("!anon"))
+    return SimpleNamespace(user=user, body=chat["message"], ip=chat.get("ip"))
+
+
+async def replay(
+    fixture: str, loops: int, concurrency: int, db_latency: float, http_latency: float
+) -> Tuple[Dict[str, List[float]], Counter, float, Services, Dict[str, ReplayRoom]]:
+    """
+    Replay every chat in a fixture through `Bot.on_message`.
+
+    :param str fixture: Path to a JSON lines replay fixture.
+    :param int loops: Number of times to replay the fixture.
+    :param int concurrency: Chats handled at once.
+    :param float db_latency: Simulated seconds per database round trip.
+    :param float http_latency: Simulated seconds per upstream HTTP request.
+
+    :returns: Tuple[Dict[str, List[float]], Counter, float, Services, Dict[str, ReplayRoom]]
+    """
+    from broiestbot.bot import Bot
+    from broiestbot.data import PersistenceQueue
+    from broiestbot.outbound import OutboundQueues
+    from broiestbot.triggers import command_index, phrase_index
+    from config import PERSISTENCE_QUEUE_SIZE, PERSISTENCE_WORKERS
+    from database.models import Command, Phrase
+
+    commands, phrases, routes, chats = load_fixture(fixture)
+    session = RoutedSession(routes)
+    session.delay = lambda _host: http_latency
+    services = Services(
+        database=FakeDatabase({Command: commands, Phrase: phrases}, latency=db_latency),
+        session=session,
+        redis=FakeRedis(),
+    )
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Counter = Counter()
+    rooms: Dict[str, ReplayRoom] = {}
+    bot = Bot(username=BOT_USERNAME, password="", rooms=[])
+    outbound = OutboundQueues(interval=0)
+    persistence = PersistenceQueue(maxsize=PERSISTENCE_QUEUE_SIZE, workers=PERSISTENCE_WORKERS)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def handle(chat: Dict, kind: str) -> None:
+        room = rooms.setdefault(chat["room"], ReplayRoom(chat["room"]))
+        message = room_message(chat)
+        async with limit:
+            started = time.perf_counter()
+            try:
+                await bot.on_message(room, message)
+            except Exception:
+                errors[kind] += 1
+            latencies[kind].append(time.perf_counter() - started)
+            room.history.append(message)
+
+    with (
+        services,
+        patch("broiestbot.bot.outbound", outbound),
+        patch("broiestbot.bot.persistence_queue", persistence),
+        patch("broiestbot.data.chats.PERSIST_CHAT_DATA", True),
+        patch("broiestbot.data.users.PERSIST_USER_DATA", True),
+    ):
+        services.sdks["geo"].lookup_user_by_ip.return_value = GEO_LOOKUP
+        await command_index.load()
+        await phrase_index.load()
+        kinds = [classify(chat["message"]) for chat in chats]
+        # Untimed pass, so the replay measures warm handlers rather than first imports of command modules.
+        await asyncio.gather(
+            *(bot.on_message(ReplayRoom(chat["room"]), room_message(chat)) for chat in chats), return_exceptions=True
+        )
+        await persistence.close()
+        services.reset()
+        started = time.perf_counter()
+        for _ in range(loops):
+            await asyncio.gather(*(handle(chat, kind) for chat, kind in zip(chats, kinds)))
+        elapsed = time.perf_counter() - started
+        # Flush replies & pending writes, so the counts include everything the chats caused.
+        await outbound.close()
+        await persistence.close()
+    return latencies, errors, elapsed, services, rooms
+
+
+def summarize(
+    latencies: Dict[str, List[float]], errors: Counter, elapsed: float, services: Services, rooms: Dict[str, ReplayRoom]
+) -> Dict:
+    """
+    Throughput, per-class latency percentiles & calls made to each stand-in service.
+
+    :returns: Dict
+    """
+    messages = sum(len(values) for values in latencies.values())
+    classes = {}
+    for kind in CLASSES:
+        values = latencies.get(kind)
+        if not values:
+            continue
+        cuts = statistics.quantiles(values, n=100) if len(values) > 1 else [values[0]] * 99
+        classes[kind] = {
+            "messages": len(values),
+            "errors": errors[kind],
+            "p50_ms": cuts[49] * 1000,
+            "p95_ms": cuts[94] * 1000,
+            "p99_ms": cuts[98] * 1000,
+        }
+    return {
+        "messages": messages,
+        "seconds": elapsed,
+        "messages_per_second": messages / elapsed if elapsed else 0,
+        "classes": classes,
+        "db": {
+            "queries": services.database.queries,
+            "commits": services.database.commits,
+            "writes": services.database.writes,
+        },
+        "http": {"requests": sum(services.session.hosts.values()), "hosts": dict(services.session.hosts)},
+        "sdk_calls": services.sdk_calls,
+        "redis_commands": dict(services.redis.commands),
+        "replies": sum(len(room.sent) for room in rooms.values()),
+    }
+
+
+def report(results: Dict) -> None:
+    """Print a replay's results."""
+    print(
+        f"{results['messages']} messages in {results['seconds']:.2f}s "
+        f"({results['messages_per_second']:.0f} msgs/sec), {results['replies']} replies sent"
+    )
+    for kind, stats in results["classes"].items():
+        print(
+            f"{kind:>8}: n={stats['messages']:<5} errors={stats['errors']:<3} p50={stats['p50_ms']:.2f}ms "
+            f"p95={stats['p95_ms']:.2f}ms p99={stats['p99_ms']:.2f}ms"
+        )
+    db = results["db"]
+    print(f"{'db':>8}: {db['queries']} queries, {db['commits']} commits, {db['writes']} rows written")
+    hosts = ", ".join(f"{host}={count}" for host, count in sorted(results["http"]["hosts"].items()))
+    print(f"{'http':>8}: {results['http']['requests']} requests ({hosts or 'none'})")
+    print(f"{'sdk':>8}: {results['sdk_calls']} calls")
+    print(f"{'redis':>8}: {sum(results['redis_commands'].values())} commands")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default=FIXTURE, help="Replay fixture, as JSON lines.")
+    parser.add_argument("--export", help="Export the database's recent chat to this fixture instead of replaying.")
+    parser.add_argument("--limit", type=int, default=5000, help="Number of recent chats to export.")
+    parser.add_argument("--loops", type=int, default=5, help="Times to replay the fixture.")
+    parser.add_argument("--concurrency", type=int, default=1, help="Chats handled at once.")
+    parser.add_argument("--db-latency", type=float, default=0, help="Simulated seconds per database round trip.")
+    parser.add_argument("--http-latency", type=float, default=0, help="Simulated seconds per upstream request.")
+    parser.add_argument("--output", help="File to write results to, as JSON.")
+    options = parser.parse_args()
+
+    if options.export:
+        exported = asyncio.run(export_fixture(options.export, options.limit))
+        print(f"Exported {exported} chats to {options.export}")
+        return
+
+    from logger import LOGGER
+
+    # Every chat is logged at INFO; keep the replay's output to its results.
+    LOGGER.remove()
+    results = summarize(
+        *asyncio.run(
+            replay(options.fixture, options.loops, options.concurrency, options.db_latency, options.http_latency)
+        )
+    )
+    report(results)
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote results to {options.output}")
+
+
+if __name__ == "__main__":
+    main()
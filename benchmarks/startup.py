@@ -0,0 +1,234 @@
+"""
+Benchmark how long the bot takes to come up after a deploy or crash.
+
+Each module is imported in a fresh interpreter with `-X importtime`, so every import is cold.
+Lifespan startup is timed the same way, from `import asgi` until uvicorn would receive
+`lifespan.startup.complete`, with the database, trigger refresh & Chatango connection stubbed.
+Results are written as JSON, and compared against an earlier run when given one:
+
+    python -m benchmarks.startup --output startup.json
+    python -m benchmarks.startup --output after.json --compare startup.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from os import listdir, path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+COMMANDS_DIR = path.join(ROOT, "broiestbot", "commands")
+MODULES = ["config", "clients", "asgi", "broiestbot.commands"]
+REPEAT = 5
+
+
+def command_packages() -> List[str]:
+    """
+    Every command module & package, found without importing `broiestbot.commands`.
+
+    :returns: List[str]
+    """
+    names = []
+    for entry in sorted(listdir(COMMANDS_DIR)):
+        if entry.startswith("_") or entry == "tests":
+            continue
+        if entry.endswith(".py"):
+            names.append(f"broiestbot.commands.{entry[:-3]}")
+        elif path.isfile(path.join(COMMANDS_DIR, entry, "__init__.py")):
+            names.append(f"broiestbot.commands.{entry}")
+    return names
+
+
+def parse_importtime(output: str) -> List[Tuple[int, int, int, str]]:
+    """
+    Parse `-X importtime` output into `(depth, self µs, cumulative µs, module)` rows.
+
+    :param str output: Standard error of an interpreter run with `-X importtime`.
+
+    :returns: List[Tuple[int, int, int, str]]
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, int(fields[0]), int(fields[1]), name.strip()))
+    return rows
+
+
+def time_import(module: str) -> Dict:
+    """
+    Import a module in a fresh interpreter & summarize where the time went.
+
+    :param str module: Dotted name of the module to import.
+
+    :returns: Dict
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+        return {"error": error}
+    rows = parse_importtime(result.stderr)
+    slowest = sorted(rows, key=lambda row: row[1], reverse=True)[:5]
+    return {
+        "total_ms": sum(cumulative for depth, _, cumulative, _ in rows if depth == 0) / 1000,
+        "modules": len(rows),
+        "slowest": {name: self_us / 1000 for _, self_us, _, name in slowest},
+    }
+
+
+def best_import(module: str, repeat: int) -> Dict:
+    """
+    Fastest of several cold imports of a module.
+
+    :param str module: Dotted name of the module to import.
+    :param int repeat: Number of fresh interpreters to import the module in.
+
+    :returns: Dict
+    """
+    runs = [time_import(module) for _ in range(repeat)]
+    errors = [run for run in runs if "error" in run]
+    if errors:
+        return errors[0]
+    return min(runs, key=lambda run: run["total_ms"])
+
+
+async def _lifespan(app) -> Tuple[float, float]:
+    """Drive the ASGI lifespan protocol; returns seconds to complete startup & shutdown."""
+    received: asyncio.Queue = asyncio.Queue()
+    sent: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(app({"type": "lifespan"}, received.get, sent.put))
+
+    async def step(event: str) -> float:
+        started = time.perf_counter()
+        await received.put({"type": f"lifespan.{event}"})
+        reply = asyncio.ensure_future(sent.get())
+        await asyncio.wait((reply, task), return_when=asyncio.FIRST_COMPLETED)
+        if not reply.done():
+            reply.cancel()
+            task.result()
+            raise RuntimeError(f"Lifespan exited without completing {event}")
+        if reply.result()["type"] != f"lifespan.{event}.complete":
+            raise RuntimeError(f"Lifespan {event} failed: {reply.result()}")
+        return time.perf_counter() - started
+
+    startup = await step("startup")
+    shutdown = await step("shutdown")
+    await task
+    return startup, shutdown
+
+
+def lifespan_child() -> None:
+    """Time `import asgi` & its lifespan in this interpreter, with outbound services stubbed; prints JSON."""
+    from unittest.mock import AsyncMock, patch
+
+    started = time.perf_counter()
+    import asgi
+
+    imported = time.perf_counter() - started
+
+    async def run_bot(_rooms) -> None:
+        await asyncio.Event().wait()
+
+    with (
+        patch("asgi.init_db", AsyncMock()),
+        patch("asgi.start_trigger_refresh", AsyncMock()),
+        patch("asgi.stop_trigger_refresh", AsyncMock()),
+        patch("asgi._run_bot", run_bot),
+        patch("asgi.ENVIRONMENT", "development"),
+        patch("asgi.CHATANGO_TEST_ROOM", "benchmarkroom"),
+    ):
+        startup, shutdown = asyncio.run(_lifespan(asgi.app))
+    print(json.dumps({"import_ms": imported * 1000, "startup_ms": startup * 1000, "shutdown_ms": shutdown * 1000}))
+
+
+def time_lifespan(repeat: int) -> Dict:
+    """
+    Fastest of several cold starts, each in a fresh interpreter.
+
+    :param int repeat: Number of cold starts.
+
+    :returns: Dict
+    """
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", "from benchmarks.startup import lifespan_child; lifespan_child()"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"}
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    best = min(runs, key=lambda run: run["import_ms"] + run["startup_ms"])
+    return {**best, "ready_ms": best["import_ms"] + best["startup_ms"]}
+
+
+def git_commit() -> Optional[str]:
+    """Commit the benchmark ran against, if run from a git checkout."""
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+def compare(current: Dict, baseline: Dict) -> None:
+    """Print how each measurement changed since a baseline run."""
+    rows = [
+        (f"import {module}", result, baseline.get("imports", {}).get(module, {}), "total_ms")
+        for module, result in current["imports"].items()
+    ]
+    rows.append(("lifespan", current["lifespan"], baseline.get("lifespan", {}), "ready_ms"))
+    for label, now, then, key in rows:
+        if key in now and then.get(key):
+            change = (now[key] - then[key]) / then[key] * 100
+            print(f"{label:>40}: {then[key]:9.1f}ms -> {now[key]:9.1f}ms ({change:+.0f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default="startup.json", help="File to write results to, as JSON.")
+    parser.add_argument("--compare", help="Earlier results to compare against.")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="Cold starts per measurement; the fastest is kept.")
+    options = parser.parse_args()
+
+    imports = {}
+    for module in MODULES + command_packages():
+        imports[module] = best_import(module, options.repeat)
+        summary = imports[module].get("error") or f"{imports[module]['total_ms']:.1f}ms"
+        print(f"{'import ' + module:>40}: {summary}")
+    lifespan = time_lifespan(options.repeat)
+    summary = lifespan.get("error") or f"{lifespan['ready_ms']:.1f}ms until startup complete"
+    print(f"{'lifespan':>40}: {summary}")
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "repeat": options.repeat,
+        "imports": imports,
+        "lifespan": lifespan,
+    }
+    with open(options.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote results to {options.output}")
+    if options.compare:
+        with open(options.compare, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
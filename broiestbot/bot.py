@@ -1,102 +1,34 @@
 """Chatango bot."""
 
-import asyncio
 import re
 from typing import Optional, Tuple
 
 import chatango
 from chatango import Room, RoomMessage
 from emoji import emojize
+from executors import ExecutorSaturated, run_blocking
 from logger import LOGGER
+from tracing import tracer
 
-from broiestbot.commands import (  # get_crypto_chart,
-    all_leagues_golden_boot,
-    bach_gang_counter,
-    basic_message,
-    blaze_time_remaining,
-    change_or_stay_vote,
-    covid_cases_usa,
-    create_wiki_preview,
-    epl_golden_boot,
-    f1_grand_prix,
-    fetch_aafk_fixture_data,
-    fetch_fox_fixtures,
-    fetch_latest_image_from_gcs_bucket,
-    fetch_random_image_from_gcs_bucket,
-    fetch_redgifs_gif,
-    fetch_sleeper_matchups,
-    find_movie,
-    footy_all_upcoming_fixtures,
-    footy_live_fixtures,
-    footy_live_odds,
-    footy_stats_for_live_fixtures,
-    footy_team_lineups,
-    footy_today_fixtures_odds,
-    footy_upcoming_fixtures,
-    gcs_count_images_in_bucket,
-    generate_llm_response,
-    generate_twitter_preview,
-    generate_youtube_video_preview,
-    get_all_live_twitch_streams,
-    get_crypto_price,
-    get_current_show,
-    get_current_weather,
-    get_english_definition,
-    get_english_translation,
-    get_live_nfl_game_summaries,
-    get_live_poll_results,
-    get_odds,
-    get_psn_game_trophies,
-    get_psn_online_friends,
-    get_song_lyrics,
-    get_stock,
-    get_summer_olympic_medals,
-    get_titles_with_stats,
-    get_today_nfl_games,
-    get_top_crypto,
-    get_urban_definition,
-    get_winter_olympic_medals,
-    klipy_image_search,
-    league_table_standings,
-    live_nba_games,
-    mls_standings,
-    nba_standings,
-    nontent_time_remaining,
-    random_image,
-    search_youtube_video,
-    send_text_message,
-    spam_random_images_from_gcs_bucket,
-    streaming_service_show,
-    time_until_wayne,
-    today_sumo_matches,
-    today_upcoming_fixtures,
-    tovala_counter,
-    tuner,
-    upcoming_nba_games,
-    upcoming_sumo_matches,
-    wiki_summary,
-)
-from config import (
-    BUND_LEAGUE_ID,
-    CHATANGO_IGNORED_IPS,
-    CHATANGO_IGNORED_USERS,
-    ELITESERIEN_LEAGUE_ID,
-    ENGLISH_CHAMPIONSHIP_LEAGUE_ID,
-    ENGLISH_LEAGUE_ONE_ID,
-    ENGLISH_LEAGUE_TWO_ID,
-    ENGLISH_NATIONAL_LEAGUE_ID,
-    EPL_LEAGUE_ID,
-    LIGA_LEAGUE_ID,
-    LIGUE_ONE_ID,
-    PRIMEIRA_LIGA_ID,
-    YOUTUBE_VIDEO_ID_REGEX,
-)
+from config import CHATANGO_IGNORED_IPS, CHATANGO_IGNORED_USERS
 from database import async_session
 from database.models import Command, Phrase
 
-from .data import persist_chat_logs, persist_user_data
+from .classifier import (
+    INTENT_BANNED_WORD,
+    INTENT_BOT_MENTION,
+    INTENT_SILENT_BAN,
+    INTENT_TWITTER_PREVIEW,
+    INTENT_WIKI_PREVIEW,
+    INTENT_YOUTUBE_PREVIEW,
+    classify_message,
+)
+from .data import persist_chat_logs, persist_user_data, persistence_queue
+from .dispatch import CommandContext, router, run_handler
 from .moderation import ban_daddy_anons, ban_word, check_blacklisted_users
 from .moderation.users import ignored_user
+from .outbound import outbound
+from .triggers import command_index, phrase_index
 
 
 async def _db_fetch_command(cmd: str) -> Optional[Command]:
@@ -147,9 +79,14 @@ class Bot(chatango.Client):
         """
         Construct a message response based on command type and arguments.
 
-        Handlers which fetch data over HTTP are coroutines (`aiohttp`) and are awaited
-        directly; handlers still backed by a blocking third-party SDK (GCS, Twilio, IMDb,
-        Genius, etc.) are dispatched with `asyncio.to_thread` to keep the event loop free.
+        Each command type is declared once in `broiestbot.dispatch.handlers` and resolved
+        with a single lookup. Handlers which fetch data over HTTP are coroutines (`aiohttp`)
+        and are awaited directly. Handlers still backed by a blocking third-party SDK (GCS,
+        Genius, etc.) run on a bounded executor reserved for that integration (`executors`),
+        so one slow SDK can't starve the others. Concurrent invocations which would produce
+        the same response (ie: five people typing `!livefixtures` after a goal) share a single
+        in-flight call. Handlers declaring a `ttl` reuse their cached response until it expires.
+        Every handler runs under a deadline which also bounds the HTTP requests it makes.
 
         :param str cmd_type: `Type` of command triggered by a user.
         :param str content: Content to be used in response.
@@ -161,162 +98,17 @@ class Bot(chatango.Client):
 
         :returns: Optional[str]
         """
-        if cmd_type == "basic":
-            return basic_message(content)
-        elif cmd_type == "random":
-            return random_image(content)
-        elif cmd_type == "stock" and args:
-            return await get_stock(args)
-        elif cmd_type == "randomimage":
-            return await asyncio.to_thread(fetch_random_image_from_gcs_bucket, content)
-        elif cmd_type == "imagespam":
-            return await asyncio.to_thread(spam_random_images_from_gcs_bucket, content)
-        elif cmd_type == "crypto" and command:
-            return await get_crypto_price(command.lower(), content)
-        elif cmd_type == "giphy":
-            return await klipy_image_search(content)
-        elif cmd_type == "weather" and args and room_name and user_name:
-            return await get_current_weather(args, room_name, user_name)
-        elif cmd_type == "wiki" and args:
-            return await asyncio.to_thread(wiki_summary, args)
-        elif cmd_type == "imdb" and args:
-            return await find_movie(args)
-        elif cmd_type == "streamingshow" and args:
-            return await streaming_service_show(args)
-        elif cmd_type == "urban" and args:
-            return await get_urban_definition(args)
-        elif cmd_type == "420" and args is None:
-            return blaze_time_remaining()
-        elif cmd_type == "nontent" and user_name:
-            return nontent_time_remaining(user_name)
-        elif cmd_type == "sms" and args and user_name and content:
-            return await asyncio.to_thread(send_text_message, args, user_name, content)
-        elif cmd_type == "epltable":
-            return await league_table_standings(EPL_LEAGUE_ID)
-        elif cmd_type == "ligatable":
-            return await league_table_standings(LIGA_LEAGUE_ID)
-        elif cmd_type == "bundtable":
-            return await league_table_standings(BUND_LEAGUE_ID)
-        elif cmd_type == "efltable":
-            return await league_table_standings(ENGLISH_CHAMPIONSHIP_LEAGUE_ID)
-        elif cmd_type == "eng1table":
-            return await league_table_standings(ENGLISH_LEAGUE_ONE_ID)
-        elif cmd_type == "eng2table":
-            return await league_table_standings(ENGLISH_LEAGUE_TWO_ID)
-        elif cmd_type == "engnationaltable":
-            return await league_table_standings(ENGLISH_NATIONAL_LEAGUE_ID)
-        elif cmd_type == "liguetable":
-            return await league_table_standings(LIGUE_ONE_ID)
-        elif cmd_type == "primeratable":
-            return await league_table_standings(PRIMEIRA_LIGA_ID)
-        elif cmd_type == "estable":
-            return await league_table_standings(ELITESERIEN_LEAGUE_ID)
-        elif cmd_type == "mlstable":
-            return await mls_standings()
-        elif cmd_type == "fixtures" and room_name and user_name:
-            return await footy_upcoming_fixtures(room_name, user_name)
-        elif cmd_type == "allfixtures" and room_name and user_name:
-            return await footy_all_upcoming_fixtures(room_name, user_name)
-        elif cmd_type == "livefixtures" and user_name:
-            return await footy_live_fixtures(user_name, subs=True)
-        elif cmd_type == "livefixtureswithsubs" and user_name:
-            return await footy_live_fixtures(user_name, subs=True)
-        elif cmd_type == "livefixturestats" and room_name and user_name:
-            return await footy_stats_for_live_fixtures(room_name, user_name)
-        elif cmd_type == "footystats" and room_name and user_name:
-            return await footy_stats_for_live_fixtures(room_name, user_name)
-        elif cmd_type == "todayfixtures" and room_name and user_name:
-            return await today_upcoming_fixtures(room_name, user_name)
-        elif cmd_type == "liveodds" and user_name:
-            return await footy_live_odds(user_name)
-        elif cmd_type == "goldenboot":
-            return await epl_golden_boot()
-        elif cmd_type == "goldenshoe":
-            return await all_leagues_golden_boot()
-        elif cmd_type == "footypredicts" and room_name and user_name:
-            return await footy_today_fixtures_odds(room_name, user_name)
-        elif cmd_type == "foxtures" and room_name and user_name:
-            return await fetch_fox_fixtures(room_name, user_name)
-        elif cmd_type == "aafkxtures" and room_name and user_name:
-            return await fetch_aafk_fixture_data(room_name, user_name)
-        elif cmd_type == "footyxi" and room_name and user_name:
-            return await footy_team_lineups(room_name, user_name)
-        elif cmd_type == "covid":
-            return await covid_cases_usa()
-        elif cmd_type == "lyrics" and args:
-            return await asyncio.to_thread(get_song_lyrics, args)
-        elif cmd_type == "entranslation" and command and args:
-            return await get_english_translation(command, content, args)
-        elif cmd_type == "olympics":
-            return await asyncio.to_thread(get_summer_olympic_medals)
-        elif cmd_type in ("wolympics", "winterolympics"):
-            return await asyncio.to_thread(get_winter_olympic_medals)
-        elif cmd_type == "footyodds" and room_name and user_name:
-            return await footy_today_fixtures_odds(room_name, user_name)
-        elif cmd_type == "twitch":
-            return await get_all_live_twitch_streams()
-        elif cmd_type == "todaynfl":
-            return await get_today_nfl_games()
-        elif cmd_type == "livenfl" and user_name:
-            return await get_live_nfl_game_summaries(user_name)
-        elif cmd_type == "topcrypto":
-            return await get_top_crypto()
-        elif cmd_type == "define" and args and user_name:
-            return await asyncio.to_thread(get_english_definition, user_name, args)
-        elif cmd_type == "tune" and args and user_name and bot_username:
-            return await tuner(args, user_name, bot_username)
-        elif cmd_type == "wayne" and user_name:
-            return time_until_wayne(user_name)
-        elif cmd_type == "np" and bot_username:
-            return await get_current_show(True, bot_username)
-        elif cmd_type == "reserved":
-            return None
-        elif cmd_type == "todaysumo":
-            return await today_sumo_matches()
-        elif cmd_type == "sumo":
-            return await upcoming_sumo_matches()
-        elif cmd_type == "f1":
-            return await f1_grand_prix()
-        elif cmd_type == "nbastandings":
-            return await nba_standings()
-        elif cmd_type == "nbagames":
-            return await upcoming_nba_games()
-        elif cmd_type == "nbalive":
-            return await live_nba_games()
-        elif cmd_type == "livenba":
-            return await live_nba_games()
-        elif cmd_type == "tovala" and user_name:
-            return await asyncio.to_thread(tovala_counter, user_name)
-        elif cmd_type == "imagecount":
-            return await asyncio.to_thread(gcs_count_images_in_bucket, content)
-        elif cmd_type == "changeorstayvote" and room_name and user_name:
-            return await asyncio.to_thread(change_or_stay_vote, user_name, content)
-        elif cmd_type == "changeorstay" and user_name:
-            return await asyncio.to_thread(get_live_poll_results, user_name)
-        elif cmd_type == "odds":
-            return await get_odds(content)
-        elif cmd_type == "bachcount" and args and user_name:
-            return await asyncio.to_thread(bach_gang_counter, user_name, args)
-        elif cmd_type == "latestimage":
-            return await asyncio.to_thread(fetch_latest_image_from_gcs_bucket, content)
-        elif cmd_type == "psntrophies":
-            return await asyncio.to_thread(get_psn_game_trophies)
-        elif cmd_type == "bropsn":
-            return await asyncio.to_thread(get_titles_with_stats)
-        elif cmd_type == "sleeper" and user_name:
-            return await fetch_sleeper_matchups(user_name)
-        # elif cmd_type == "cryptochart" and args:
-        #     return await get_crypto_chart(args)
-        elif cmd_type == "lesbians" and user_name:
-            return await asyncio.to_thread(fetch_redgifs_gif, "lesbians", user_name)
-        elif cmd_type == "nsfw" and args and user_name:
-            return await asyncio.to_thread(fetch_redgifs_gif, args, user_name, True)
-        elif cmd_type == "psn":
-            return await asyncio.to_thread(get_psn_online_friends)
-        # elif cmd_type == "philliesgames":
-        #    return today_phillies_games(
-        # elif cmd_type == "youtube" and args:
-        #     return search_youtube_for_video(args)
+        ctx = CommandContext(
+            content=content,
+            command=command.lower() if command else command,
+            args=args,
+            room_name=room_name,
+            user_name=user_name,
+            bot_username=bot_username,
+        )
+        handler = router.resolve(cmd_type, ctx)
+        if handler is not None:
+            return await run_handler(handler, ctx)
         LOGGER.warning(f"No response for command `{command}` {args}")
         return emojize(
             f":warning: idk wtf u did but bot is ded now, thanks @{user_name} :warning:",
@@ -327,6 +119,10 @@ class Bot(chatango.Client):
         """
         Triggers upon every chat message to parse commands, validate users, and save chat logs.
 
+        Moderation runs first and is awaited; chat logs & user data are handed to a background
+        queue so replies never wait on the database. Replies are queued per room and sent
+        by a single paced writer, so slow sends never hold up the handler that produced them.
+
         :param Room room: Current Chatango room object.
         :param RoomMessage message: Raw chat message submitted by a user.
 
@@ -337,51 +133,58 @@ class Bot(chatango.Client):
         user_name = user.name
         room_name = room.name.lower()
         bot_username = self.username.lower()
-        self._log_message(room, user_name, message)
-        await check_blacklisted_users(room, user_name, message)
-        await ban_daddy_anons(room, user, message)
-        await persist_user_data(room_name, user, message, bot_username)
-        await persist_chat_logs(user_name, room_name, chat_message, bot_username)
-        if chat_message.startswith("?") and len(chat_message) > 3:
-            search_query = chat_message[1:].strip()
-            yt_video_result = await asyncio.to_thread(search_youtube_video, search_query)
-            if yt_video_result:
-                await room.send_message(yt_video_result, use_html=True)
-        if chat_message.startswith("!"):
-            await self._process_command(chat_message, room, user_name, message)
-        if (
-            YOUTUBE_VIDEO_ID_REGEX.search(chat_message)
-            and user_name != bot_username
-            and "bot" not in user_name
-            and "lmao" not in user_name
-        ):
-            preview = await asyncio.to_thread(generate_youtube_video_preview, chat_message)
-            if preview:
-                await room.send_message(preview, use_html=True)
-        elif re.match(r"((https?):\/\/)?(www.)?x\.com(\/@?(\w){1,15})\/status\/[0-9]{19}", chat_message):
-            preview = await generate_twitter_preview(chat_message)
-            if preview:
-                await room.send_message(preview, use_html=True)
-        elif re.match(r".+(wikipedia.org)", chat_message):
-            preview = await create_wiki_preview(chat_message)
-            if preview:
-                await room.send_message(preview, use_html=True)
-        elif "https://i.imgur.com/wppfinC.png" in chat_message:
-            await ban_word(room, message, user_name, silent=True)
-        elif re.match(r"bl\/S+b", chat_message) and "south" not in chat_message:
-            await ban_word(room, message, user_name, silent=False)
-        elif chat_message == "image not found :(":
-            await ban_word(room, message, user_name, silent=True)
-        elif "http://broiestbro." in chat_message:
-            await ban_word(room, message, user_name, silent=True)
-        elif "https://i.imgur.com/bQJxsBV.png" in chat_message:
-            await ban_word(room, message, user_name, silent=True)
-        elif re.search(r"@bro(?![a-zA-Z0-9])", chat_message):
-            await self._respond_llm_prompt(user_name, room)
-        elif "idk wtf u did but bot is ded now, thanks" in chat_message:
-            await ban_word(room, message, user_name, silent=True)
-        else:
-            await self._process_phrase(chat_message, room, user_name, message, bot_username)
+        with tracer.span("chat.message", resource=room_name, user=user_name):
+            self._log_message(room, user_name, message)
+            await check_blacklisted_users(room, user_name, message)
+            await ban_daddy_anons(room, user, message)
+            persistence_queue.submit(persist_user_data, room_name, user, message, bot_username)
+            persistence_queue.submit(persist_chat_logs, user_name, room_name, chat_message, bot_username)
+            if chat_message.startswith("?") and len(chat_message) > 3:
+                search_query = chat_message[1:].strip()
+                # Command modules are imported lazily: the YouTube scraper only loads once someone searches.
+                from broiestbot.commands import search_youtube_video
+
+                try:
+                    yt_video_result = await run_blocking("youtube", search_youtube_video, search_query)
+                except ExecutorSaturated as e:
+                    LOGGER.warning(f"Skipped YouTube search `{search_query}`: {e}")
+                    yt_video_result = None
+                if yt_video_result:
+                    outbound.send(room, yt_video_result, use_html=True)
+            if chat_message.startswith("!"):
+                await self._process_command(chat_message, room, user_name, message)
+            youtube_previews = user_name != bot_username and "bot" not in user_name and "lmao" not in user_name
+            intent = classify_message(chat_message, youtube_previews=youtube_previews)
+            if intent == INTENT_YOUTUBE_PREVIEW:
+                from broiestbot.commands import generate_youtube_video_preview
+
+                try:
+                    preview = await run_blocking("youtube", generate_youtube_video_preview, chat_message)
+                except ExecutorSaturated as e:
+                    LOGGER.warning(f"Skipped YouTube preview: {e}")
+                    preview = None
+                if preview:
+                    outbound.send(room, preview, use_html=True)
+            elif intent == INTENT_TWITTER_PREVIEW:
+                from broiestbot.commands import generate_twitter_preview
+
+                preview = await generate_twitter_preview(chat_message)
+                if preview:
+                    outbound.send(room, preview, use_html=True)
+            elif intent == INTENT_WIKI_PREVIEW:
+                from broiestbot.commands import create_wiki_preview
+
+                preview = await create_wiki_preview(chat_message)
+                if preview:
+                    outbound.send(room, preview, use_html=True)
+            elif intent == INTENT_SILENT_BAN:
+                await ban_word(room, message, user_name, silent=True)
+            elif intent == INTENT_BANNED_WORD:
+                await ban_word(room, message, user_name, silent=False)
+            elif intent == INTENT_BOT_MENTION:
+                await self._respond_llm_prompt(user_name, room)
+            else:
+                await self._process_phrase(chat_message, room, user_name, message, bot_username)
 
     @staticmethod
     def _log_message(room: Room, user_name: str, message: RoomMessage):
@@ -417,7 +220,7 @@ class Bot(chatango.Client):
         self, chat_message: str, room: Room, user_name: str, message: RoomMessage, bot_username: str
     ) -> None:
         """
-        Search database for non-command phrases which elicit a response.
+        Search trigger phrases (held in memory once loaded) for chats which elicit a response.
 
         :param str chat_message: A non-command chat which may prompt a response.
         :param Room room: Current Chatango room object.
@@ -430,13 +233,16 @@ class Bot(chatango.Client):
         if f"@{bot_username}" in chat_message and "*waves*" in chat_message:
             await self._wave_back(room, user_name, bot_username)
         elif chat_message.endswith("only on aclee"):
-            await room.send_message("™")
+            outbound.send(room, "™")
         elif chat_message.lower() == "tm":
             await self._trademark(room, message)
         else:
-            fetched_phrase = await _db_fetch_phrase(chat_message)
+            if phrase_index.loaded:
+                fetched_phrase = phrase_index.get(chat_message)
+            else:
+                fetched_phrase = await _db_fetch_phrase(chat_message)
             if fetched_phrase is not None:
-                await room.send_message(fetched_phrase.response, use_html=True)
+                outbound.send(room, fetched_phrase.response, use_html=True)
 
     @staticmethod
     def _parse_command(user_msg: str) -> Tuple[str, Optional[str]]:
@@ -456,14 +262,17 @@ class Bot(chatango.Client):
 
     async def _respond_if_bot_command(self, chat_message: str, room: Room, user_name: str):
         """
-        Fetch response from database to send to chat.
+        Fetch response to send to chat, served from memory once the `commands` table is loaded.
 
         :param str chat_message: Raw message sent by user.
         :param Room room: Current Chatango room object.
         :param str user_name: User responsible for triggering command.
         """
         cmd, args = self._parse_command(chat_message[1::].strip())
-        command = await _db_fetch_command(cmd)
+        if command_index.loaded:
+            command = command_index.get(cmd)
+        else:
+            command = await _db_fetch_command(cmd)
         if command is not None and command.type == "reserved":
             LOGGER.info(f"Ignoring reserved command `{cmd}`")
             return None
@@ -478,7 +287,7 @@ class Bot(chatango.Client):
                 bot_username=self.username.lower(),
             )
             if response:
-                await room.send_message(response, use_html=True)
+                outbound.send(room, response, use_html=True)
         else:
             await self._gif_fallback(chat_message, room)
 
@@ -494,8 +303,8 @@ class Bot(chatango.Client):
         :returns: None
         """
         if user_name == bot_username:
-            await room.send_message(f"stop talking to urself and get some friends u loser jfc kys @{bot_username}")
-        await room.send_message(f"@{user_name} *waves*")
+            outbound.send(room, f"stop talking to urself and get some friends u loser jfc kys @{bot_username}")
+        outbound.send(room, f"@{user_name} *waves*")
 
     @staticmethod
     async def _gif_fallback(message: str, room: Room) -> None:
@@ -509,9 +318,11 @@ class Bot(chatango.Client):
         """
         query = message.replace("!", "").lower().strip()
         if len(query) > 1:
+            from broiestbot.commands import klipy_image_search
+
             image = await klipy_image_search(query)
             if image:
-                await room.send_message(image)
+                outbound.send(room, image)
 
     @staticmethod
     async def _trademark(room: Room, message: RoomMessage) -> None:
@@ -524,7 +335,7 @@ class Bot(chatango.Client):
         :returns: None
         """
         await room.delete_message(message)
-        await room.send_message("™")
+        outbound.send(room, "™")
 
     @staticmethod
     async def _respond_llm_prompt(user_name: str, room: Room) -> None:
@@ -536,7 +347,10 @@ class Bot(chatango.Client):
 
         :returns: None
         """
+        # Imported lazily: the Anthropic SDK is only loaded once someone actually talks to the bot.
+        from broiestbot.commands import generate_llm_response
+
         LOGGER.info(f"Generating LLM response for message directed at bot in room {room.name}")
         response = await generate_llm_response(user_name, list(room.history))
         if response:
-            await room.send_message(response, use_html=True)
+            outbound.send(room, response, use_html=True)
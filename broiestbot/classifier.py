@@ -0,0 +1,104 @@
+"""Classify chats which trigger a response in a single scan of the message."""
+
+import re
+from typing import Dict, Optional, Sequence, Tuple
+
+from config import YOUTUBE_VIDEO_ID_REGEX
+
+INTENT_YOUTUBE_PREVIEW = "youtube_preview"
+INTENT_TWITTER_PREVIEW = "twitter_preview"
+INTENT_WIKI_PREVIEW = "wiki_preview"
+INTENT_SILENT_BAN = "silent_ban"
+INTENT_BANNED_WORD = "banned_word"
+INTENT_BOT_MENTION = "bot_mention"
+
+
+def _anywhere(pattern: str) -> str:
+    """Pattern matching anywhere in a chat, as `re.search` does."""
+    return rf"(?=[\s\S]*?(?:{pattern}))"
+
+
+def _prefix(pattern: str) -> str:
+    """Pattern only matching from the start of a chat, as `re.match` does."""
+    return rf"(?={pattern})"
+
+
+# Triggers in order of precedence; when a chat matches several, the earliest listed wins.
+# Each trigger names a literal which any chat it matches must contain.
+MESSAGE_TRIGGERS: Tuple[Tuple[str, str, str], ...] = (
+    (INTENT_YOUTUBE_PREVIEW, _anywhere(YOUTUBE_VIDEO_ID_REGEX.pattern), "youtu"),
+    (
+        INTENT_TWITTER_PREVIEW,
+        _prefix(r"((https?):\/\/)?(www.)?x\.com(\/@?(\w){1,15})\/status\/[0-9]{19}"),
+        "x.com",
+    ),
+    (INTENT_WIKI_PREVIEW, _prefix(r".+(wikipedia.org)"), "wikipedia"),
+    (INTENT_SILENT_BAN, _anywhere(re.escape("https://i.imgur.com/wppfinC.png")), "https://i.imgur.com/wppfinC.png"),
+    (INTENT_BANNED_WORD, _prefix(r"(?![\s\S]*south)bl\/S+b"), "bl/"),
+    (INTENT_SILENT_BAN, _prefix(r"image not found :\(\Z"), "image not found :("),
+    (INTENT_SILENT_BAN, _anywhere(re.escape("http://broiestbro.")), "http://broiestbro."),
+    (INTENT_SILENT_BAN, _anywhere(re.escape("https://i.imgur.com/bQJxsBV.png")), "https://i.imgur.com/bQJxsBV.png"),
+    (INTENT_BOT_MENTION, _anywhere(r"@bro(?![a-zA-Z0-9])"), "@bro"),
+    (
+        INTENT_SILENT_BAN,
+        _anywhere(re.escape("idk wtf u did but bot is ded now, thanks")),
+        "idk wtf u did but bot is ded now, thanks",
+    ),
+)
+
+
+class MessageClassifier:
+    """
+    Compile triggers into a literal prefilter and a single precedence-ordered matcher.
+
+    Most chats trigger nothing, so the literals every trigger requires are scanned for
+    first in one pass; only chats containing one of them are matched against the
+    alternation of triggers, which is anchored at the start of the chat so that
+    alternatives are tried in order of precedence.
+    """
+
+    def __init__(self, triggers: Sequence[Tuple[str, str, str]]):
+        self._intents: Dict[str, str] = {}
+        alternatives = []
+        for precedence, (intent, pattern, _literal) in enumerate(triggers):
+            group = f"t{precedence}"
+            self._intents[group] = intent
+            alternatives.append(f"(?P<{group}>{pattern})")
+        literals = sorted({literal for _intent, _pattern, literal in triggers}, key=len, reverse=True)
+        self._prefilter = re.compile("|".join(re.escape(literal) for literal in literals))
+        self._matcher = re.compile("|".join(alternatives))
+
+    def classify(self, chat_message: str) -> Optional[str]:
+        """
+        Determine which trigger, if any, a chat matches.
+
+        :param str chat_message: Raw chat message submitted by a user.
+
+        :returns: Optional[str]
+        """
+        if self._prefilter.search(chat_message) is None:
+            return None
+        match = self._matcher.match(chat_message)
+        if match is None:
+            return None
+        return self._intents[match.lastgroup]
+
+
+classifier = MessageClassifier(MESSAGE_TRIGGERS)
+classifier_without_youtube = MessageClassifier(
+    [trigger for trigger in MESSAGE_TRIGGERS if trigger[0] != INTENT_YOUTUBE_PREVIEW]
+)
+
+
+def classify_message(chat_message: str, youtube_previews: bool = True) -> Optional[str]:
+    """
+    Determine how the bot should react to a chat which is not a command.
+
+    :param str chat_message: Raw chat message submitted by a user.
+    :param bool youtube_previews: Whether the chat's author may trigger YouTube previews.
+
+    :returns: Optional[str]
+    """
+    if youtube_previews:
+        return classifier.classify(chat_message)
+    return classifier_without_youtube.classify(chat_message)
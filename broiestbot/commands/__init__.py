@@ -1,85 +1,106 @@
-"""Construct responses to bot commands from third-party APIs."""
+"""
+Construct responses to bot commands from third-party APIs.
 
-from .afterdark import fetch_redgifs_gif, get_redgifs_gif
-from .definitions import (
-    create_wiki_preview,
-    get_english_definition,
-    get_english_translation,
-    get_urban_definition,
-    wiki_summary,
-)
-from .embeds import create_instagram_preview, generate_twitter_preview
-from .f1 import f1_grand_prix
-from .footy import (
-    all_leagues_golden_boot,
-    epl_golden_boot,
-    fetch_aafk_fixture_data,
-    fetch_fox_fixtures,
-    footy_all_upcoming_fixtures,
-    footy_live_fixtures,
-    footy_live_odds,
-    footy_stats_for_live_fixtures,
-    footy_team_lineups,
-    footy_today_fixtures_odds,
-    footy_upcoming_fixtures,
-    get_today_footy_odds_for_league,
-    league_table_standings,
-    mls_standings,
-    today_upcoming_fixtures,
-)
-from .images import (
-    fetch_latest_image_from_gcs_bucket,
-    fetch_random_image_from_gcs_bucket,
-    gcs_count_images_in_bucket,
-    giphy_image_search,
-    klipy_image_search,
-    random_image,
-    spam_random_images_from_gcs_bucket,
-    subreddit_image,
-)
-from .llm import generate_llm_response
-from .lyrics import get_song_lyrics
-from .markets import get_crypto_chart, get_crypto_price, get_stock, get_top_crypto
-from .misc import (
-    blaze_time_remaining,
-    covid_cases_usa,
-    nontent_time_remaining,
-    send_text_message,
-    time_until_wayne,
-)
-from .mlb import today_phillies_games
-from .movies import find_imdb_movie, find_movie, streaming_service_show
-from .nba import live_nba_games, nba_standings, upcoming_nba_games
-from .nfl import (
-    fetch_sleeper_matchups,
-    get_live_nfl_game_summaries,
-    get_today_nfl_games,
-)
-from .odds import get_odds
-from .olympics import get_summer_olympic_medals, get_winter_olympic_medals
-from .playstation import (
-    get_psn_game_trophies,
-    get_psn_online_friends,
-    get_titles_with_stats,
-)
-from .polls import (
-    bach_gang_counter,
-    change_or_stay_vote,
-    completed_poll_results,
-    get_live_poll_results,
-    tovala_counter,
-)
-from .previews import extract_url, generate_twitter_preview
-from .sumo import today_sumo_matches, upcoming_sumo_matches
-from .tuner import get_current_show, tuner
+Command modules are only imported once one of their functions is first used, so the bot
+doesn't load pandas, plotly, scrapers & SDKs for commands nobody in the room ever fires.
+"""
 
-# from .video import search_youtube_for_video
-from .video import (
-    generate_youtube_video_preview,
-    get_all_live_twitch_streams,
-    search_youtube_video,
-)
-from .weather import get_current_weather
+from importlib import import_module
+from typing import Any, List
+
+# Functions exported by `broiestbot.commands`, mapped to the submodule which defines them.
+_EXPORTS = {
+    "profile_command": "admin",
+    "reload_triggers_command": "admin",
+    "fetch_redgifs_gif": "afterdark",
+    "get_redgifs_gif": "afterdark",
+    "create_wiki_preview": "definitions",
+    "get_english_definition": "definitions",
+    "get_english_translation": "definitions",
+    "get_urban_definition": "definitions",
+    "wiki_summary": "definitions",
+    "create_instagram_preview": "embeds",
+    "f1_grand_prix": "f1",
+    "all_leagues_golden_boot": "footy",
+    "epl_golden_boot": "footy",
+    "fetch_aafk_fixture_data": "footy",
+    "fetch_fox_fixtures": "footy",
+    "footy_all_upcoming_fixtures": "footy",
+    "footy_live_fixtures": "footy",
+    "footy_live_odds": "footy",
+    "footy_stats_for_live_fixtures": "footy",
+    "footy_team_lineups": "footy",
+    "footy_today_fixtures_odds": "footy",
+    "footy_upcoming_fixtures": "footy",
+    "get_today_footy_odds_for_league": "footy",
+    "league_table_standings": "footy",
+    "mls_standings": "footy",
+    "today_upcoming_fixtures": "footy",
+    "fetch_latest_image_from_gcs_bucket": "images",
+    "fetch_random_image_from_gcs_bucket": "images",
+    "gcs_count_images_in_bucket": "images",
+    "giphy_image_search": "images",
+    "klipy_image_search": "images",
+    "random_image": "images",
+    "spam_random_images_from_gcs_bucket": "images",
+    "subreddit_image": "images",
+    "generate_llm_response": "llm",
+    "get_song_lyrics": "lyrics",
+    "get_crypto_chart": "markets",
+    "get_crypto_price": "markets",
+    "get_stock": "markets",
+    "get_top_crypto": "markets",
+    "blaze_time_remaining": "misc",
+    "covid_cases_usa": "misc",
+    "nontent_time_remaining": "misc",
+    "send_text_message": "misc",
+    "time_until_wayne": "misc",
+    "today_phillies_games": "mlb",
+    "find_imdb_movie": "movies",
+    "find_movie": "movies",
+    "streaming_service_show": "movies",
+    "live_nba_games": "nba",
+    "nba_standings": "nba",
+    "upcoming_nba_games": "nba",
+    "fetch_sleeper_matchups": "nfl",
+    "get_live_nfl_game_summaries": "nfl",
+    "get_today_nfl_games": "nfl",
+    "get_odds": "odds",
+    "get_summer_olympic_medals": "olympics",
+    "get_winter_olympic_medals": "olympics",
+    "get_psn_game_trophies": "playstation",
+    "get_psn_online_friends": "playstation",
+    "get_titles_with_stats": "playstation",
+    "bach_gang_counter": "polls",
+    "change_or_stay_vote": "polls",
+    "completed_poll_results": "polls",
+    "get_live_poll_results": "polls",
+    "tovala_counter": "polls",
+    "extract_url": "previews",
+    "generate_twitter_preview": "previews",
+    "today_sumo_matches": "sumo",
+    "upcoming_sumo_matches": "sumo",
+    "get_current_show": "tuner",
+    "tuner": "tuner",
+    "generate_youtube_video_preview": "video",
+    "get_all_live_twitch_streams": "video",
+    "search_youtube_video": "video",
+    "get_current_weather": "weather",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import the submodule defining a command function the first time it's requested."""
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted({*globals(), *_EXPORTS})
 
 
 def basic_message(message):
@@ -0,0 +1,65 @@
+"""Privileged commands for maintaining the bot while it runs."""
+
+from typing import Optional
+
+from emoji import emojize
+from logger import LOGGER
+
+from broiestbot.dispatch import profiler, router
+from broiestbot.triggers import announce_trigger_edit
+from config import CHATANGO_SPECIAL_USERS, PROFILE_MAX_INVOCATIONS
+
+
+async def reload_triggers_command(user_name: str) -> str:
+    """
+    Reload the `commands` & `phrases` tables in every running bot process.
+
+    :param str user_name: User who triggered the command.
+
+    :returns: str
+    """
+    if user_name.lower() not in (CHATANGO_SPECIAL_USERS or []):
+        return emojize(f":warning: nice try @{user_name}, only admins can reload the bot :warning:", language="en")
+    await announce_trigger_edit()
+    LOGGER.success(f"Trigger tables reloaded by @{user_name}")
+    return emojize(":counterclockwise_arrows_button: reloaded commands & phrases", language="en")
+
+
+def profile_command(args: Optional[str], user_name: str) -> str:
+    """
+    Profile the next invocations of a command in this bot process, ie: `!profile livefixtures 5`.
+
+    Without arguments, lists commands being profiled & the report of each finished profile.
+    `!profile livefixtures off` abandons a profile in progress.
+
+    :param Optional[str] args: Command type to profile, optionally followed by the number of invocations or `off`.
+    :param str user_name: User who triggered the command.
+
+    :returns: str
+    """
+    if user_name.lower() not in (CHATANGO_SPECIAL_USERS or []):
+        return emojize(f":warning: nice try @{user_name}, only admins can profile the bot :warning:", language="en")
+    if not args:
+        return _profiler_status()
+    cmd_type, _, count = args.strip().lower().partition(" ")
+    if router.get(cmd_type) is None:
+        return emojize(f":warning: `{cmd_type}` isn't a command type :warning:", language="en")
+    if count.strip() == "off":
+        if profiler.disarm(cmd_type):
+            return emojize(f":stop_sign: stopped profiling `{cmd_type}`", language="en")
+        return emojize(f":warning: `{cmd_type}` isn't being profiled :warning:", language="en")
+    if count and not count.strip().isdigit():
+        return emojize(":warning: usage: !profile [command type] [invocations] :warning:", language="en")
+    invocations = min(max(int(count or 1), 1), PROFILE_MAX_INVOCATIONS)
+    profiler.arm(cmd_type, invocations)
+    LOGGER.info(f"@{user_name} armed profiling of the next {invocations} `{cmd_type}` invocations")
+    return emojize(f":stopwatch: profiling the next {invocations} `{cmd_type}`; `!profile` for results", language="en")
+
+
+def _profiler_status() -> str:
+    """Commands being profiled, then the report of every finished profile."""
+    lines = [f"profiling `{cmd_type}`: {capture.remaining} to go" for cmd_type, capture in profiler.captures.items()]
+    lines += [str(report) for report in profiler.reports.values()]
+    if not lines:
+        return emojize(":stopwatch: nothing profiled yet", language="en")
+    return emojize(":stopwatch: ", language="en") + "\n\n".join(lines)
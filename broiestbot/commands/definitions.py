@@ -1,11 +1,11 @@
 """Lookup definitions via Wikipedia, Urban Dictionary, etc"""
 
-import asyncio
 from typing import Optional
 
 from aiohttp import ClientError
 from bs4 import BeautifulSoup
 from emoji import emojize
+from executors import run_blocking
 from http_client import get_http_session, request_timeout
 from logger import LOGGER
 from PyMultiDictionary import MultiDictionary
@@ -109,6 +109,27 @@ def wiki_summary(query: str) -> str:
         )
 
 
+def _format_wiki_preview(page_title: str, image_url: Optional[str]) -> str:
+    """
+    Fetch a Wikipedia page & format its preview.
+
+    :param str page_title: Title of the Wikipedia page, as it appears in its URL.
+    :param Optional[str] image_url: URL of the page's preview image, if it has one.
+
+    :returns: str
+    """
+    page = wiki.page(page_title)
+    wiki_preview = "\n\n\n\n"
+    wiki_preview += f"<b>{page.displaytitle}</b>\n\n"
+    wiki_preview += f"{page.summary}\n\n"
+    wiki_preview += f"{image_url} \n\n" if image_url is not None else ""
+    wiki_preview += f"{page.sections[0].text[0:500]}\n\n" if page.sections_by_title else "\n\n"
+    wiki_preview += (
+        "- " + "\n- ".join([section._title for section in page.sections if section._title != "See also"]) + "\n\n"
+    )
+    return wiki_preview
+
+
 async def create_wiki_preview(url: str) -> Optional[str]:
     """
     Create a link preview for a Wikipedia URL.
@@ -128,20 +149,11 @@ async def create_wiki_preview(url: str) -> Optional[str]:
         session = await get_http_session()
         async with session.get(url, headers=headers) as resp:
             page_html = await resp.read()
-        wiki_preview = "\n\n\n\n"
-        page_title = url.split("/")[-1]
-        # `wikipediaapi` is a blocking SDK, so keep it off the event loop.
-        page = await asyncio.to_thread(wiki.page, page_title)
         html = BeautifulSoup(page_html, "html.parser")
         img_tag = html.find("meta", property="og:image")
-        wiki_preview += f"<b>{page.displaytitle}</b>\n\n"
-        wiki_preview += f"{page.summary}\n\n"
-        wiki_preview += f"{img_tag.get('content')} \n\n" if img_tag is not None else ""
-        wiki_preview += f"{page.sections[0].text[0:500]}\n\n" if page.sections_by_title else "\n\n"
-        wiki_preview += (
-            "- " + "\n- ".join([section._title for section in page.sections if section._title != "See also"]) + "\n\n"
-        )
-        return wiki_preview
+        image_url = img_tag.get("content") if img_tag is not None else None
+        # `wikipediaapi` fetches lazily as page attributes are read, so build the whole preview on its pool.
+        return await run_blocking("wikipedia", _format_wiki_preview, url.split("/")[-1], image_url)
     except Exception as e:
         LOGGER.exception(f"Unexpected error while creating Wikipedia preview for `{url}`: {e}")
         return None
@@ -5,6 +5,7 @@ from typing import List, Optional
 
 import pytz
 from aiohttp import ClientError
+from deadlines import budget_exhausted
 from emoji import emojize
 from http_client import get_http_session
 from logger import LOGGER
@@ -41,6 +42,8 @@ async def footy_team_lineups(room: str, username: str) -> Optional[str]:
         today_fixture_lineups = "\n\n\n"
         tz_name = await get_preferred_timezone(room, username)
         for league_name, league_id in FOOTY_XI_LEAGUES.items():
+            if budget_exhausted():
+                break
             league_fixtures = await get_today_live_or_upcoming_fixtures(league_id, room, tz_name)
             league_fixtures_with_lineups = filter_fixtures_with_lineups(league_fixtures, tz_name)
             if bool(league_fixtures_with_lineups) and i <= 3:
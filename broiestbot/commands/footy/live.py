@@ -3,9 +3,11 @@
 from typing import List, Optional
 
 from aiohttp import ClientError
+from deadlines import budget_exhausted
 from emoji import emojize
 from http_client import get_http_session
 from logger import LOGGER
+from tracing import tracer
 
 from config import (
     FOOTY_FIXTURES_ENDPOINT,
@@ -29,7 +31,10 @@ async def footy_live_fixtures(username: str, subs=False) -> str:
     live_fixtures = "\n\n\n"
     i = 0
     for league_name, league_id in FOOTY_LIVE_SCORED_LEAGUES.items():
-        live_league_fixtures = await footy_live_fixtures_per_league(league_id, league_name, username, subs=subs)
+        if budget_exhausted():
+            break
+        with tracer.span("footy.league", resource=league_name):
+            live_league_fixtures = await footy_live_fixtures_per_league(league_id, league_name, username, subs=subs)
         if live_league_fixtures is not None and i < 6:
             i += 1
             live_fixtures += live_league_fixtures + "\n"
@@ -3,6 +3,7 @@
 from typing import Optional
 
 from aiohttp import ClientError
+from deadlines import budget_exhausted
 from emoji import emojize
 from http_client import get_http_session
 from logger import LOGGER
@@ -28,6 +29,8 @@ async def footy_live_odds(username: str) -> str:
     all_odds = "\n\n\n"
     i = 0
     for league_name, league_id in FOOTY_LIVE_ODDS_LEAGUES.items():
+        if budget_exhausted():
+            break
         league_odds = await footy_live_odds_per_league(league_id, league_name, username)
         if league_odds is not None and i < 6:
             i += 1
@@ -4,6 +4,7 @@ from datetime import datetime
 from typing import List, Optional
 
 from aiohttp import ClientError
+from deadlines import budget_exhausted
 from emoji import emojize
 from http_client import get_http_session
 from logger import LOGGER
@@ -38,6 +39,8 @@ async def footy_today_fixtures_odds(room: str, username: str) -> Optional[str]:
         today_fixtures_odds = "\n\n\n"
         tz_name = await get_preferred_timezone(room, username)
         for league_name, league_id in FOOTY_LEAGUES.items():
+            if budget_exhausted():
+                break
             league_fixtures = await fetch_today_fixtures_by_league(league_id, room, tz_name)
             if league_fixtures:
                 league_fixture_odds = await fetch_today_fixture_odds_by_league(league_id, room, tz_name)
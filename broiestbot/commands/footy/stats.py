@@ -3,6 +3,7 @@
 from typing import Optional, Tuple
 
 from aiohttp import ClientError
+from deadlines import budget_exhausted
 from emoji import emojize
 from http_client import get_http_session
 from logger import LOGGER
@@ -30,6 +31,8 @@ async def footy_stats_for_live_fixtures(room: str, username: str):
         live_fixture_stats_response = "\n\n\n"
         tz_name = await get_preferred_timezone(room, username)
         for league_name, league_id in FOOTY_LIVE_STATS_LEAGUES.items():
+            if budget_exhausted():
+                break
             live_league_fixtures = await fetch_live_fixtures(league_id, tz_name)
             if live_league_fixtures and bool(live_league_fixtures) and live_league_fixtures != []:
                 live_fixture_stats_response += f"<b>{league_name}</b>\n"
@@ -4,6 +4,7 @@ from datetime import datetime
 from typing import List, Optional
 
 from aiohttp import ClientError
+from deadlines import budget_exhausted
 from emoji import emojize
 from http_client import get_http_session
 from logger import LOGGER
@@ -32,6 +33,8 @@ async def today_upcoming_fixtures(room: str, username: str) -> str:
     """
     upcoming_fixtures = "\n\n\n\n"
     for league_name, league_id in FOOTY_LEAGUES.items():
+        if budget_exhausted():
+            break
         league_fixtures = await today_upcoming_fixtures_per_league(league_name, league_id, room, username)
         if league_fixtures is not None:
             upcoming_fixtures += f"{league_fixtures}\n"
@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 from typing import List, Optional
 
 from aiohttp import ClientError
+from deadlines import budget_exhausted
 from emoji import emojize
 from http_client import get_http_session
 from logger import LOGGER
@@ -41,6 +42,8 @@ async def footy_upcoming_fixtures(room: str, username: str) -> str:
     tz_name = await get_preferred_timezone(room, username)
     i = 0
     for league_name, league_id in FOOTY_LEAGUES.items():
+        if budget_exhausted():
+            break
         league_fixtures = await footy_upcoming_fixtures_per_league(league_name, league_id, room, username, tz_name)
         if league_fixtures is not None and i < 10:
             i += 1
@@ -63,6 +66,8 @@ async def footy_all_upcoming_fixtures(room: str, username: str) -> str:
     upcoming_fixtures = "\n\n\n"
     tz_name = await get_preferred_timezone(room, username)
     for league_name, league_id in FOOTY_LEAGUES.items():
+        if budget_exhausted():
+            break
         league_fixtures = await footy_upcoming_fixtures_per_league(league_name, league_id, room, username, tz_name)
         if league_fixtures is not None:
             upcoming_fixtures += emojize(f"<b>{league_name}</b>\n", language="en")
@@ -107,6 +107,27 @@ async def get_preferred_time_format(start_time: datetime, room: str, username: s
     )
 
 
+async def get_viewer_key(room: str, username: str) -> Tuple[str, str, bool, bool]:
+    """
+    Summarize every preference which changes how fixture dates & times are displayed to a user.
+
+    Users sharing a key see identical fixture listings, regardless of who they are.
+
+    :param str room: Chatango room in which command was triggered.
+    :param str username: Name of user who triggered the command.
+
+    :returns: Tuple[str, str, bool, bool]
+    """
+    timezone_name = await get_preferred_timezone(room, username)
+    metric_user = METRIC_SYSTEM_USERS is not None and username in METRIC_SYSTEM_USERS
+    return (
+        "obi" if room == CHATANGO_OBI_ROOM else "default",
+        timezone_name,
+        "anon" in username,
+        metric_user,
+    )
+
+
 def get_current_day(room: str) -> datetime:
     """
     Get current date depending on Chatango room.
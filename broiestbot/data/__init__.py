@@ -1,4 +1,10 @@
 """Persist log data to remote database."""
 
 from .chats import persist_chat_logs
+from .queue import (
+    PERSISTENCE_DROPPED,
+    PERSISTENCE_QUEUE_DEPTH,
+    PersistenceQueue,
+    persistence_queue,
+)
 from .users import persist_user_data
@@ -0,0 +1,100 @@
+"""Bounded work queue which persists chat logs & user data off the reply path."""
+
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+
+from logger import LOGGER
+from metrics import Counter, Gauge
+
+from config import PERSISTENCE_QUEUE_SIZE, PERSISTENCE_WORKERS
+
+PERSISTENCE_QUEUE_DEPTH = Gauge(
+    "broiestbot_persistence_queue_depth",
+    "Chat logs & user data waiting to be persisted.",
+)
+PERSISTENCE_DROPPED = Counter(
+    "broiestbot_persistence_dropped_total",
+    "Persistence jobs dropped because the queue was full, per job.",
+    ("job",),
+)
+
+
+class PersistenceQueue:
+    """
+    Queue of persistence jobs drained by a fixed number of background workers.
+
+    Jobs are submitted without awaiting them, so replies to chats never wait on the
+    database. When the queue is full, new jobs are dropped rather than applying
+    backpressure to `on_message`.
+    """
+
+    def __init__(self, maxsize: int, workers: int):
+        self.maxsize = maxsize
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting to be persisted."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, func: Callable[..., Awaitable[None]], *args) -> bool:
+        """
+        Schedule a persistence coroutine to run in the background.
+
+        :param Callable func: Coroutine function which persists data.
+        :param args: Positional arguments passed to `func`.
+
+        :returns: bool
+        """
+        if self._queue is None:
+            self._start()
+        try:
+            self._queue.put_nowait((func, args))
+            PERSISTENCE_QUEUE_DEPTH.set(self._queue.qsize())
+            return True
+        except asyncio.QueueFull:
+            PERSISTENCE_DROPPED.inc(func.__name__)
+            LOGGER.warning(f"Persistence queue full ({self.maxsize}); dropped `{func.__name__}`")
+            return False
+
+    async def close(self, timeout: float = 10) -> None:
+        """
+        Persist jobs still in the queue, then stop the workers; called when the bot shuts down.
+
+        :param float timeout: Seconds to wait for queued jobs before abandoning them.
+
+        :returns: None
+        """
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            LOGGER.warning(f"Abandoned {self._queue.qsize()} persistence jobs at shutdown")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._queue = None
+
+    def _start(self) -> None:
+        """Create the queue & its workers on the running event loop."""
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [asyncio.create_task(self._work(), name=f"persistence-worker-{i}") for i in range(self.workers)]
+
+    async def _work(self) -> None:
+        """Persist queued jobs one at a time, forever."""
+        while True:
+            func, args = await self._queue.get()
+            PERSISTENCE_QUEUE_DEPTH.set(self._queue.qsize())
+            try:
+                await func(*args)
+            except Exception as e:
+                LOGGER.warning(f"Unexpected error in background `{func.__name__}`: {e}")
+            finally:
+                self._queue.task_done()
+
+
+persistence_queue = PersistenceQueue(maxsize=PERSISTENCE_QUEUE_SIZE, workers=PERSISTENCE_WORKERS)
@@ -1,11 +1,11 @@
 """Persist user metadata."""
 
-import asyncio
 from datetime import datetime
 from typing import Optional
 
 from chatango import RoomMessage
 from chatango.user import User
+from executors import ExecutorSaturated, run_blocking
 from logger import LOGGER
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
@@ -32,8 +32,12 @@ async def persist_user_data(room_name: str, user: User, message: RoomMessage, bo
     existing_user = await _check_existing_user(room_name, user, message)
     if existing_user is not None:
         return
-    # Run blocking HTTP call in a thread to avoid stalling the event loop.
-    user_data = await asyncio.to_thread(geo.lookup_user_by_ip, message.ip)
+    # The IP data SDK is blocking; run it on its own pool to keep it off the event loop.
+    try:
+        user_data = await run_blocking("geoip", geo.lookup_user_by_ip, message.ip)
+    except ExecutorSaturated as e:
+        LOGGER.warning(f"Skipped looking up `{user.name}` while IP lookups are backed up: {e}")
+        return
     if not user_data:
         return
 
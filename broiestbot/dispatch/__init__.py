@@ -0,0 +1,19 @@
+"""Route bot commands to the handlers which construct their responses."""
+
+from .cache import ResponseCache, response_cache
+from .handlers import router
+from .keys import invocation_key
+from .pipeline import run_handler
+from .profiling import CommandProfiler, profiler
+from .registry import (
+    AUDIENCE_EVERYONE,
+    AUDIENCE_USER,
+    AUDIENCE_VIEWER,
+    LATENCY_FAST,
+    LATENCY_INSTANT,
+    LATENCY_SLOW,
+    CommandContext,
+    CommandRouter,
+    Handler,
+)
+from .singleflight import SingleFlight, inflight
@@ -0,0 +1,118 @@
+"""Reuse command responses whose underlying data hasn't changed yet."""
+
+from collections import OrderedDict
+from functools import partial
+from time import monotonic
+from typing import Hashable, Optional, Tuple
+
+from metrics import Counter, Gauge, ratio
+
+from config import RESPONSE_CACHE_MAX_ENTRIES
+
+RESPONSE_CACHE_HITS = Counter(
+    "broiestbot_response_cache_hits_total",
+    "Command responses served from the response cache.",
+    ("cmd_type",),
+)
+RESPONSE_CACHE_MISSES = Counter(
+    "broiestbot_response_cache_misses_total",
+    "Cacheable command responses which had to be built from scratch.",
+    ("cmd_type",),
+)
+RESPONSE_CACHE_HIT_RATIO = Gauge(
+    "broiestbot_response_cache_hit_ratio",
+    "Share of cacheable commands served from the response cache.",
+    callback=ratio(RESPONSE_CACHE_HITS, (RESPONSE_CACHE_HITS, RESPONSE_CACHE_MISSES)),
+)
+RESPONSE_CACHE_EVICTIONS = Counter(
+    "broiestbot_response_cache_evictions_total",
+    "Fresh command responses evicted to keep the response cache within its size.",
+)
+
+
+def is_failure(response: Optional[str]) -> bool:
+    """
+    Whether a response reports a failure; handlers report upstream errors in-band as `:warning:` messages.
+
+    :param Optional[str] response: Response built by a handler.
+
+    :returns: bool
+    """
+    return response is not None and "⚠" in response
+
+
+def worth_caching(response: Optional[str]) -> bool:
+    """
+    Whether a response may be cached; failures shouldn't be pinned for a whole TTL.
+
+    :param Optional[str] response: Response built by a handler.
+
+    :returns: bool
+    """
+    return bool(response) and not is_failure(response)
+
+
+class ResponseCache:
+    """
+    Bounded LRU of command responses, each expiring after the TTL declared by its handler.
+
+    :param int maxsize: Responses kept before the least recently used are evicted.
+    """
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, Tuple[float, str]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, label: str = "") -> Optional[str]:
+        """
+        Fetch a fresh response for an invocation key, if one is cached.
+
+        :param Hashable key: Key of the command invocation.
+        :param str label: `cmd_type` to record the hit or miss against.
+
+        :returns: Optional[str]
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, response = entry
+            if expires_at > monotonic():
+                self._entries.move_to_end(key)
+                RESPONSE_CACHE_HITS.inc(label)
+                return response
+            del self._entries[key]
+        RESPONSE_CACHE_MISSES.inc(label)
+        return None
+
+    def set(self, key: Hashable, response: Optional[str], ttl: float) -> None:
+        """
+        Cache a response for `ttl` seconds, evicting the least recently used responses if full.
+
+        :param Hashable key: Key of the command invocation.
+        :param Optional[str] response: Response built by the handler.
+        :param float ttl: Seconds the response may be reused for.
+
+        :returns: None
+        """
+        if not worth_caching(response):
+            return
+        self._entries[key] = (monotonic() + ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            RESPONSE_CACHE_EVICTIONS.inc()
+
+    def clear(self) -> None:
+        """Drop every cached response."""
+        self._entries.clear()
+
+
+response_cache = ResponseCache()
+
+RESPONSE_CACHE_ENTRIES = Gauge(
+    "broiestbot_response_cache_entries",
+    "Command responses currently held by the response cache.",
+    callback=partial(len, response_cache),
+)
@@ -0,0 +1,474 @@
+"""
+Handlers for every command `type`, declared once and resolved by `router`.
+
+Functions are declared by path, so a command's module is only imported when it first fires.
+"""
+
+from typing import Optional
+
+from config import (
+    BUND_LEAGUE_ID,
+    ELITESERIEN_LEAGUE_ID,
+    ENGLISH_CHAMPIONSHIP_LEAGUE_ID,
+    ENGLISH_LEAGUE_ONE_ID,
+    ENGLISH_LEAGUE_TWO_ID,
+    ENGLISH_NATIONAL_LEAGUE_ID,
+    EPL_LEAGUE_ID,
+    LIGA_LEAGUE_ID,
+    LIGUE_ONE_ID,
+    PRIMEIRA_LIGA_ID,
+    RESPONSE_CACHE_TTL_LIVE,
+    RESPONSE_CACHE_TTL_QUOTES,
+    RESPONSE_CACHE_TTL_REFERENCE,
+    RESPONSE_CACHE_TTL_SCHEDULES,
+    RESPONSE_CACHE_TTL_TABLES,
+)
+
+from .registry import (
+    AUDIENCE_EVERYONE,
+    AUDIENCE_VIEWER,
+    LATENCY_INSTANT,
+    LATENCY_SLOW,
+    CommandRouter,
+    Handler,
+)
+
+ROOM_USER = ("room_name", "user_name")
+
+
+def reserved_command() -> Optional[str]:
+    """Reserved commands are recognized, but never elicit a response."""
+    return None
+
+
+router = CommandRouter(
+    [
+        Handler("basic", "broiestbot.commands:basic_message", params=("content",), latency=LATENCY_INSTANT),
+        Handler("random", "broiestbot.commands.images:random_image", params=("content",), latency=LATENCY_INSTANT),
+        Handler(
+            "stock",
+            "broiestbot.commands.markets:get_stock",
+            params=("args",),
+            requires=("args",),
+            ttl=RESPONSE_CACHE_TTL_QUOTES,
+        ),
+        Handler(
+            "randomimage",
+            "broiestbot.commands.images:fetch_random_image_from_gcs_bucket",
+            params=("content",),
+            executor="gcs",
+            shared=False,
+        ),
+        Handler(
+            "imagespam",
+            "broiestbot.commands.images:spam_random_images_from_gcs_bucket",
+            params=("content",),
+            executor="gcs",
+            shared=False,
+        ),
+        Handler(
+            "crypto",
+            "broiestbot.commands.markets:get_crypto_price",
+            params=("command", "content"),
+            requires=("command",),
+            ttl=RESPONSE_CACHE_TTL_QUOTES,
+        ),
+        Handler("giphy", "broiestbot.commands.images:klipy_image_search", params=("content",), shared=False),
+        Handler(
+            "weather",
+            "broiestbot.commands.weather:get_current_weather",
+            params=("args", "room_name", "user_name"),
+            requires=("args", "room_name", "user_name"),
+        ),
+        Handler(
+            "wiki",
+            "broiestbot.commands.definitions:wiki_summary",
+            params=("args",),
+            requires=("args",),
+            executor="wikipedia",
+            ttl=RESPONSE_CACHE_TTL_REFERENCE,
+        ),
+        Handler(
+            "imdb",
+            "broiestbot.commands.movies:find_movie",
+            params=("args",),
+            requires=("args",),
+            ttl=RESPONSE_CACHE_TTL_REFERENCE,
+        ),
+        Handler(
+            "streamingshow",
+            "broiestbot.commands.movies:streaming_service_show",
+            params=("args",),
+            requires=("args",),
+            ttl=RESPONSE_CACHE_TTL_REFERENCE,
+        ),
+        Handler(
+            "urban",
+            "broiestbot.commands.definitions:get_urban_definition",
+            params=("args",),
+            requires=("args",),
+            ttl=RESPONSE_CACHE_TTL_REFERENCE,
+        ),
+        Handler("420", "broiestbot.commands.misc:blaze_time_remaining", bare=True, latency=LATENCY_INSTANT),
+        Handler(
+            "nontent",
+            "broiestbot.commands.misc:nontent_time_remaining",
+            params=("user_name",),
+            requires=("user_name",),
+            latency=LATENCY_INSTANT,
+        ),
+        Handler(
+            "sms",
+            "broiestbot.commands.misc:send_text_message",
+            params=("args", "user_name", "content"),
+            requires=("args", "user_name", "content"),
+            executor="twilio",
+            shared=False,
+        ),
+        Handler(
+            "epltable",
+            "broiestbot.commands.footy:league_table_standings",
+            fixed=(EPL_LEAGUE_ID,),
+            ttl=RESPONSE_CACHE_TTL_TABLES,
+        ),
+        Handler(
+            "ligatable",
+            "broiestbot.commands.footy:league_table_standings",
+            fixed=(LIGA_LEAGUE_ID,),
+            ttl=RESPONSE_CACHE_TTL_TABLES,
+        ),
+        Handler(
+            "bundtable",
+            "broiestbot.commands.footy:league_table_standings",
+            fixed=(BUND_LEAGUE_ID,),
+            ttl=RESPONSE_CACHE_TTL_TABLES,
+        ),
+        Handler(
+            "efltable",
+            "broiestbot.commands.footy:league_table_standings",
+            fixed=(ENGLISH_CHAMPIONSHIP_LEAGUE_ID,),
+            ttl=RESPONSE_CACHE_TTL_TABLES,
+        ),
+        Handler(
+            "eng1table",
+            "broiestbot.commands.footy:league_table_standings",
+            fixed=(ENGLISH_LEAGUE_ONE_ID,),
+            ttl=RESPONSE_CACHE_TTL_TABLES,
+        ),
+        Handler(
+            "eng2table",
+            "broiestbot.commands.footy:league_table_standings",
+            fixed=(ENGLISH_LEAGUE_TWO_ID,),
+            ttl=RESPONSE_CACHE_TTL_TABLES,
+        ),
+        Handler(
+            "engnationaltable",
+            "broiestbot.commands.footy:league_table_standings",
+            fixed=(ENGLISH_NATIONAL_LEAGUE_ID,),
+            ttl=RESPONSE_CACHE_TTL_TABLES,
+        ),
+        Handler(
+            "liguetable",
+            "broiestbot.commands.footy:league_table_standings",
+            fixed=(LIGUE_ONE_ID,),
+            ttl=RESPONSE_CACHE_TTL_TABLES,
+        ),
+        Handler(
+            "primeratable",
+            "broiestbot.commands.footy:league_table_standings",
+            fixed=(PRIMEIRA_LIGA_ID,),
+            ttl=RESPONSE_CACHE_TTL_TABLES,
+        ),
+        Handler(
+            "estable",
+            "broiestbot.commands.footy:league_table_standings",
+            fixed=(ELITESERIEN_LEAGUE_ID,),
+            ttl=RESPONSE_CACHE_TTL_TABLES,
+        ),
+        Handler("mlstable", "broiestbot.commands.footy:mls_standings", ttl=RESPONSE_CACHE_TTL_TABLES),
+        Handler(
+            "fixtures",
+            "broiestbot.commands.footy:footy_upcoming_fixtures",
+            params=ROOM_USER,
+            requires=ROOM_USER,
+            ttl=RESPONSE_CACHE_TTL_SCHEDULES,
+            audience=AUDIENCE_VIEWER,
+        ),
+        Handler(
+            "allfixtures",
+            "broiestbot.commands.footy:footy_all_upcoming_fixtures",
+            params=ROOM_USER,
+            requires=ROOM_USER,
+            latency=LATENCY_SLOW,
+            ttl=RESPONSE_CACHE_TTL_SCHEDULES,
+            audience=AUDIENCE_VIEWER,
+        ),
+        Handler(
+            "livefixtures",
+            "broiestbot.commands.footy:footy_live_fixtures",
+            params=("user_name",),
+            requires=("user_name",),
+            kwargs={"subs": True},
+            latency=LATENCY_SLOW,
+            audience=AUDIENCE_EVERYONE,
+            ttl=RESPONSE_CACHE_TTL_LIVE,
+        ),
+        Handler(
+            "livefixtureswithsubs",
+            "broiestbot.commands.footy:footy_live_fixtures",
+            params=("user_name",),
+            requires=("user_name",),
+            kwargs={"subs": True},
+            latency=LATENCY_SLOW,
+            audience=AUDIENCE_EVERYONE,
+            ttl=RESPONSE_CACHE_TTL_LIVE,
+        ),
+        Handler(
+            "livefixturestats",
+            "broiestbot.commands.footy:footy_stats_for_live_fixtures",
+            params=ROOM_USER,
+            requires=ROOM_USER,
+            latency=LATENCY_SLOW,
+            ttl=RESPONSE_CACHE_TTL_LIVE,
+        ),
+        Handler(
+            "footystats",
+            "broiestbot.commands.footy:footy_stats_for_live_fixtures",
+            params=ROOM_USER,
+            requires=ROOM_USER,
+            latency=LATENCY_SLOW,
+            ttl=RESPONSE_CACHE_TTL_LIVE,
+        ),
+        Handler(
+            "todayfixtures",
+            "broiestbot.commands.footy:today_upcoming_fixtures",
+            params=ROOM_USER,
+            requires=ROOM_USER,
+            ttl=RESPONSE_CACHE_TTL_SCHEDULES,
+            audience=AUDIENCE_VIEWER,
+        ),
+        Handler(
+            "liveodds",
+            "broiestbot.commands.footy:footy_live_odds",
+            params=("user_name",),
+            requires=("user_name",),
+            latency=LATENCY_SLOW,
+            audience=AUDIENCE_EVERYONE,
+            ttl=RESPONSE_CACHE_TTL_LIVE,
+        ),
+        Handler("goldenboot", "broiestbot.commands.footy:epl_golden_boot", ttl=RESPONSE_CACHE_TTL_TABLES),
+        Handler(
+            "goldenshoe",
+            "broiestbot.commands.footy:all_leagues_golden_boot",
+            latency=LATENCY_SLOW,
+            ttl=RESPONSE_CACHE_TTL_TABLES,
+        ),
+        Handler(
+            "footypredicts",
+            "broiestbot.commands.footy:footy_today_fixtures_odds",
+            params=ROOM_USER,
+            requires=ROOM_USER,
+            latency=LATENCY_SLOW,
+            ttl=RESPONSE_CACHE_TTL_TABLES,
+            audience=AUDIENCE_VIEWER,
+        ),
+        Handler(
+            "foxtures",
+            "broiestbot.commands.footy:fetch_fox_fixtures",
+            params=ROOM_USER,
+            requires=ROOM_USER,
+            ttl=RESPONSE_CACHE_TTL_SCHEDULES,
+            audience=AUDIENCE_VIEWER,
+        ),
+        Handler(
+            "aafkxtures",
+            "broiestbot.commands.footy:fetch_aafk_fixture_data",
+            params=ROOM_USER,
+            requires=ROOM_USER,
+            ttl=RESPONSE_CACHE_TTL_SCHEDULES,
+            audience=AUDIENCE_VIEWER,
+        ),
+        Handler(
+            "footyxi",
+            "broiestbot.commands.footy:footy_team_lineups",
+            params=ROOM_USER,
+            requires=ROOM_USER,
+            latency=LATENCY_SLOW,
+            audience=AUDIENCE_VIEWER,
+            ttl=RESPONSE_CACHE_TTL_TABLES,
+        ),
+        Handler("covid", "broiestbot.commands.misc:covid_cases_usa", ttl=RESPONSE_CACHE_TTL_SCHEDULES),
+        Handler(
+            "lyrics",
+            "broiestbot.commands.lyrics:get_song_lyrics",
+            params=("args",),
+            requires=("args",),
+            executor="genius",
+            ttl=RESPONSE_CACHE_TTL_REFERENCE,
+        ),
+        Handler(
+            "entranslation",
+            "broiestbot.commands.definitions:get_english_translation",
+            params=("command", "content", "args"),
+            requires=("command", "args"),
+            ttl=RESPONSE_CACHE_TTL_REFERENCE,
+        ),
+        Handler(
+            "olympics",
+            "broiestbot.commands.olympics:get_summer_olympic_medals",
+            executor="scraping",
+            latency=LATENCY_SLOW,
+            ttl=RESPONSE_CACHE_TTL_TABLES,
+        ),
+        Handler(
+            "wolympics",
+            "broiestbot.commands.olympics:get_winter_olympic_medals",
+            executor="scraping",
+            latency=LATENCY_SLOW,
+            ttl=RESPONSE_CACHE_TTL_TABLES,
+        ),
+        Handler(
+            "winterolympics",
+            "broiestbot.commands.olympics:get_winter_olympic_medals",
+            executor="scraping",
+            latency=LATENCY_SLOW,
+            ttl=RESPONSE_CACHE_TTL_TABLES,
+        ),
+        Handler(
+            "footyodds",
+            "broiestbot.commands.footy:footy_today_fixtures_odds",
+            params=ROOM_USER,
+            requires=ROOM_USER,
+            latency=LATENCY_SLOW,
+            ttl=RESPONSE_CACHE_TTL_TABLES,
+            audience=AUDIENCE_VIEWER,
+        ),
+        Handler("twitch", "broiestbot.commands.video:get_all_live_twitch_streams"),
+        Handler("todaynfl", "broiestbot.commands.nfl:get_today_nfl_games", ttl=RESPONSE_CACHE_TTL_SCHEDULES),
+        Handler(
+            "livenfl",
+            "broiestbot.commands.nfl:get_live_nfl_game_summaries",
+            params=("user_name",),
+            requires=("user_name",),
+            ttl=RESPONSE_CACHE_TTL_LIVE,
+        ),
+        Handler("topcrypto", "broiestbot.commands.markets:get_top_crypto", ttl=RESPONSE_CACHE_TTL_QUOTES),
+        Handler(
+            "define",
+            "broiestbot.commands.definitions:get_english_definition",
+            params=("user_name", "args"),
+            requires=("args", "user_name"),
+            executor="dictionary",
+        ),
+        Handler(
+            "tune",
+            "broiestbot.commands.tuner:tuner",
+            params=("args", "user_name", "bot_username"),
+            requires=("args", "user_name", "bot_username"),
+            shared=False,
+        ),
+        Handler(
+            "wayne",
+            "broiestbot.commands.misc:time_until_wayne",
+            params=("user_name",),
+            requires=("user_name",),
+            latency=LATENCY_INSTANT,
+        ),
+        Handler(
+            "np",
+            "broiestbot.commands.tuner:get_current_show",
+            params=("bot_username",),
+            requires=("bot_username",),
+            fixed=(True,),
+        ),
+        Handler("reserved", reserved_command, latency=LATENCY_INSTANT),
+        Handler("todaysumo", "broiestbot.commands.sumo:today_sumo_matches", ttl=RESPONSE_CACHE_TTL_SCHEDULES),
+        Handler("sumo", "broiestbot.commands.sumo:upcoming_sumo_matches", ttl=RESPONSE_CACHE_TTL_SCHEDULES),
+        Handler("f1", "broiestbot.commands.f1:f1_grand_prix", ttl=RESPONSE_CACHE_TTL_SCHEDULES),
+        Handler("nbastandings", "broiestbot.commands.nba:nba_standings", ttl=RESPONSE_CACHE_TTL_TABLES),
+        Handler("nbagames", "broiestbot.commands.nba:upcoming_nba_games", ttl=RESPONSE_CACHE_TTL_SCHEDULES),
+        Handler("nbalive", "broiestbot.commands.nba:live_nba_games", ttl=RESPONSE_CACHE_TTL_LIVE),
+        Handler("livenba", "broiestbot.commands.nba:live_nba_games", ttl=RESPONSE_CACHE_TTL_LIVE),
+        Handler(
+            "tovala",
+            "broiestbot.commands.polls:tovala_counter",
+            params=("user_name",),
+            requires=("user_name",),
+            executor="redis",
+            shared=False,
+        ),
+        Handler(
+            "imagecount", "broiestbot.commands.images:gcs_count_images_in_bucket", params=("content",), executor="gcs"
+        ),
+        Handler(
+            "changeorstayvote",
+            "broiestbot.commands.polls:change_or_stay_vote",
+            params=("user_name", "content"),
+            requires=ROOM_USER,
+            executor="redis",
+            shared=False,
+        ),
+        Handler(
+            "changeorstay",
+            "broiestbot.commands.polls:get_live_poll_results",
+            params=("user_name",),
+            requires=("user_name",),
+            executor="redis",
+        ),
+        Handler("odds", "broiestbot.commands.odds:get_odds", params=("content",), ttl=RESPONSE_CACHE_TTL_QUOTES),
+        Handler(
+            "bachcount",
+            "broiestbot.commands.polls:bach_gang_counter",
+            params=("user_name", "args"),
+            requires=("args", "user_name"),
+            executor="redis",
+            shared=False,
+        ),
+        Handler(
+            "latestimage",
+            "broiestbot.commands.images:fetch_latest_image_from_gcs_bucket",
+            params=("content",),
+            executor="gcs",
+        ),
+        Handler("psntrophies", "broiestbot.commands.playstation:get_psn_game_trophies", executor="psn"),
+        Handler("bropsn", "broiestbot.commands.playstation:get_titles_with_stats", executor="psn"),
+        Handler(
+            "sleeper", "broiestbot.commands.nfl:fetch_sleeper_matchups", params=("user_name",), requires=("user_name",)
+        ),
+        # Handler("cryptochart", "broiestbot.commands.markets:get_crypto_chart", params=("args",), requires=("args",)),
+        Handler(
+            "lesbians",
+            "broiestbot.commands.afterdark:fetch_redgifs_gif",
+            params=("user_name",),
+            requires=("user_name",),
+            fixed=("lesbians",),
+            executor="redgifs",
+            shared=False,
+        ),
+        Handler(
+            "nsfw",
+            "broiestbot.commands.afterdark:fetch_redgifs_gif",
+            params=("args", "user_name"),
+            requires=("args", "user_name"),
+            kwargs={"after_dark_only": True},
+            executor="redgifs",
+            shared=False,
+        ),
+        Handler("psn", "broiestbot.commands.playstation:get_psn_online_friends", executor="psn"),
+        Handler(
+            "reload",
+            "broiestbot.commands.admin:reload_triggers_command",
+            params=("user_name",),
+            requires=("user_name",),
+            shared=False,
+        ),
+        Handler(
+            "profile",
+            "broiestbot.commands.admin:profile_command",
+            params=("args", "user_name"),
+            requires=("user_name",),
+            latency=LATENCY_INSTANT,
+            shared=False,
+        ),
+    ]
+)
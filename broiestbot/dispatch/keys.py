@@ -0,0 +1,47 @@
+"""Keys identifying command invocations which are guaranteed to produce the same response."""
+
+from typing import Any, Hashable, Tuple
+
+from .registry import AUDIENCE_USER, AUDIENCE_VIEWER, CommandContext, Handler
+
+# `CommandContext` fields which only personalize a response, rather than change what it's about.
+PERSONAL_FIELDS = ("room_name", "user_name")
+
+
+def normalize_value(value: Any) -> Hashable:
+    """
+    Fold insignificant differences in user input, such as case & repeated whitespace.
+
+    :param Any value: Value of a `CommandContext` field.
+
+    :returns: Hashable
+    """
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    return value
+
+
+async def invocation_key(handler: Handler, ctx: CommandContext) -> Tuple[Hashable, ...]:
+    """
+    Build a key shared by every invocation of a handler which would produce the same response.
+
+    Room & user are only part of the key for personalized handlers; handlers which vary by
+    timezone are keyed on the viewer's display preferences instead of their identity.
+
+    :param Handler handler: Handler resolved for the command.
+    :param CommandContext ctx: Values provided by the user's command.
+
+    :returns: Tuple[Hashable, ...]
+    """
+    audience = handler.personalized_by
+    values = tuple(
+        normalize_value(getattr(ctx, name))
+        for name in handler.params
+        if audience == AUDIENCE_USER or name not in PERSONAL_FIELDS
+    )
+    if audience == AUDIENCE_VIEWER:
+        # Imported lazily: the `footy` package only loads once a command keyed on viewers fires.
+        from broiestbot.commands.footy.util import get_viewer_key
+
+        values += (await get_viewer_key(ctx.room_name, ctx.user_name),)
+    return handler.cmd_type, *values
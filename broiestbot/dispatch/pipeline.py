@@ -0,0 +1,144 @@
+"""Run a resolved handler through the layers shared by every command."""
+
+from functools import partial
+from typing import Hashable, Optional
+
+from deadlines import Deadline
+from emoji import emojize
+from executors import ExecutorSaturated
+from http_client import attribute_requests
+from http_resilience import CircuitOpenError
+from logger import LOGGER
+from metrics import Counter, Histogram
+from shared_cache import shared_cache
+from tracing import tracer
+
+from .cache import is_failure, response_cache, worth_caching
+from .keys import invocation_key
+from .profiling import profiler
+from .registry import LATENCY_INSTANT, CommandContext, Handler
+from .singleflight import inflight
+
+COMMAND_SECONDS = Histogram(
+    "broiestbot_command_seconds",
+    "Time taken to build a command's response, including cache hits & coalesced calls.",
+    ("cmd_type",),
+)
+COMMAND_ERRORS = Counter(
+    "broiestbot_command_errors_total",
+    "Commands which raised an exception, or replied with an in-band `:warning:` failure.",
+    ("cmd_type", "kind"),
+)
+COMMAND_DEADLINE_HITS = Counter(
+    "broiestbot_command_deadline_hits_total",
+    "Commands which ran out of time, replying with partial results or an apology.",
+    ("cmd_type",),
+)
+
+
+async def run_handler(handler: Handler, ctx: CommandContext) -> Optional[str]:
+    """
+    Build a command's response, reusing a cached or in-flight response for identical invocations.
+
+    Commands whose executor is saturated are answered immediately rather than queued behind it,
+    as are commands which didn't handle an upstream failing fast while its circuit is open.
+    Latency, failures & upstream requests are recorded per command type.
+
+    :param Handler handler: Handler resolved for the command.
+    :param CommandContext ctx: Values provided by the user's command.
+
+    :returns: Optional[str]
+    """
+    with (
+        COMMAND_SECONDS.time(handler.cmd_type),
+        tracer.span("command", resource=handler.cmd_type, room=ctx.room_name),
+        attribute_requests(handler.cmd_type),
+    ):
+        try:
+            response = await _run_handler(handler, ctx)
+        except ExecutorSaturated as e:
+            LOGGER.warning(f"Refused `{handler.cmd_type}` for @{ctx.user_name}: {e}")
+            return emojize(
+                f":hourglass_not_done: bot is swamped rn, try again in a sec @{ctx.user_name}", language="en"
+            )
+        except CircuitOpenError as e:
+            COMMAND_ERRORS.inc(handler.cmd_type, "upstream")
+            LOGGER.warning(f"`{handler.cmd_type}` for @{ctx.user_name} failed fast: {e}")
+            return emojize(
+                f":warning: that API is down rn, try again in a bit @{ctx.user_name} :warning:", language="en"
+            )
+        except Exception:
+            COMMAND_ERRORS.inc(handler.cmd_type, "exception")
+            raise
+    if is_failure(response):
+        COMMAND_ERRORS.inc(handler.cmd_type, "reply")
+    return response
+
+
+async def _run_handler(handler: Handler, ctx: CommandContext) -> Optional[str]:
+    """Look up cached & in-flight responses before invoking the handler."""
+    if handler.latency == LATENCY_INSTANT:
+        return await handler.invoke(ctx)
+    if not (handler.shared or handler.cacheable):
+        return await _build_response(handler, ctx, None)
+    key = await invocation_key(handler, ctx)
+    if handler.cacheable:
+        response = response_cache.get(key, label=handler.cmd_type)
+        if response is not None:
+            tracer.current().set_tag("cache", "hit")
+            return response
+    if handler.shared:
+        return await inflight.do(key, partial(_build_response, handler, ctx, key), label=handler.cmd_type)
+    return await _build_response(handler, ctx, key)
+
+
+async def _build_response(handler: Handler, ctx: CommandContext, key: Optional[Hashable]) -> Optional[str]:
+    """
+    Invoke a handler under its deadline, caching complete responses when the handler declares a TTL.
+
+    With the shared cache enabled, cacheable responses are also looked up in (and saved to)
+    Redis, so another bot process which already built the response answers for this one; if
+    it's building the response right now, this process waits for it rather than building it twice.
+
+    Handlers which notice their budget running low reply with what they have; handlers still
+    running at the deadline are cancelled (along with their outstanding requests) and replaced
+    with an apology.
+
+    :param Handler handler: Handler resolved for the command.
+    :param CommandContext ctx: Values provided by the user's command.
+    :param Optional[Hashable] key: Key of the invocation, when its response may be cached.
+
+    :returns: Optional[str]
+    """
+    deadline = Deadline(handler.budget)
+    claim = None
+    if handler.cacheable and key is not None and shared_cache.available:
+        claim = shared_cache.claim("command", key)
+    try:
+        async with deadline:
+            if claim is not None and (await claim.acquire()).value is not None:
+                response = claim.value.decode()
+                response_cache.set(key, response, claim.ttl)
+                return response
+            if profiler.captures:
+                response = await profiler.invoke(handler, ctx)
+            else:
+                response = await handler.invoke(ctx)
+        if deadline.exhausted():
+            COMMAND_DEADLINE_HITS.inc(handler.cmd_type)
+            return response
+        if handler.cacheable and key is not None:
+            response_cache.set(key, response, handler.ttl)
+            if claim is not None and worth_caching(response):
+                await claim.set(response.encode(), handler.ttl)
+        return response
+    except TimeoutError:
+        COMMAND_DEADLINE_HITS.inc(handler.cmd_type)
+        LOGGER.warning(f"`{handler.cmd_type}` for @{ctx.user_name} cancelled after {handler.budget}s deadline")
+        return emojize(
+            f":hourglass_not_done: :warning: sry @{ctx.user_name}, that took way too long. try again in a bit :warning:",
+            language="en",
+        )
+    finally:
+        if claim is not None:
+            await claim.release()
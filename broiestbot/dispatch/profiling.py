@@ -0,0 +1,202 @@
+"""Profile the next few invocations of a command on demand, while the bot keeps serving the room."""
+
+import asyncio
+import cProfile
+import os
+import pstats
+from dataclasses import dataclass, field
+from functools import partial, wraps
+from time import perf_counter, strftime
+from typing import Callable, Dict, List, Optional
+
+from logger import LOGGER
+
+from config import PROFILE_DIR, PROFILE_TOP_FUNCTIONS
+
+from .registry import CommandContext, Handler
+
+
+def _profiled(profile: cProfile.Profile, func: Callable) -> Callable:
+    """Wrap a blocking handler so `profile` is enabled on the executor thread which runs it."""
+
+    @wraps(func)
+    def call(*args, **kwargs):
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (ie: a debugger) is already active; run the handler unprofiled.
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+
+    return call
+
+
+@dataclass
+class Capture:
+    """Profiles gathered so far for a single command type, until `remaining` invocations have run."""
+
+    remaining: int
+    invocations: int = 0
+    seconds: float = 0
+    stats: Optional[pstats.Stats] = None
+
+    def add(self, profile: cProfile.Profile, seconds: float) -> None:
+        """
+        Merge the profile of a single invocation; invocations which couldn't be profiled aren't counted.
+
+        :param cProfile.Profile profile: Profile of the invocation.
+        :param float seconds: Wall-clock time the invocation took.
+
+        :returns: None
+        """
+        profile.create_stats()
+        if not profile.stats:
+            return
+        if self.stats is None:
+            self.stats = pstats.Stats(profile)
+        else:
+            self.stats.add(profile)
+        self.invocations += 1
+        self.seconds += seconds
+        self.remaining -= 1
+
+
+@dataclass
+class Report:
+    """Summary of a finished capture, and where its full profile was saved."""
+
+    cmd_type: str
+    invocations: int
+    seconds: float
+    path: Optional[str]
+    functions: List[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        average = self.seconds / self.invocations * 1000
+        header = f"`{self.cmd_type}` x{self.invocations}, avg {average:.0f}ms"
+        if self.path:
+            header += f" ({os.path.basename(self.path)})"
+        return "\n".join((header, *self.functions))
+
+
+def top_functions(stats: pstats.Stats, limit: int) -> List[str]:
+    """
+    Functions which spent the most time running their own code, slowest first.
+
+    :param pstats.Stats stats: Profile to summarize.
+    :param int limit: Number of functions to list.
+
+    :returns: List[str]
+    """
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    return [
+        f"{own * 1000:.1f}ms / {cumulative * 1000:.1f}ms {name} ({os.path.basename(filename)}:{line}) x{calls}"
+        for (filename, line, name), (_, calls, own, cumulative, _) in rows
+    ]
+
+
+class CommandProfiler:
+    """
+    Run the next few invocations of a command type under `cProfile`, then save & summarize the result.
+
+    Nothing is profiled until a command type is armed, and the dispatch pipeline only checks
+    `captures` before invoking a handler, so an unarmed profiler costs nothing. Responses served
+    from the cache or by an identical in-flight call never reach a handler, and aren't profiled.
+
+    Only one invocation is profiled at a time, as only one profiler may be active per process;
+    invocations of an armed command arriving while another is being profiled run as normal.
+    Coroutine handlers are profiled on the event loop, so anything else the loop runs while they
+    await is included; blocking handlers are profiled on the executor thread which runs them.
+
+    :param str directory: Directory to which finished profiles are saved.
+    :param int top: Number of functions listed in each report.
+    """
+
+    def __init__(self, directory: str = PROFILE_DIR, top: int = PROFILE_TOP_FUNCTIONS):
+        self.directory = directory
+        self.top = top
+        self.captures: Dict[str, Capture] = {}
+        self.reports: Dict[str, Report] = {}
+        self._active = False
+
+    def arm(self, cmd_type: str, invocations: int) -> None:
+        """
+        Profile the next `invocations` invocations of a command type, replacing any capture in progress.
+
+        :param str cmd_type: `Type` of command to profile.
+        :param int invocations: Number of invocations to profile.
+
+        :returns: None
+        """
+        self.captures[cmd_type] = Capture(remaining=invocations)
+
+    def disarm(self, cmd_type: str) -> bool:
+        """
+        Abandon a capture in progress.
+
+        :param str cmd_type: `Type` of command being profiled.
+
+        :returns: bool
+        """
+        return self.captures.pop(cmd_type, None) is not None
+
+    async def invoke(self, handler: Handler, ctx: CommandContext) -> Optional[str]:
+        """
+        Invoke a handler, profiling it if its command type is armed & no other invocation is being profiled.
+
+        :param Handler handler: Handler resolved for the command.
+        :param CommandContext ctx: Values provided by the user's command.
+
+        :returns: Optional[str]
+        """
+        capture = self.captures.get(handler.cmd_type)
+        if capture is None or self._active:
+            return await handler.invoke(ctx)
+        self._active = True
+        profile = cProfile.Profile()
+        start = perf_counter()
+        try:
+            if handler.blocking:
+                return await handler.invoke(ctx, wrap=partial(_profiled, profile))
+            return await self._invoke_on_loop(profile, handler, ctx)
+        finally:
+            self._active = False
+            capture.add(profile, perf_counter() - start)
+            if capture.remaining <= 0 and self.captures.get(handler.cmd_type) is capture:
+                del self.captures[handler.cmd_type]
+                await self._finish(handler.cmd_type, capture)
+
+    @staticmethod
+    async def _invoke_on_loop(profile: cProfile.Profile, handler: Handler, ctx: CommandContext) -> Optional[str]:
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (ie: a debugger) is already active; run the handler unprofiled.
+            return await handler.invoke(ctx)
+        try:
+            return await handler.invoke(ctx)
+        finally:
+            profile.disable()
+
+    async def _finish(self, cmd_type: str, capture: Capture) -> None:
+        """Save a finished capture's profile & log a summary of where its time went."""
+        filepath = os.path.join(self.directory, f"{cmd_type}-{strftime('%Y%m%d-%H%M%S')}.pstats")
+        try:
+            await asyncio.to_thread(self._save, capture.stats, filepath)
+        except OSError as e:
+            LOGGER.warning(f"Failed to save profile of `{cmd_type}` to {filepath}: {e}")
+            filepath = None
+        report = self.reports[cmd_type] = Report(
+            cmd_type, capture.invocations, capture.seconds, filepath, top_functions(capture.stats, self.top)
+        )
+        LOGGER.success(f"Profiled {report}")
+
+    def _save(self, stats: pstats.Stats, filepath: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        stats.dump_stats(filepath)
+
+
+profiler = CommandProfiler()
@@ -0,0 +1,257 @@
+"""Declarative registry mapping command `types` to the handlers which build their responses."""
+
+import asyncio
+import inspect
+import sys
+from dataclasses import dataclass, field
+from importlib import import_module
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Tuple, Union
+
+from executors import run_blocking
+from logger import LOGGER
+from metrics import Histogram
+
+from config import COMMAND_DEADLINE_FAST, COMMAND_DEADLINE_SLOW
+
+# Expected latency of a handler, from cheapest to most expensive.
+LATENCY_INSTANT = "instant"  # Pure function of its inputs; no I/O.
+LATENCY_FAST = "fast"  # A single upstream request or query.
+LATENCY_SLOW = "slow"  # Fans out to many upstream requests, or scrapes a page.
+
+# Who a handler's response is the same for.
+AUDIENCE_EVERYONE = "everyone"  # Identical regardless of the room or user who triggered it.
+AUDIENCE_VIEWER = "viewer"  # Varies only with the room & user's preferred timezone/time format.
+AUDIENCE_USER = "user"  # Personalized to the room and/or user passed to the handler.
+
+COMMAND_MODULE_LOAD_SECONDS = Histogram(
+    "broiestbot_command_module_load_seconds",
+    "Time spent importing a command module the first time one of its commands fired.",
+    ("module",),
+)
+
+# Handler functions declared as `"package.module:function"`, once imported.
+_imported: Dict[str, Callable] = {}
+
+
+def import_handler(path: str) -> Callable:
+    """
+    Import a handler function declared as `"package.module:function"`, importing its module if needed.
+
+    :param str path: Dotted path to the module, then the function's name, separated by a colon.
+
+    :returns: Callable
+    """
+    func = _imported.get(path)
+    if func is None:
+        module_name, _, name = path.partition(":")
+        if module_name in sys.modules:
+            module = sys.modules[module_name]
+        else:
+            with COMMAND_MODULE_LOAD_SECONDS.time(module_name):
+                module = import_module(module_name)
+        func = _imported[path] = getattr(module, name)
+    return func
+
+
+@dataclass(frozen=True)
+class CommandContext:
+    """Values available to a handler when a user triggers a command."""
+
+    content: Optional[str] = None
+    command: Optional[str] = None
+    args: Optional[str] = None
+    room_name: Optional[str] = None
+    user_name: Optional[str] = None
+    bot_username: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Handler:
+    """
+    Declaration of how a single command `type` builds its response.
+
+    :param str cmd_type: `Type` of command as stored in the `commands` table.
+    :param Union[Callable, str] func: Function which constructs the response, or its `"package.module:function"`
+        path so its module is only imported when the command first fires.
+    :param Tuple[str] params: `CommandContext` fields passed positionally to `func`, after `fixed`.
+    :param Tuple[str] requires: `CommandContext` fields which must be truthy for the handler to fire.
+    :param Tuple fixed: Constant positional arguments passed to `func` ahead of `params`.
+    :param Mapping kwargs: Constant keyword arguments passed to `func`.
+    :param bool bare: Whether the handler only fires when the command has no arguments.
+    :param Optional[str] executor: Executor which runs `func`, when it's a blocking SDK call (see `executors`).
+    :param str latency: Expected latency class of the handler.
+    :param Optional[float] ttl: Seconds identical invocations may reuse a response; `None` opts out of caching.
+    :param Optional[str] audience: Who the response is the same for; derived from `params` when omitted.
+    :param bool shared: Whether concurrent identical invocations may await a single in-flight response.
+    :param Optional[float] deadline: Seconds the handler may take; derived from `latency` when omitted.
+    """
+
+    cmd_type: str
+    func: Union[Callable, str]
+    params: Tuple[str, ...] = ()
+    requires: Tuple[str, ...] = ()
+    fixed: Tuple[Any, ...] = ()
+    kwargs: Mapping[str, Any] = field(default_factory=dict)
+    bare: bool = False
+    executor: Optional[str] = None
+    latency: str = LATENCY_FAST
+    ttl: Optional[float] = None
+    audience: Optional[str] = None
+    shared: bool = True
+    deadline: Optional[float] = None
+
+    @property
+    def blocking(self) -> bool:
+        """Whether `func` blocks, and is run on its integration's executor rather than the event loop."""
+        return self.executor is not None
+
+    @property
+    def loaded(self) -> bool:
+        """Whether `func` is ready to be called without importing its module."""
+        return not isinstance(self.func, str) or self.func in _imported
+
+    def resolve_func(self) -> Callable:
+        """
+        Return the function which constructs the response, importing its module if needed.
+
+        :returns: Callable
+        """
+        if isinstance(self.func, str):
+            return import_handler(self.func)
+        return self.func
+
+    async def load(self) -> Callable:
+        """
+        Return the handler's function, importing its module off the event loop the first time.
+
+        :returns: Callable
+        """
+        if self.loaded:
+            return self.resolve_func()
+        return await asyncio.to_thread(self.resolve_func)
+
+    @property
+    def cacheable(self) -> bool:
+        """Whether responses from this handler may be served from the response cache."""
+        return self.ttl is not None
+
+    @property
+    def budget(self) -> Optional[float]:
+        """
+        Seconds the handler may take before it's cancelled, defaulting by its latency class.
+
+        :returns: Optional[float]
+        """
+        if self.deadline is not None:
+            return self.deadline
+        if self.latency == LATENCY_SLOW:
+            return COMMAND_DEADLINE_SLOW
+        if self.latency == LATENCY_FAST:
+            return COMMAND_DEADLINE_FAST
+        return None
+
+    @property
+    def personalized_by(self) -> str:
+        """
+        Audience of the handler's response, defaulting to per-user when it is passed a room or user.
+
+        :returns: str
+        """
+        if self.audience is not None:
+            return self.audience
+        if "room_name" in self.params or "user_name" in self.params:
+            return AUDIENCE_USER
+        return AUDIENCE_EVERYONE
+
+    def accepts(self, ctx: CommandContext) -> bool:
+        """
+        Check whether a command invocation satisfies this handler's requirements.
+
+        :param CommandContext ctx: Values provided by the user's command.
+
+        :returns: bool
+        """
+        if self.bare and ctx.args is not None:
+            return False
+        return all(getattr(ctx, name) for name in self.requires)
+
+    async def invoke(self, ctx: CommandContext, wrap: Optional[Callable[[Callable], Callable]] = None) -> Optional[str]:
+        """
+        Build the response for a command, awaiting coroutines & running blocking calls on their executor.
+
+        :param CommandContext ctx: Values provided by the user's command.
+        :param Optional[Callable] wrap: Decorator applied to `func` before it's called, on whichever thread calls it.
+
+        :returns: Optional[str]
+        """
+        func = await self.load()
+        if wrap is not None:
+            func = wrap(func)
+        args = (*self.fixed, *(getattr(ctx, name) for name in self.params))
+        if self.blocking:
+            return await run_blocking(self.executor, func, *args, **self.kwargs)
+        result = func(*args, **self.kwargs)
+        if inspect.isawaitable(result):
+            return await result
+        return result
+
+
+class CommandRouter:
+    """Resolve command `types` to their handlers with a single dictionary lookup."""
+
+    def __init__(self, handlers: Iterable[Handler]):
+        self._handlers: Dict[str, Handler] = {}
+        for handler in handlers:
+            if handler.cmd_type in self._handlers:
+                raise ValueError(f"Duplicate handler declared for command type `{handler.cmd_type}`")
+            self._handlers[handler.cmd_type] = handler
+
+    def __contains__(self, cmd_type: str) -> bool:
+        return cmd_type in self._handlers
+
+    def __len__(self) -> int:
+        return len(self._handlers)
+
+    def __iter__(self):
+        return iter(self._handlers.values())
+
+    def get(self, cmd_type: str) -> Optional[Handler]:
+        """
+        Fetch the handler declared for a command type, if any.
+
+        :param str cmd_type: `Type` of command triggered by a user.
+
+        :returns: Optional[Handler]
+        """
+        return self._handlers.get(cmd_type)
+
+    async def preload(self) -> int:
+        """
+        Import every command module which hasn't been imported yet, one at a time, off the event loop.
+
+        :returns: int
+        """
+        loaded = 0
+        for handler in self._handlers.values():
+            if handler.loaded:
+                continue
+            try:
+                await handler.load()
+                loaded += 1
+            except Exception as e:
+                LOGGER.warning(f"Failed to preload handler for `{handler.cmd_type}`: {e}")
+        return loaded
+
+    def resolve(self, cmd_type: str, ctx: CommandContext) -> Optional[Handler]:
+        """
+        Fetch the handler for a command type if the invocation satisfies its requirements.
+
+        :param str cmd_type: `Type` of command triggered by a user.
+        :param CommandContext ctx: Values provided by the user's command.
+
+        :returns: Optional[Handler]
+        """
+        handler = self._handlers.get(cmd_type)
+        if handler is not None and handler.accepts(ctx):
+            return handler
+        return None
@@ -0,0 +1,67 @@
+"""Collapse concurrent identical commands into a single upstream call."""
+
+import asyncio
+from functools import partial
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from metrics import Counter, Gauge
+
+T = TypeVar("T")
+
+COMMANDS_COALESCED = Counter(
+    "broiestbot_commands_coalesced_total",
+    "Commands answered by awaiting an identical invocation which was already in flight.",
+    ("cmd_type",),
+)
+
+
+class SingleFlight:
+    """
+    Share one in-flight call between every concurrent caller using the same key.
+
+    The first caller for a key starts the call as its own task; callers arriving before it
+    finishes await that same task. Each caller is shielded from the others, so a caller being
+    cancelled doesn't cancel the response everybody else is waiting on.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]], label: str = "") -> T:
+        """
+        Await the in-flight call for `key`, starting it with `func` if there isn't one.
+
+        :param Hashable key: Identity of the call; equal keys must produce equal results.
+        :param Callable func: Zero-argument coroutine function performing the call.
+        :param str label: Label recorded against calls which were coalesced.
+
+        :returns: T
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(partial(self._forget, key))
+        else:
+            COMMANDS_COALESCED.inc(label)
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        """Drop a finished call so the next caller starts a fresh one."""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Retrieve the exception so callers who were all cancelled don't leave it unobserved.
+            task.exception()
+
+
+inflight = SingleFlight()
+
+COMMANDS_IN_FLIGHT = Gauge(
+    "broiestbot_commands_in_flight",
+    "Distinct commands currently awaiting a response.",
+    callback=partial(len, inflight),
+)
@@ -0,0 +1,239 @@
+"""Per-room outbound queues which pace, merge & expire the bot's replies."""
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass, replace
+from time import monotonic
+from typing import Deque, Dict, Optional
+
+from chatango import Room
+from logger import LOGGER
+from metrics import Counter, Gauge, Histogram
+
+from config import (
+    OUTBOUND_MAX_AGE,
+    OUTBOUND_MERGE_MAX_LENGTH,
+    OUTBOUND_QUEUE_SIZE,
+    OUTBOUND_SEND_INTERVAL,
+)
+
+OUTBOUND_QUEUE_DEPTH = Gauge(
+    "broiestbot_outbound_queue_depth",
+    "Replies waiting to be sent, per room.",
+    ("room",),
+)
+OUTBOUND_SEND_SECONDS = Histogram(
+    "broiestbot_outbound_send_seconds",
+    "Time spent sending a single message to a room.",
+    ("room",),
+)
+OUTBOUND_QUEUE_SECONDS = Histogram(
+    "broiestbot_outbound_queue_seconds",
+    "Time replies spent queued before being sent.",
+    ("room",),
+)
+OUTBOUND_MERGED = Counter(
+    "broiestbot_outbound_merged_total",
+    "Queued replies merged into the message ahead of them.",
+    ("room",),
+)
+OUTBOUND_DROPPED = Counter(
+    "broiestbot_outbound_dropped_total",
+    "Replies dropped because the room's queue was full, or they went stale before being sent.",
+    ("room", "reason"),
+)
+
+
+@dataclass(frozen=True)
+class OutboundMessage:
+    """Reply waiting to be sent to a room."""
+
+    room: Room
+    body: str
+    use_html: bool
+    enqueued_at: float
+    expires_at: float
+
+
+class RoomSender:
+    """
+    Queue of replies to a single room, sent in order by one writer task.
+
+    Sends are spaced at least `interval` seconds apart. When the writer catches up on a
+    backlog, short replies waiting behind each other are merged into one message, and
+    replies which waited longer than their deadline are dropped rather than sent late.
+
+    :param str room_name: Name of the Chatango room.
+    :param int maxsize: Replies queued before new replies are dropped.
+    :param float interval: Minimum seconds between messages sent to the room.
+    :param float max_age: Default seconds a reply may wait before it's stale.
+    :param int merge_max_length: Longest message which queued replies may be merged into.
+    """
+
+    def __init__(self, room_name: str, maxsize: int, interval: float, max_age: float, merge_max_length: int):
+        self.room_name = room_name
+        self.maxsize = maxsize
+        self.interval = interval
+        self.max_age = max_age
+        self.merge_max_length = merge_max_length
+        self._pending: Deque[OutboundMessage] = deque()
+        self._ready = asyncio.Event()
+        self._last_sent = 0.0
+        self._sending = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def depth(self) -> int:
+        """Number of replies waiting to be sent."""
+        return len(self._pending)
+
+    def put(self, room: Room, body: str, use_html: bool = False, max_age: Optional[float] = None) -> bool:
+        """
+        Queue a reply without waiting for it to be sent.
+
+        :param Room room: Chatango room to send the reply to.
+        :param str body: Message to send.
+        :param bool use_html: Whether `body` contains HTML to be rendered.
+        :param Optional[float] max_age: Seconds the reply may wait before it's stale.
+
+        :returns: bool
+        """
+        if len(self._pending) >= self.maxsize:
+            OUTBOUND_DROPPED.inc(self.room_name, "full")
+            LOGGER.warning(f"Outbound queue for `{self.room_name}` full ({self.maxsize}); dropped reply")
+            return False
+        now = monotonic()
+        age = self.max_age if max_age is None else max_age
+        self._pending.append(OutboundMessage(room, body, use_html, now, now + age))
+        OUTBOUND_QUEUE_DEPTH.set(len(self._pending), self.room_name)
+        self._ready.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._write(), name=f"outbound-{self.room_name}")
+        return True
+
+    async def close(self, timeout: float) -> None:
+        """
+        Send replies still in the queue, then stop the writer.
+
+        :param float timeout: Seconds to wait for queued replies before abandoning them.
+
+        :returns: None
+        """
+        deadline = monotonic() + timeout
+        while (self._pending or self._sending) and monotonic() < deadline and self._task and not self._task.done():
+            await asyncio.sleep(0.05)
+        if self._pending:
+            LOGGER.warning(f"Abandoned {len(self._pending)} replies to `{self.room_name}` at shutdown")
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _write(self) -> None:
+        """Send queued replies one at a time, paced, forever."""
+        while True:
+            while not self._pending:
+                self._ready.clear()
+                await self._ready.wait()
+            wait = self._last_sent + self.interval - monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            message = self._take()
+            if message is None:
+                continue
+            OUTBOUND_QUEUE_SECONDS.observe(monotonic() - message.enqueued_at, self.room_name)
+            self._sending = True
+            try:
+                with OUTBOUND_SEND_SECONDS.time(self.room_name):
+                    await message.room.send_message(message.body, use_html=message.use_html)
+            except Exception as e:
+                LOGGER.warning(f"Failed to send message to `{self.room_name}`: {e}")
+            finally:
+                self._sending = False
+            self._last_sent = monotonic()
+
+    def _take(self) -> Optional[OutboundMessage]:
+        """
+        Pop the next reply to send, merging short replies queued behind it & dropping stale ones.
+
+        :returns: Optional[OutboundMessage]
+        """
+        now = monotonic()
+        message = None
+        bodies = []
+        while self._pending:
+            queued = self._pending[0]
+            if queued.expires_at <= now:
+                self._pending.popleft()
+                OUTBOUND_DROPPED.inc(self.room_name, "stale")
+                continue
+            if message is None:
+                message = self._pending.popleft()
+                bodies.append(message.body)
+                continue
+            merged_length = sum(len(body) + 1 for body in bodies) + len(queued.body)
+            if queued.use_html != message.use_html or merged_length > self.merge_max_length:
+                break
+            bodies.append(self._pending.popleft().body)
+            OUTBOUND_MERGED.inc(self.room_name)
+        OUTBOUND_QUEUE_DEPTH.set(len(self._pending), self.room_name)
+        if message is None:
+            return None
+        if len(bodies) > 1:
+            return replace(message, body="\n".join(bodies))
+        return message
+
+
+class OutboundQueues:
+    """Route replies to the sender for their room, creating senders on first use."""
+
+    def __init__(
+        self,
+        maxsize: int = OUTBOUND_QUEUE_SIZE,
+        interval: float = OUTBOUND_SEND_INTERVAL,
+        max_age: float = OUTBOUND_MAX_AGE,
+        merge_max_length: int = OUTBOUND_MERGE_MAX_LENGTH,
+    ):
+        self.maxsize = maxsize
+        self.interval = interval
+        self.max_age = max_age
+        self.merge_max_length = merge_max_length
+        self._senders: Dict[str, RoomSender] = {}
+
+    def send(self, room: Room, body: str, use_html: bool = False, max_age: Optional[float] = None) -> bool:
+        """
+        Queue a reply to a room; returns immediately, without waiting on Chatango.
+
+        :param Room room: Chatango room to send the reply to.
+        :param str body: Message to send.
+        :param bool use_html: Whether `body` contains HTML to be rendered.
+        :param Optional[float] max_age: Seconds the reply may wait before it's stale.
+
+        :returns: bool
+        """
+        room_name = room.name.lower()
+        sender = self._senders.get(room_name)
+        if sender is None:
+            sender = self._senders[room_name] = RoomSender(
+                room_name, self.maxsize, self.interval, self.max_age, self.merge_max_length
+            )
+        return sender.put(room, body, use_html=use_html, max_age=max_age)
+
+    def depth(self, room_name: str) -> int:
+        """Number of replies waiting to be sent to a room."""
+        sender = self._senders.get(room_name.lower())
+        return sender.depth if sender is not None else 0
+
+    async def close(self, timeout: float = 5) -> None:
+        """
+        Flush every room's queue, then stop their writers; called when the bot shuts down.
+
+        :param float timeout: Seconds to wait for queued replies before abandoning them.
+
+        :returns: None
+        """
+        await asyncio.gather(*(sender.close(timeout) for sender in self._senders.values()))
+        self._senders.clear()
+
+
+outbound = OutboundQueues()
@@ -0,0 +1,49 @@
+"""Tests for classifying chats which trigger previews, bans, or LLM responses."""
+
+import pytest
+
+from broiestbot.classifier import (
+    INTENT_BANNED_WORD,
+    INTENT_BOT_MENTION,
+    INTENT_SILENT_BAN,
+    INTENT_TWITTER_PREVIEW,
+    INTENT_WIKI_PREVIEW,
+    INTENT_YOUTUBE_PREVIEW,
+    classify_message,
+)
+
+
+@pytest.mark.parametrize(
+    "chat_message, intent",
+    [
+        ("lmao", None),
+        ("https://www.youtube.com/watch?v=dQw4w9WgXcQ", INTENT_YOUTUBE_PREVIEW),
+        ("check this https://youtu.be/dQw4w9WgXcQ?t=42", INTENT_YOUTUBE_PREVIEW),
+        ("https://x.com/elonmusk/status/1234567890123456789", INTENT_TWITTER_PREVIEW),
+        ("look https://x.com/elonmusk/status/1234567890123456789", None),
+        ("https://en.wikipedia.org/wiki/Philadelphia_Eagles", INTENT_WIKI_PREVIEW),
+        ("https://i.imgur.com/wppfinC.png", INTENT_SILENT_BAN),
+        ("bl/SSSb", INTENT_BANNED_WORD),
+        ("bl/Sb south philly", None),
+        ("image not found :(", INTENT_SILENT_BAN),
+        ("image not found :( lol", None),
+        ("http://broiestbro.com/table/commands", INTENT_SILENT_BAN),
+        ("@bro tell me a joke", INTENT_BOT_MENTION),
+        ("hey @broiestbro", None),
+        ("idk wtf u did but bot is ded now, thanks @someone", INTENT_SILENT_BAN),
+    ],
+)
+def test_classify_message(chat_message, intent):
+    assert classify_message(chat_message) == intent
+
+
+def test_earlier_trigger_takes_precedence():
+    """A chat matching several triggers is classified by whichever the cascade checked first."""
+    assert classify_message("@bro https://youtu.be/dQw4w9WgXcQ") == INTENT_YOUTUBE_PREVIEW
+    assert classify_message("https://en.wikipedia.org/wiki/Bro @bro") == INTENT_WIKI_PREVIEW
+
+
+def test_youtube_previews_can_be_skipped():
+    """Bots don't trigger YouTube previews, so their chats fall through to later triggers."""
+    assert classify_message("@bro https://youtu.be/dQw4w9WgXcQ", youtube_previews=False) == INTENT_BOT_MENTION
+    assert classify_message("https://youtu.be/dQw4w9WgXcQ", youtube_previews=False) is None
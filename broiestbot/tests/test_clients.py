@@ -0,0 +1,100 @@
+"""Tests for third-party clients built on first use."""
+
+import asyncio
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+from clients.registry import ClientRegistry, LazyClient, is_built, resolve
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+class FakeClient:
+    def __init__(self):
+        self.closed = False
+        self.retries = 0
+
+    def ping(self) -> str:
+        return "pong"
+
+    def get(self, key: str) -> str:
+        return f"value of {key}"
+
+    def close(self) -> str:
+        return "closed"
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+def test_client_built_on_first_use():
+    builds = []
+    client = LazyClient("fake", lambda: builds.append(1) or FakeClient())
+    assert not is_built(client)
+    assert client.ping() == "pong"
+    assert client.ping() == "pong"
+    assert is_built(client)
+    assert builds == [1]
+
+
+def test_client_built_once_across_threads():
+    """Executor threads using a client for the first time at once share one instance."""
+    builds = []
+    started = threading.Barrier(8)
+
+    def build():
+        builds.append(1)
+        return FakeClient()
+
+    client = LazyClient("fake", build)
+
+    def use():
+        started.wait()
+        client.ping()
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert builds == [1]
+
+
+def test_attributes_set_on_client():
+    client = LazyClient("fake", FakeClient)
+    client.retries = 3
+    assert resolve(client).retries == 3
+
+
+def test_client_methods_are_not_hidden_by_the_stand_in():
+    """Clients' own `get` & `close` (ie: Redis') reach the client rather than the stand-in."""
+    client = LazyClient("fake", FakeClient)
+    assert client.get("score") == "value of score"
+    assert client.close() == "closed"
+
+
+def test_probing_private_attributes_does_not_build_the_client():
+    client = LazyClient("fake", FakeClient)
+    assert not hasattr(client, "__func__")
+    assert not hasattr(client, "_private")
+    assert not is_built(client)
+
+
+def test_registry_closes_built_clients_only():
+    registry = ClientRegistry()
+    used = registry.register("used", FakeClient, close="aclose")
+    unused = registry.register("unused", FakeClient, close="aclose")
+    used.ping()
+    asyncio.run(registry.close())
+    assert resolve(used).closed
+    assert not is_built(unused)
+
+
+def test_importing_clients_skips_sdks():
+    """Importing `clients` declares every client without importing a single SDK."""
+    sdks = ("anthropic", "chart_studio", "lyricsgenius", "praw", "twilio", "psnawp_api", "google.cloud.storage")
+    script = f"import sys, clients; print([sdk for sdk in {sdks!r} if sdk in sys.modules])"
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True, cwd=ROOT)
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,83 @@
+"""Tests for command deadlines and the HTTP timeouts fitted within them."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import aiohttp
+import pytest
+from deadlines import Deadline, DeadlineExceeded, budget_exhausted, remaining
+from http_client import _fit_to_deadline
+from logger import sms_error_handler
+
+from config import COMMAND_DEADLINE_RESERVE
+
+
+def test_deadline_cancels_slow_commands():
+    async def run():
+        async with Deadline(0.01):
+            await asyncio.sleep(1)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(run())
+
+
+def test_no_deadline_outside_commands():
+    assert remaining() is None
+    assert budget_exhausted() is False
+    kwargs = {"timeout": aiohttp.ClientTimeout(total=10)}
+    assert _fit_to_deadline(dict(kwargs)) == kwargs
+
+
+def test_nested_deadlines_never_outlive_their_parent():
+    async def run():
+        async with Deadline(5):
+            async with Deadline(60):
+                return remaining()
+
+    assert asyncio.run(run()) <= 5
+
+
+def test_request_timeouts_fit_within_the_deadline():
+    """A request made 5 seconds from the deadline may not wait the full 40s `HTTP_REQUEST_TIMEOUT`."""
+
+    async def run():
+        async with Deadline(5):
+            return _fit_to_deadline({})
+
+    timeout = asyncio.run(run())["timeout"]
+    assert timeout.total <= 5 - COMMAND_DEADLINE_RESERVE
+
+
+def test_shorter_request_timeouts_are_kept():
+    async def run():
+        async with Deadline(30):
+            return _fit_to_deadline({"timeout": aiohttp.ClientTimeout(total=10)})
+
+    assert asyncio.run(run())["timeout"].total == 10
+
+
+def test_exhausted_budget_refuses_new_requests():
+    async def run():
+        async with Deadline(COMMAND_DEADLINE_RESERVE / 2):
+            assert budget_exhausted()
+            _fit_to_deadline({})
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(run())
+
+
+def test_deadline_hits_do_not_page():
+    """Commands logging a request refused for lack of time, as their `except Exception` blocks do, send no SMS."""
+
+    async def run():
+        async with Deadline(COMMAND_DEADLINE_RESERVE / 2):
+            try:
+                _fit_to_deadline({})
+            except Exception as e:
+                sms_error_handler({"time": "now", "message": f"Unexpected error fetching fixtures: {e}"})
+                sms_error_handler({"time": "now", "message": "Fixtures", "exception": SimpleNamespace(value=e)})
+
+    with patch("logger.sms") as sms:
+        asyncio.run(run())
+    sms.messages.create.assert_not_called()
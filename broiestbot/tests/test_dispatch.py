@@ -0,0 +1,104 @@
+"""Tests for resolving command types to their declared handlers."""
+
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from executors import EXECUTOR_POOLS
+
+from broiestbot.dispatch import CommandContext, CommandRouter, Handler, router
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def _echo(*args, **kwargs):
+    return args, kwargs
+
+
+async def _async_echo(*args, **kwargs):
+    return args, kwargs
+
+
+def test_handler_receives_fixed_args_then_params():
+    """Constant arguments are passed ahead of values pulled from the command's context."""
+    handler = Handler("echo", _echo, params=("args", "user_name"), fixed=(39,), kwargs={"subs": True})
+    ctx = CommandContext(args="arsenal", user_name="bro")
+    assert asyncio.run(handler.invoke(ctx)) == ((39, "arsenal", "bro"), {"subs": True})
+
+
+def test_coroutine_handlers_are_awaited():
+    handler = Handler("echo", _async_echo, params=("content",))
+    assert asyncio.run(handler.invoke(CommandContext(content="hi"))) == (("hi",), {})
+
+
+def test_blocking_handlers_run_on_their_executor():
+    handler = Handler("echo", _echo, params=("content",), executor="gcs")
+    assert asyncio.run(handler.invoke(CommandContext(content="hi"))) == (("hi",), {})
+
+
+def test_missing_requirement_does_not_resolve():
+    """A handler whose required context is missing falls through, as the `elif` chain did."""
+    test_router = CommandRouter([Handler("weather", _echo, requires=("args", "user_name"))])
+    assert test_router.resolve("weather", CommandContext(user_name="bro")) is None
+    assert test_router.resolve("weather", CommandContext(args="philly", user_name="bro")) is not None
+
+
+def test_bare_handler_rejects_arguments():
+    test_router = CommandRouter([Handler("420", _echo, bare=True)])
+    assert test_router.resolve("420", CommandContext()) is not None
+    assert test_router.resolve("420", CommandContext(args="now")) is None
+
+
+def test_unknown_command_type_does_not_resolve():
+    assert router.resolve("__unknown__", CommandContext()) is None
+
+
+def test_duplicate_command_types_are_rejected():
+    with pytest.raises(ValueError):
+        CommandRouter([Handler("echo", _echo), Handler("echo", _async_echo)])
+
+
+def test_declared_params_exist_on_context():
+    """Every declared handler only references fields which `CommandContext` provides."""
+    fields = set(CommandContext.__dataclass_fields__)
+    for handler in router:
+        assert set(handler.params) <= fields, handler.cmd_type
+        assert set(handler.requires) <= fields, handler.cmd_type
+
+
+def test_declared_executors_exist():
+    for handler in router:
+        assert handler.executor is None or handler.executor in EXECUTOR_POOLS, handler.cmd_type
+
+
+def test_handlers_declared_by_path_import_on_first_use():
+    handler = Handler("echo", "broiestbot.tests.test_dispatch:_echo", params=("content",))
+    assert asyncio.run(handler.invoke(CommandContext(content="hi"))) == (("hi",), {})
+    assert handler.loaded
+
+
+def test_importing_dispatch_skips_command_modules():
+    """Command modules are only imported once their command first fires, not by the dispatcher itself."""
+    script = "import sys, broiestbot.dispatch; print([m for m in sys.modules if m.startswith('broiestbot.commands.')])"
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True, cwd=ROOT)
+    assert result.stdout.strip() == "[]"
+
+
+def test_declared_handlers_import():
+    """Every handler declared by path names a function which exists."""
+    for handler in router:
+        assert callable(handler.resolve_func()), handler.cmd_type
+
+
+def test_preload_imports_unloaded_handlers():
+    test_router = CommandRouter(
+        [
+            Handler("echo", "broiestbot.tests.test_dispatch:_async_echo"),
+            Handler("missing", "broiestbot.tests.test_dispatch:_missing"),
+        ]
+    )
+    assert asyncio.run(test_router.preload()) == 1
+    assert test_router.get("echo").loaded
+    assert not test_router.get("missing").loaded
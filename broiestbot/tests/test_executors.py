@@ -0,0 +1,53 @@
+"""Tests for the bounded executors reserved for blocking SDKs."""
+
+import asyncio
+import threading
+
+import pytest
+from executors import EXECUTOR_REJECTED, BoundedExecutor, ExecutorSaturated
+
+
+def test_blocking_calls_run_off_the_event_loop():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=0)
+    loop_thread = threading.get_ident()
+    assert asyncio.run(executor.run(threading.get_ident)) != loop_thread
+    executor.shutdown()
+
+
+def test_saturated_executor_fails_fast():
+    """A stalled SDK rejects new calls instead of queueing them indefinitely."""
+    executor = BoundedExecutor("stalled", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def run():
+        calls = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(ExecutorSaturated):
+            await executor.run(release.wait)
+        release.set()
+        return await asyncio.gather(*calls)
+
+    before = EXECUTOR_REJECTED.value("stalled")
+    assert asyncio.run(run()) == [True, True]
+    assert EXECUTOR_REJECTED.value("stalled") - before == 1
+    assert executor.pending == 0
+    executor.shutdown()
+
+
+def test_executors_are_isolated():
+    """Saturating one integration's executor leaves the others free."""
+    stalled = BoundedExecutor("stalled-sdk", max_workers=1, max_queue=0)
+    healthy = BoundedExecutor("healthy-sdk", max_workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def run():
+        blocked = asyncio.ensure_future(stalled.run(release.wait))
+        await asyncio.sleep(0.01)
+        result = await healthy.run(lambda: "images")
+        release.set()
+        await blocked
+        return result
+
+    assert asyncio.run(run()) == "images"
+    stalled.shutdown()
+    healthy.shutdown()
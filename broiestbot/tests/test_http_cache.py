@@ -0,0 +1,119 @@
+"""Tests for reusing & revalidating upstream GET responses."""
+
+import asyncio
+from typing import List
+
+import pytest
+from http_cache import cache_key, freshness, http_cache
+from http_client import HttpSession
+from http_resilience import RetryPolicy
+
+from config import HTTP_CACHE_HOST_TTLS
+from tests.aiohttp_mocks import FakeResponse
+
+URL = "https://v3.football.api-sports.io/fixtures"
+
+
+class _Response(FakeResponse):
+    def __init__(self, status: int = 200, json_data=None, headers=None):
+        super().__init__(status=status, json_data=json_data)
+        self.headers = headers or {}
+        self.url = URL
+
+
+class _Upstream:
+    """Session replaying responses in order, recording the headers each request was sent with."""
+
+    def __init__(self, *responses: _Response):
+        self.responses: List[_Response] = list(responses)
+        self.requests: List[dict] = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append(kwargs.get("headers") or {})
+        return self.responses.pop(0)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    http_cache.clear()
+    yield
+    http_cache.clear()
+
+
+def _fetch(session: HttpSession, times: int, **kwargs) -> list:
+    async def fetch_all():
+        results = []
+        for _ in range(times):
+            async with session.get(URL, params={"live": "all", "league": 39}, **kwargs) as resp:
+                results.append((resp.status, await resp.json(content_type=None)))
+        return results
+
+    return asyncio.run(fetch_all())
+
+
+def test_repeated_requests_are_served_from_cache():
+    upstream = _Upstream(_Response(json_data={"response": [1]}, headers={"Cache-Control": "max-age=60"}))
+    assert _fetch(HttpSession(upstream), 3) == [(200, {"response": [1]})] * 3
+    assert len(upstream.requests) == 1
+
+
+def test_responses_without_freshness_are_only_reused_from_hosts_which_opt_in(monkeypatch):
+    """Random gifs & images stay random, unless their host is given a TTL in `HTTP_CACHE_HOST_TTLS`."""
+    upstream = _Upstream(*(_Response(json_data={"response": [i]}) for i in range(3)))
+    assert _fetch(HttpSession(upstream), 2) == [(200, {"response": [0]}), (200, {"response": [1]})]
+    monkeypatch.setitem(HTTP_CACHE_HOST_TTLS, "v3.football.api-sports.io", 30)
+    assert _fetch(HttpSession(upstream), 2) == [(200, {"response": [2]})] * 2
+    assert len(upstream.requests) == 3
+
+
+def test_no_store_responses_are_fetched_every_time():
+    upstream = _Upstream(*(_Response(json_data={}, headers={"Cache-Control": "no-store"}) for _ in range(2)))
+    _fetch(HttpSession(upstream), 2)
+    assert len(upstream.requests) == 2
+
+
+def test_stale_responses_are_revalidated_with_their_etag():
+    """A `304 Not Modified` refreshes the cached response rather than downloading it again."""
+    upstream = _Upstream(
+        _Response(json_data={"response": [1]}, headers={"Cache-Control": "max-age=0", "ETag": '"v1"'}),
+        _Response(status=304, headers={"Cache-Control": "max-age=60"}),
+    )
+    assert _fetch(HttpSession(upstream), 3) == [(200, {"response": [1]})] * 3
+    assert len(upstream.requests) == 2
+    assert upstream.requests[1]["If-None-Match"] == '"v1"'
+
+
+def test_per_call_ttl_overrides_upstream_headers():
+    upstream = _Upstream(*(_Response(json_data={}, headers={"Cache-Control": "no-store"}) for _ in range(2)))
+    _fetch(HttpSession(upstream), 2, cache_ttl=30)
+    assert len(upstream.requests) == 1
+    _fetch(HttpSession(upstream), 1, cache_ttl=0)
+    assert len(upstream.requests) == 2
+
+
+def test_error_responses_are_not_cached():
+    upstream = _Upstream(_Response(status=429, json_data={}), _Response(json_data={"response": []}))
+    session = HttpSession(upstream, retry=RetryPolicy(attempts=1))
+    assert [status for status, _ in _fetch(session, 2)] == [429, 200]
+
+
+def test_cache_key_sorts_params_and_fingerprints_selected_headers():
+    assert cache_key("GET", URL, {"a": 1, "b": 2}) == cache_key("GET", URL, [("b", 2), ("a", 1)])
+    assert cache_key("GET", URL, headers={"User-Agent": "x"}) == cache_key("GET", URL)
+    assert cache_key("GET", URL, headers={"x-rapidapi-key": "one"}) != cache_key(
+        "GET", URL, headers={"x-rapidapi-key": "two"}
+    )
+    assert "one" not in cache_key("GET", URL, headers={"x-rapidapi-key": "one"})
+    assert "secret" not in cache_key("GET", f"{URL}?api_key=secret", {"apikey": "secret"})
+
+
+def test_freshness_honors_cache_control_and_expires():
+    assert freshness({"Cache-Control": "public, max-age=60", "Age": "15"}) == 45
+    assert freshness({"Cache-Control": "no-cache"}) == 0
+    assert freshness({"Cache-Control": "no-store"}) is None
+    expires = {"Date": "Fri, 16 Oct 2026 12:00:00 GMT", "Expires": "Fri, 16 Oct 2026 12:02:00 GMT"}
+    assert freshness(expires) == 120
+    assert freshness({"Expires": "0"}) == 0
+    assert freshness({}, default=5) == 5
+    assert freshness({}) is None
+    assert freshness({"ETag": '"v1"'}) == 0
@@ -0,0 +1,79 @@
+"""Tests for decoding upstream JSON from the raw body of responses."""
+
+import asyncio
+import json
+
+import http_json
+import pytest
+from aiohttp import ContentTypeError
+from http_cache import http_cache
+from http_client import HttpSession
+from http_json import UPSTREAM_JSON_BYTES, UPSTREAM_JSON_SECONDS, JsonResponse, decode
+
+from tests.aiohttp_mocks import FakeResponse
+
+HOST = "api-football-v1.p.rapidapi.com"
+URL = f"https://{HOST}/v3/fixtures"
+FIXTURES = {"response": [{"fixture": {"id": 1489392, "referee": "Szymon Marciniak"}}]}
+
+
+class _Response(FakeResponse):
+    def __init__(self, body: bytes, content_type: str = "application/json", charset: str = None):
+        super().__init__(json_data=None)
+        self._body = body
+        self.content_type = content_type
+        self.charset = charset
+        self.url = URL
+
+    async def read(self) -> bytes:
+        return self._body
+
+
+class _Upstream:
+    def __init__(self, body: bytes):
+        self.body = body
+
+    def request(self, method, url, **kwargs):
+        return _Response(self.body)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    http_cache.clear()
+    yield
+    http_cache.clear()
+
+
+def test_responses_are_decoded_from_their_body_per_host():
+    """Both fetched & cached responses are decoded by the HTTP layer, recording their size & decode time."""
+    body = json.dumps(FIXTURES).encode()
+    decoded, seconds = UPSTREAM_JSON_BYTES.count(HOST), UPSTREAM_JSON_SECONDS.count(HOST)
+    size = UPSTREAM_JSON_BYTES.sum(HOST)
+
+    async def fetch():
+        async with HttpSession(_Upstream(body)).get(URL) as resp:
+            return await resp.json(content_type=None)
+
+    assert asyncio.run(fetch()) == FIXTURES
+    assert asyncio.run(fetch()) == FIXTURES
+    assert UPSTREAM_JSON_BYTES.count(HOST) == decoded + 2
+    assert UPSTREAM_JSON_SECONDS.count(HOST) == seconds + 2
+    assert UPSTREAM_JSON_BYTES.sum(HOST) == size + 2 * len(body)
+
+
+def test_decode_honors_charsets_parsers_and_empty_bodies():
+    assert decode('{"name": "Müller"}'.encode("latin-1"), HOST, encoding="ISO-8859-1") == {"name": "Müller"}
+    assert decode(b'{"goals": 2}', HOST, parse=lambda text: text) == '{"goals": 2}'
+    assert decode(b"  \n", HOST) is None
+
+
+def test_stdlib_fallback(monkeypatch):
+    monkeypatch.setattr(http_json, "loads", json.loads)
+    assert decode(json.dumps(FIXTURES).encode(), HOST) == FIXTURES
+
+
+def test_unexpected_content_types_are_refused():
+    response = JsonResponse(_Response(b"<html>rate limited</html>", content_type="text/html"), HOST)
+    with pytest.raises(ContentTypeError):
+        asyncio.run(response.json())
+    assert asyncio.run(JsonResponse(_Response(b"[]", content_type="text/plain"), HOST).json(content_type=None)) == []
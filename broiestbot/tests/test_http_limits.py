@@ -0,0 +1,115 @@
+"""Tests for per-API connection pools & concurrency budgets of upstream requests."""
+
+import asyncio
+from typing import List
+
+import pytest
+from aiohttp import ClientConnectionError
+from http_client import UPSTREAM_REQUESTS, HttpSession
+from http_limits import UPSTREAM_QUEUE_SECONDS, HostLimits
+from http_resilience import CircuitBreakers, RetryPolicy
+
+from broiestbot.dispatch import CommandContext, Handler, run_handler
+from tests.aiohttp_mocks import FakeResponse
+
+FOOTY_HOST = "api-football-v1.p.rapidapi.com"
+FOOTY_ODDS_HOST = "odds.p.rapidapi.com"
+TWITCH_HOST = "api.twitch.tv"
+
+
+class _SlowResponse(FakeResponse):
+    """Response taking a moment to arrive, recording how many requests were in flight at once."""
+
+    def __init__(self, upstream: "_Upstream"):
+        super().__init__(json_data={"response": []})
+        self._upstream = upstream
+
+    async def __aenter__(self):
+        self._upstream.in_flight += 1
+        self._upstream.peak = max(self._upstream.peak, self._upstream.in_flight)
+        await asyncio.sleep(0.02)
+        return self
+
+    async def __aexit__(self, *_exc) -> bool:
+        self._upstream.in_flight -= 1
+        return False
+
+
+class _Upstream:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.in_flight = 0
+        self.peak = 0
+        self.hosts: List[str] = []
+
+    def request(self, method, url, **kwargs):
+        self.hosts.append(url.split("/")[2])
+        if self.fail:
+            raise ClientConnectionError("Connection reset by peer")
+        return _SlowResponse(self)
+
+
+@pytest.fixture
+def limits():
+    return HostLimits(apis=[{"hosts": (FOOTY_HOST, FOOTY_ODDS_HOST), "connections": 2, "concurrency": 2}])
+
+
+def _fetch_all(session: HttpSession, hosts: List[str]):
+    async def fetch(host):
+        async with session.get(f"https://{host}/v3/fixtures", cache_ttl=0) as resp:
+            return await resp.json()
+
+    async def fan_out():
+        return await asyncio.gather(*(fetch(host) for host in hosts), return_exceptions=True)
+
+    return asyncio.run(fan_out())
+
+
+def test_hosts_of_an_api_share_its_concurrency_budget(limits):
+    upstream = _Upstream()
+    waits = UPSTREAM_QUEUE_SECONDS.count(FOOTY_HOST)
+    _fetch_all(HttpSession(upstream, limits=limits), [FOOTY_HOST, FOOTY_ODDS_HOST] * 3)
+    assert upstream.peak == 2
+    assert UPSTREAM_QUEUE_SECONDS.count(FOOTY_HOST) == waits + 3
+
+
+def test_busy_api_does_not_delay_other_hosts(limits):
+    """Hosts no API declares have a budget of their own, which a saturated API doesn't hold up."""
+    upstream = _Upstream()
+    waited = UPSTREAM_QUEUE_SECONDS.sum(TWITCH_HOST)
+    _fetch_all(HttpSession(upstream, limits=limits), [FOOTY_HOST] * 6 + [TWITCH_HOST])
+    assert upstream.peak == 3
+    assert UPSTREAM_QUEUE_SECONDS.sum(TWITCH_HOST) - waited < 0.01
+
+
+def test_requests_use_their_host_pool(limits):
+    upstream, footy_pool = _Upstream(), _Upstream()
+    _fetch_all(HttpSession(upstream, pools={FOOTY_HOST: footy_pool}, limits=limits), [FOOTY_HOST, TWITCH_HOST])
+    assert footy_pool.hosts == [FOOTY_HOST]
+    assert upstream.hosts == [TWITCH_HOST]
+
+
+def test_failed_requests_free_their_slot(limits):
+    session = HttpSession(
+        _Upstream(fail=True), limits=limits, retry=RetryPolicy(attempts=1), breakers=CircuitBreakers()
+    )
+    results = _fetch_all(session, [FOOTY_HOST] * 3)
+    assert all(isinstance(result, ClientConnectionError) for result in results)
+    assert _fetch_all(HttpSession(_Upstream(), limits=limits), [FOOTY_HOST]) == [{"response": []}]
+
+
+def test_requests_are_counted_per_command_type(limits):
+    """Requests sent while building a command's response are attributed to its type; others to "none"."""
+    session = HttpSession(_Upstream(), limits=limits)
+    url = f"https://{TWITCH_HOST}/helix/streams"
+
+    async def streams():
+        async with session.get(url, cache_ttl=0) as resp:
+            return await resp.json()
+
+    by_command = UPSTREAM_REQUESTS.value(TWITCH_HOST, "GET", "twitch")
+    outside = UPSTREAM_REQUESTS.value(TWITCH_HOST, "GET", "none")
+    asyncio.run(run_handler(Handler("twitch", streams), CommandContext()))
+    asyncio.run(streams())
+    assert UPSTREAM_REQUESTS.value(TWITCH_HOST, "GET", "twitch") == by_command + 1
+    assert UPSTREAM_REQUESTS.value(TWITCH_HOST, "GET", "none") == outside + 1
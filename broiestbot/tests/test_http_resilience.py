@@ -0,0 +1,136 @@
+"""Tests for retrying failed upstream requests & failing fast while an upstream is down."""
+
+import asyncio
+from email.utils import formatdate
+from time import time
+from typing import List, Union
+from unittest.mock import patch
+
+import pytest
+from aiohttp import ClientConnectionError
+from deadlines import Deadline
+from http_client import HttpSession
+from http_resilience import (
+    CLOSED,
+    OPEN,
+    UPSTREAM_CIRCUIT_STATE,
+    CircuitBreakers,
+    CircuitOpenError,
+    RetryPolicy,
+    retry_after,
+)
+from logger import sms_error_handler
+
+from broiestbot.dispatch import CommandContext, Handler, run_handler
+from config import COMMAND_DEADLINE_RESERVE
+from tests.aiohttp_mocks import FakeResponse
+
+HOST = "hyprace-api.p.rapidapi.com"
+URL = f"https://{HOST}/v2/grands-prix"
+
+
+class _Response(FakeResponse):
+    def __init__(self, status: int = 200, headers=None):
+        super().__init__(status=status, json_data={"items": []})
+        self.headers = headers or {}
+
+
+class _Upstream:
+    """Session replaying responses (or raising exceptions) in order, counting the requests made."""
+
+    def __init__(self, *replies: Union[_Response, BaseException]):
+        self.replies: List[Union[_Response, BaseException]] = list(replies)
+        self.requests = 0
+
+    def request(self, method, url, **kwargs):
+        self.requests += 1
+        reply = self.replies.pop(0)
+        if isinstance(reply, BaseException):
+            raise reply
+        return reply
+
+
+@pytest.fixture
+def breakers():
+    return CircuitBreakers(failures=3, cooldown=0.05)
+
+
+def _request(upstream: _Upstream, breakers: CircuitBreakers, method: str = "GET") -> int:
+    session = HttpSession(upstream, retry=RetryPolicy(backoff=0.001), breakers=breakers)
+
+    async def fetch():
+        async with session.request(method, URL, cache_ttl=0) as resp:
+            return resp.status
+
+    return asyncio.run(fetch())
+
+
+def test_failed_gets_are_retried(breakers):
+    upstream = _Upstream(ClientConnectionError("Connection reset"), _Response(503), _Response(200))
+    assert _request(upstream, breakers) == 200
+    assert upstream.requests == 3
+
+
+def test_posts_are_not_retried(breakers):
+    upstream = _Upstream(_Response(503), _Response(200))
+    assert _request(upstream, breakers, method="POST") == 503
+    assert upstream.requests == 1
+
+
+def test_retry_after_is_honored_unless_too_long(breakers):
+    assert _request(_Upstream(_Response(429, {"Retry-After": "0"}), _Response(200)), breakers) == 200
+    upstream = _Upstream(_Response(429, {"Retry-After": "120"}), _Response(200))
+    assert _request(upstream, breakers) == 429
+    assert upstream.requests == 1
+
+
+def test_retry_after_accepts_http_dates():
+    assert 25 < retry_after({"Retry-After": formatdate(time() + 30, usegmt=True)}) <= 30
+    assert retry_after({"Retry-After": "soon"}) is None
+    assert retry_after({}) is None
+
+
+def test_circuit_opens_after_repeated_failures_and_closes_once_probed(breakers):
+    """Requests to a failing host fail fast without being sent, until a probe finds it responding."""
+    upstream = _Upstream(*(_Response(503) for _ in range(3)), _Response(200))
+    assert _request(upstream, breakers) == 503
+    assert UPSTREAM_CIRCUIT_STATE.value(HOST) == OPEN
+    with pytest.raises(CircuitOpenError):
+        _request(upstream, breakers)
+    assert upstream.requests == 3
+    asyncio.run(asyncio.sleep(0.06))
+    assert _request(upstream, breakers) == 200
+    assert UPSTREAM_CIRCUIT_STATE.value(HOST) == CLOSED
+
+
+def test_timeouts_fitted_to_a_deadline_do_not_count_against_the_host(breakers):
+    """A request cut short by its command's deadline isn't retried, and leaves the circuit closed."""
+    upstream = _Upstream(*(asyncio.TimeoutError() for _ in range(3)))
+    session = HttpSession(upstream, retry=RetryPolicy(backoff=0.001), breakers=breakers)
+
+    async def fetch():
+        async with Deadline(COMMAND_DEADLINE_RESERVE + 1):
+            async with session.get(URL, cache_ttl=0) as resp:
+                return resp.status
+
+    for _ in range(3):
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(fetch())
+    assert upstream.requests == 3
+    assert breakers[HOST].state == CLOSED
+
+
+def test_open_circuits_reply_without_paging():
+    """Commands left with an open circuit reply with an apology, and logging it as an error sends no SMS."""
+
+    def grands_prix():
+        raise CircuitOpenError(HOST, 30)
+
+    with patch("logger.sms") as sms:
+        response = asyncio.run(run_handler(Handler("f1", grands_prix), CommandContext(user_name="chiggsy")))
+        try:
+            grands_prix()
+        except CircuitOpenError:
+            sms_error_handler({"time": "now", "message": "ClientError while fetching F1 races", "exception": None})
+    assert "down" in response
+    sms.messages.create.assert_not_called()
@@ -0,0 +1,42 @@
+"""Tests for the watchdog which catches callbacks blocking the event loop."""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+from loop_monitor import EVENT_LOOP_LAG, LoopWatchdog
+
+
+def _send_sms_synchronously():
+    """Stand-in for a blocking SDK call made on the event loop."""
+    time.sleep(0.3)
+
+
+def test_blocking_callbacks_are_logged_with_their_stack():
+    watchdog = LoopWatchdog(interval=0.02, threshold=0.1)
+
+    async def run():
+        watchdog.start()
+        await asyncio.sleep(0.05)
+        _send_sms_synchronously()
+        await asyncio.sleep(0.05)
+        await watchdog.stop()
+
+    with patch("loop_monitor.LOGGER") as logger:
+        asyncio.run(run())
+    logged = " ".join(call.args[0] for call in logger.warning.call_args_list)
+    assert "_send_sms_synchronously" in logged
+    assert EVENT_LOOP_LAG.value() < 0.1
+
+
+def test_idle_loop_is_not_reported():
+    watchdog = LoopWatchdog(interval=0.02, threshold=0.1)
+
+    async def run():
+        watchdog.start()
+        await asyncio.sleep(0.2)
+        await watchdog.stop()
+
+    with patch("loop_monitor.LOGGER") as logger:
+        asyncio.run(run())
+    logger.warning.assert_not_called()
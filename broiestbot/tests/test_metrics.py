@@ -0,0 +1,42 @@
+"""Tests for in-process metrics and their Prometheus rendering."""
+
+from metrics import REGISTRY, Counter, Gauge, Histogram, ratio, render
+
+
+def _unregister(*metrics):
+    for metric in metrics:
+        REGISTRY.remove(metric)
+
+
+def test_counters_render_with_labels():
+    counter = Counter("test_commands_total", "Commands handled.", ("cmd_type",))
+    counter.inc("epltable")
+    counter.inc("epltable", amount=2)
+    output = render()
+    _unregister(counter)
+    assert "# TYPE test_commands_total counter" in output
+    assert 'test_commands_total{cmd_type="epltable"} 3' in output
+
+
+def test_histograms_render_cumulative_buckets():
+    histogram = Histogram("test_command_seconds", "Command latency.", ("cmd_type",), buckets=(0.1, 1))
+    for seconds in (0.05, 0.5, 5):
+        histogram.observe(seconds, "livefixtures")
+    output = render()
+    _unregister(histogram)
+    assert 'test_command_seconds_bucket{cmd_type="livefixtures",le="0.1"} 1' in output
+    assert 'test_command_seconds_bucket{cmd_type="livefixtures",le="1.0"} 2' in output
+    assert 'test_command_seconds_bucket{cmd_type="livefixtures",le="+Inf"} 3' in output
+    assert 'test_command_seconds_count{cmd_type="livefixtures"} 3' in output
+    assert 'test_command_seconds_sum{cmd_type="livefixtures"} 5.55' in output
+
+
+def test_ratio_gauges_report_hit_ratio():
+    hits = Counter("test_hits_total", "Hits.", ("cmd_type",))
+    misses = Counter("test_misses_total", "Misses.", ("cmd_type",))
+    hit_ratio = Gauge("test_hit_ratio", "Hit ratio.", callback=ratio(hits, (hits, misses)))
+    assert hit_ratio.value() == 0
+    hits.inc("epltable", amount=3)
+    misses.inc("f1")
+    assert hit_ratio.value() == 0.75
+    _unregister(hits, misses, hit_ratio)
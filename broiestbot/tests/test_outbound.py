@@ -0,0 +1,92 @@
+"""Tests for pacing, merging & expiring replies queued to a room."""
+
+import asyncio
+from time import monotonic
+
+from broiestbot.outbound import OutboundQueues
+
+
+class FakeRoom:
+    """Chatango room which records the messages sent to it."""
+
+    def __init__(self, name: str = "broiestroom", delay: float = 0):
+        self.name = name
+        self.delay = delay
+        self.sent = []
+
+    async def send_message(self, message: str, use_html: bool = False):
+        await asyncio.sleep(self.delay)
+        self.sent.append((monotonic(), message, use_html))
+
+
+def test_replies_are_sent_in_order():
+    room = FakeRoom()
+
+    async def run():
+        queues = OutboundQueues(interval=0, merge_max_length=0)
+        for body in ("one", "two", "three"):
+            queues.send(room, body)
+        await queues.close(timeout=1)
+
+    asyncio.run(run())
+    assert [body for _, body, _ in room.sent] == ["one", "two", "three"]
+
+
+def test_sends_are_paced():
+    room = FakeRoom()
+
+    async def run():
+        queues = OutboundQueues(interval=0.05, merge_max_length=0)
+        for body in ("one", "two", "three"):
+            queues.send(room, body)
+        await queues.close(timeout=1)
+
+    asyncio.run(run())
+    times = [sent_at for sent_at, _, _ in room.sent]
+    assert all(later - earlier >= 0.045 for earlier, later in zip(times, times[1:]))
+
+
+def test_short_backlogged_replies_are_merged():
+    """Replies which pile up behind a slow send go out together."""
+    room = FakeRoom(delay=0.02)
+
+    async def run():
+        queues = OutboundQueues(interval=0, merge_max_length=100)
+        queues.send(room, "first")
+        await asyncio.sleep(0.005)
+        for body in ("gif 1", "gif 2", "gif 3"):
+            queues.send(room, body)
+        queues.send(room, "<b>preview</b>", use_html=True)
+        await queues.close(timeout=1)
+
+    asyncio.run(run())
+    assert [(body, use_html) for _, body, use_html in room.sent] == [
+        ("first", False),
+        ("gif 1\ngif 2\ngif 3", False),
+        ("<b>preview</b>", True),
+    ]
+
+
+def test_stale_replies_are_dropped():
+    room = FakeRoom(delay=0.05)
+
+    async def run():
+        queues = OutboundQueues(interval=0, merge_max_length=0)
+        queues.send(room, "first")
+        queues.send(room, "too late", max_age=0.01)
+        await queues.close(timeout=1)
+
+    asyncio.run(run())
+    assert [body for _, body, _ in room.sent] == ["first"]
+
+
+def test_full_queue_drops_new_replies():
+    room = FakeRoom()
+
+    async def run():
+        queues = OutboundQueues(maxsize=2, interval=0, merge_max_length=0)
+        accepted = [queues.send(room, str(i)) for i in range(3)]
+        await queues.close(timeout=1)
+        return accepted
+
+    assert asyncio.run(run()) == [True, True, False]
@@ -0,0 +1,61 @@
+"""Tests for persisting chat logs & user data in the background."""
+
+import asyncio
+
+from broiestbot.data import (
+    PERSISTENCE_DROPPED,
+    PERSISTENCE_QUEUE_DEPTH,
+    PersistenceQueue,
+)
+
+
+def test_submitted_jobs_run_in_background():
+    persisted = []
+
+    async def persist(value):
+        persisted.append(value)
+
+    async def run():
+        queue = PersistenceQueue(maxsize=10, workers=2)
+        assert queue.submit(persist, "chat")
+        assert persisted == []  # Nothing is awaited by the caller.
+        await queue.close()
+
+    asyncio.run(run())
+    assert persisted == ["chat"]
+
+
+def test_full_queue_drops_jobs():
+    async def persist():
+        await asyncio.sleep(0)
+
+    async def run():
+        queue = PersistenceQueue(maxsize=1, workers=1)
+        results = [queue.submit(persist) for _ in range(3)]
+        assert PERSISTENCE_QUEUE_DEPTH.value() == 1
+        await queue.close()
+        return results
+
+    dropped = PERSISTENCE_DROPPED.value("persist")
+    assert asyncio.run(run()) == [True, False, False]
+    assert PERSISTENCE_DROPPED.value("persist") == dropped + 2
+    assert PERSISTENCE_QUEUE_DEPTH.value() == 0
+
+
+def test_failing_job_does_not_stop_workers():
+    persisted = []
+
+    async def fail():
+        raise RuntimeError("simulated failure")
+
+    async def persist(value):
+        persisted.append(value)
+
+    async def run():
+        queue = PersistenceQueue(maxsize=10, workers=1)
+        queue.submit(fail)
+        queue.submit(persist, "after failure")
+        await queue.close()
+
+    asyncio.run(run())
+    assert persisted == ["after failure"]
@@ -0,0 +1,60 @@
+"""Tests for profiling the next invocations of a command on demand."""
+
+import asyncio
+import os
+
+from broiestbot.dispatch import CommandContext, CommandProfiler, Handler
+
+
+def _busy(content):
+    return sum(i * i for i in range(2000)) and content
+
+
+async def _async_busy(content):
+    await asyncio.sleep(0)
+    return _busy(content)
+
+
+def _run(profiler: CommandProfiler, handler: Handler, times: int) -> list:
+    async def invoke_all():
+        return [await profiler.invoke(handler, CommandContext(content="hi")) for _ in range(times)]
+
+    return asyncio.run(invoke_all())
+
+
+def test_unarmed_profiler_captures_nothing(tmp_path):
+    profiler = CommandProfiler(directory=str(tmp_path))
+    handler = Handler("busy", _busy, params=("content",))
+    assert _run(profiler, handler, 2) == ["hi", "hi"]
+    assert not profiler.captures
+    assert not profiler.reports
+    assert not os.listdir(tmp_path)
+
+
+def test_armed_command_is_profiled_then_saved(tmp_path):
+    """Once the armed number of invocations have run, the profile is saved & later invocations run as normal."""
+    profiler = CommandProfiler(directory=str(tmp_path))
+    handler = Handler("busy", _async_busy, params=("content",))
+    profiler.arm("busy", 2)
+    assert _run(profiler, handler, 3) == ["hi", "hi", "hi"]
+    report = profiler.reports["busy"]
+    assert report.invocations == 2
+    assert not profiler.captures
+    assert os.listdir(tmp_path) == [os.path.basename(report.path)]
+    assert any("_busy" in function for function in report.functions)
+
+
+def test_blocking_handlers_are_profiled_on_their_executor(tmp_path):
+    profiler = CommandProfiler(directory=str(tmp_path))
+    handler = Handler("busy", _busy, params=("content",), executor="gcs")
+    profiler.arm("busy", 1)
+    assert _run(profiler, handler, 1) == ["hi"]
+    assert any("_busy" in function for function in profiler.reports["busy"].functions)
+
+
+def test_other_commands_are_not_profiled(tmp_path):
+    profiler = CommandProfiler(directory=str(tmp_path))
+    profiler.arm("weather", 1)
+    _run(profiler, Handler("busy", _busy, params=("content",)), 1)
+    assert profiler.captures["weather"].remaining == 1
+    assert not profiler.reports
@@ -0,0 +1,39 @@
+"""Tests for reusing command responses until their TTL expires."""
+
+from unittest.mock import patch
+
+from broiestbot.dispatch import ResponseCache
+
+
+def test_fresh_responses_are_reused():
+    cache = ResponseCache(maxsize=10)
+    cache.set(("epltable",), "table", ttl=600)
+    assert cache.get(("epltable",)) == "table"
+
+
+def test_expired_responses_are_dropped():
+    cache = ResponseCache(maxsize=10)
+    with patch("broiestbot.dispatch.cache.monotonic", return_value=0):
+        cache.set(("livefixtures",), "scores", ttl=30)
+    with patch("broiestbot.dispatch.cache.monotonic", return_value=31):
+        assert cache.get(("livefixtures",)) is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_responses_are_evicted():
+    cache = ResponseCache(maxsize=2)
+    cache.set(("a",), "a", ttl=60)
+    cache.set(("b",), "b", ttl=60)
+    cache.get(("a",))
+    cache.set(("c",), "c", ttl=60)
+    assert cache.get(("a",)) == "a"
+    assert cache.get(("b",)) is None
+    assert cache.get(("c",)) == "c"
+
+
+def test_failures_are_not_cached():
+    """Upstream errors are reported as `:warning:` responses, which shouldn't stick around for a whole TTL."""
+    cache = ResponseCache(maxsize=10)
+    cache.set(("f1",), None, ttl=3600)
+    cache.set(("sumo",), "⚠️ sumo api is ded ⚠️", ttl=3600)
+    assert len(cache) == 0
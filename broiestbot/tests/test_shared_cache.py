@@ -0,0 +1,203 @@
+"""Tests for sharing cached upstream & command responses between bot processes through Redis."""
+
+import asyncio
+from time import monotonic
+from typing import Dict, Optional, Tuple
+
+import pytest
+from http_cache import http_cache
+from http_client import HttpSession
+from redis.exceptions import ConnectionError
+from shared_cache import SharedCache, decode, encode, shared_cache
+
+from broiestbot.dispatch import CommandContext, Handler, response_cache, run_handler
+from clients import async_r_bytes
+from clients.registry import substitute
+from tests.aiohttp_mocks import FakeResponse
+
+
+class _FakeAsyncRedis:
+    """In-memory stand-in for an async Redis client, honoring `nx` & `px` like the real `SET`."""
+
+    def __init__(self):
+        self.store: Dict[str, Tuple[bytes, Optional[float]]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value, expires_at = self.store.get(key, (None, None))
+        if expires_at is not None and expires_at <= monotonic():
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, nx: bool = False, px: Optional[int] = None) -> Optional[bool]:
+        if nx and await self.get(key) is not None:
+            return None
+        self.store[key] = (value, monotonic() + px / 1000 if px else None)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self.store.pop(key, None) is not None for key in keys)
+
+    async def exists(self, *keys: str) -> int:
+        return sum([await self.get(key) is not None for key in keys])
+
+
+class _DownRedis:
+    """Async Redis client whose server can't be reached."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __getattr__(self, _name):
+        async def command(*_args, **_kwargs):
+            self.calls += 1
+            raise ConnectionError("Connection refused")
+
+        return command
+
+
+class _Upstream:
+    def __init__(self):
+        self.requests = 0
+
+    def request(self, method, url, **kwargs):
+        self.requests += 1
+        response = FakeResponse(json_data={"response": [self.requests]})
+        response.headers = {"Cache-Control": "max-age=60"}
+        return response
+
+
+@pytest.fixture
+def redis():
+    return _FakeAsyncRedis()
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    http_cache.clear()
+    response_cache.clear()
+    yield
+    http_cache.clear()
+    response_cache.clear()
+
+
+def test_large_values_are_compressed():
+    value = b'{"response": []}' * 100
+    stored = encode(value, 60)
+    assert len(stored) < len(value)
+    assert decode(stored)[0] == value
+    assert 59 < decode(stored)[1] <= 60
+
+
+def test_values_are_shared_between_processes(redis):
+    async def share():
+        async with SharedCache(redis, enabled=True).claim("command", ("epltable",)) as claim:
+            assert claim.value is None
+            await claim.set(b"table", 60)
+        async with SharedCache(redis, enabled=True).claim("command", ("epltable",)) as claim:
+            return claim.value
+
+    assert asyncio.run(share()) == b"table"
+
+
+def test_concurrent_misses_build_the_value_once(redis):
+    """A process missing a value another process is already building waits for it instead."""
+    builds = []
+
+    async def build(cache: SharedCache) -> bytes:
+        async with cache.claim("command", ("livefixtures",)) as claim:
+            if claim.value is not None:
+                return claim.value
+            builds.append(cache)
+            await asyncio.sleep(0.1)
+            await claim.set(b"fixtures", 60)
+            return b"fixtures"
+
+    async def race():
+        return await asyncio.gather(build(SharedCache(redis, enabled=True)), build(SharedCache(redis, enabled=True)))
+
+    assert asyncio.run(race()) == [b"fixtures", b"fixtures"]
+    assert len(builds) == 1
+
+
+def test_waiters_stop_waiting_once_the_builder_stores_nothing(redis):
+    """A builder which fails (or builds a reply not worth caching) releases its lock; waiters then build it too."""
+    builds = []
+
+    async def build(cache: SharedCache, delay: float):
+        await asyncio.sleep(delay)
+        async with cache.claim("command", ("livefixtures",)) as claim:
+            if claim.value is None:
+                builds.append(cache)
+                await asyncio.sleep(0.05)
+
+    async def race():
+        started = monotonic()
+        await asyncio.gather(build(SharedCache(redis, enabled=True), 0), build(SharedCache(redis, enabled=True), 0.01))
+        return monotonic() - started
+
+    assert asyncio.run(race()) < 1
+    assert len(builds) == 2
+
+
+def test_default_client_wiring(redis, monkeypatch):
+    """The bot's cache reaches Redis through the registered `async_r_bytes` client, not the stand-in's own API."""
+    monkeypatch.setattr(shared_cache, "enabled", True)
+    substitute(async_r_bytes, redis)
+    try:
+
+        async def share():
+            async with shared_cache.claim("http", "GET https://api.klipy.com") as claim:
+                assert claim.value is None
+                await claim.set(b"gifs", 60)
+            async with shared_cache.claim("http", "GET https://api.klipy.com") as claim:
+                return claim.value
+
+        assert asyncio.run(share()) == b"gifs"
+        assert shared_cache.available
+    finally:
+        substitute(async_r_bytes, None)
+
+
+def test_unreachable_redis_is_skipped():
+    """Once Redis fails, lookups miss immediately rather than waiting on Redis for every request."""
+    down = _DownRedis()
+    cache = SharedCache(down, enabled=True, retry_after=30)
+
+    async def lookup():
+        async with cache.claim("http", "GET https://api.twitch.tv") as claim:
+            return claim.value
+
+    assert asyncio.run(lookup()) is None
+    assert not cache.available
+    assert asyncio.run(lookup()) is None
+    assert down.calls == 1
+
+
+def test_http_responses_are_shared_between_processes(redis, monkeypatch):
+    monkeypatch.setattr("http_client.shared_cache", SharedCache(redis, enabled=True))
+    upstream = _Upstream()
+
+    async def fetch():
+        async with HttpSession(upstream).get("https://api.twitch.tv/helix/streams", params={"user_login": "x"}) as resp:
+            return await resp.json(content_type=None)
+
+    assert asyncio.run(fetch()) == {"response": [1]}
+    # A freshly restarted process has nothing in memory, but finds the response in Redis.
+    http_cache.clear()
+    assert asyncio.run(fetch()) == {"response": [1]}
+    assert upstream.requests == 1
+
+
+def test_command_responses_are_shared_between_processes(redis, monkeypatch):
+    monkeypatch.setattr("broiestbot.dispatch.pipeline.shared_cache", SharedCache(redis, enabled=True))
+    calls = []
+
+    def standings():
+        calls.append(1)
+        return "<b>EPL</b> table"
+
+    handler = Handler("epltable", standings, ttl=600)
+    assert asyncio.run(run_handler(handler, CommandContext())) == "<b>EPL</b> table"
+    response_cache.clear()
+    assert asyncio.run(run_handler(handler, CommandContext())) == "<b>EPL</b> table"
+    assert len(calls) == 1
@@ -0,0 +1,109 @@
+"""Tests for sharing in-flight command responses between identical invocations."""
+
+import asyncio
+
+import pytest
+
+from broiestbot.dispatch import (
+    AUDIENCE_EVERYONE,
+    CommandContext,
+    Handler,
+    SingleFlight,
+    invocation_key,
+)
+from broiestbot.dispatch.singleflight import COMMANDS_COALESCED
+
+
+def test_concurrent_callers_share_one_call():
+    """Five people typing `!livefixtures` at once only fetch live fixtures once."""
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "fixtures"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("livefixtures", fetch, label="test") for _ in range(5)))
+
+    before = COMMANDS_COALESCED.value("test")
+    assert asyncio.run(run()) == ["fixtures"] * 5
+    assert len(calls) == 1
+    assert COMMANDS_COALESCED.value("test") - before == 4
+    assert len(flight) == 0
+
+
+def test_finished_calls_are_not_reused():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return len(calls)
+
+    async def run():
+        return await flight.do("key", fetch), await flight.do("key", fetch)
+
+    assert asyncio.run(run()) == (1, 2)
+
+
+def test_errors_reach_every_caller():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream died")
+
+    async def run():
+        return await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cancelled_caller_does_not_cancel_others():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        first = asyncio.ensure_future(flight.do("key", fetch))
+        second = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "done"
+
+
+def _echo(*args):
+    return args
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        (CommandContext(args="Arsenal", user_name="bro"), CommandContext(args=" arsenal ", user_name="bro")),
+        (CommandContext(args="man  utd", user_name="bro"), CommandContext(args="Man Utd", user_name="bro")),
+    ],
+)
+def test_key_normalizes_arguments(first, second):
+    handler = Handler("echo", _echo, params=("args", "user_name"))
+    assert asyncio.run(invocation_key(handler, first)) == asyncio.run(invocation_key(handler, second))
+
+
+def test_key_includes_user_for_personalized_handlers():
+    handler = Handler("weather", _echo, params=("args", "user_name"))
+    first = asyncio.run(invocation_key(handler, CommandContext(args="philly", user_name="bro")))
+    second = asyncio.run(invocation_key(handler, CommandContext(args="philly", user_name="other")))
+    assert first != second
+
+
+def test_key_ignores_user_for_shared_audiences():
+    handler = Handler("livefixtures", _echo, params=("user_name",), audience=AUDIENCE_EVERYONE)
+    first = asyncio.run(invocation_key(handler, CommandContext(user_name="bro")))
+    second = asyncio.run(invocation_key(handler, CommandContext(user_name="other")))
+    assert first == second
@@ -0,0 +1,94 @@
+"""Tests for spans following a command through its tasks, requests & executor threads."""
+
+import asyncio
+import json
+import threading
+
+import pytest
+from executors import run_blocking
+from http_client import HttpSession
+from tracing import NOOP_SPAN, Tracer, tracer
+
+from tests.aiohttp_mocks import FakeResponse
+
+
+@pytest.fixture
+def traces():
+    """Record spans from the bot's tracer in memory for the duration of a test."""
+    tracer.configure("memory", size=10)
+    yield tracer.exporter.traces
+    tracer.configure(None)
+
+
+class _RequestSession:
+    """Session whose `request` returns a canned response, as `aiohttp.ClientSession.request` does."""
+
+    def request(self, method, url, **kwargs):
+        return FakeResponse(json_data={"response": []})
+
+
+def test_disabled_tracer_records_nothing():
+    disabled = Tracer()
+    assert disabled.span("command") is NOOP_SPAN
+    assert disabled.start("db.query") is NOOP_SPAN
+    assert not disabled.enabled
+
+
+def test_spans_form_a_tree_across_tasks_and_threads(traces):
+    """A command's fan-out is exported as a single trace, once its root span finishes."""
+
+    async def league(name):
+        with tracer.span("footy.league", resource=name):
+            await run_blocking("gcs", lambda: None)
+
+    async def command():
+        with tracer.span("command", resource="footy_live_fixtures"):
+            await asyncio.gather(league("EPL"), league("LIGA"))
+
+    asyncio.run(command())
+    (trace,) = traces
+    spans = {span["span_id"]: span for span in trace}
+    root = trace[0]
+    assert root["name"] == "command" and root["parent_id"] is None
+    leagues = [span for span in trace if span["name"] == "footy.league"]
+    assert {span["parent_id"] for span in leagues} == {root["span_id"]}
+    hops = [span for span in trace if span["name"] == "executor.call"]
+    assert len(hops) == 2
+    assert all(spans[span["parent_id"]]["name"] == "footy.league" for span in hops)
+    assert all(span["tags"]["queue_seconds"] >= 0 for span in hops)
+
+
+def test_http_requests_record_host_and_status(traces):
+    async def fetch():
+        session = HttpSession(_RequestSession())
+        with tracer.span("command", resource="livefixtures"):
+            async with session.get("https://v3.football.api-sports.io/fixtures?live=all&key=secret") as resp:
+                return await resp.json()
+
+    assert asyncio.run(fetch()) == {"response": []}
+    request = traces[0][1]
+    assert request["name"] == "http.request"
+    assert request["resource"] == "GET v3.football.api-sports.io"
+    assert request["tags"]["status"] == 200
+    assert "secret" not in json.dumps(request)
+
+
+def test_exceptions_are_recorded_on_their_span(traces):
+    with pytest.raises(KeyError):
+        with tracer.span("command", resource="weather"):
+            raise KeyError("temp")
+    assert traces[0][0]["error"] == "KeyError: 'temp'"
+
+
+def test_json_traces_are_written_off_the_calling_thread(tmp_path):
+    """Finishing a trace only queues it; the writer thread appends it to the file."""
+    filepath = tmp_path / "traces" / "traces.jsonl"
+    json_tracer = Tracer()
+    json_tracer.configure("json", filepath=str(filepath))
+    for resource in ("weather", "epltable"):
+        with json_tracer.span("command", resource=resource):
+            pass
+    json_tracer.close()
+    lines = [json.loads(line) for line in filepath.read_text().splitlines()]
+    assert [trace["spans"][0]["resource"] for trace in lines] == ["weather", "epltable"]
+    assert not any(thread.name == "trace-writer" for thread in threading.enumerate())
@@ -0,0 +1,118 @@
+"""Tests for the in-memory copies of the `commands` & `phrases` tables."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from broiestbot.triggers import PHRASE_QUERIES_AVOIDED, CommandIndex, PhraseIndex
+
+
+class _FakeResult:
+    """Stand-in for a SQLAlchemy `Result` carrying canned rows."""
+
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalars(self):
+        return iter(self._rows)
+
+
+class _FakeSession:
+    """Async session which serves canned rows, or raises if given an exception."""
+
+    def __init__(self, rows):
+        self._rows = rows
+
+    async def execute(self, *_args, **_kwargs) -> _FakeResult:
+        if isinstance(self._rows, BaseException):
+            raise self._rows
+        return _FakeResult(self._rows)
+
+    async def __aenter__(self) -> "_FakeSession":
+        return self
+
+    async def __aexit__(self, *_exc) -> bool:
+        return False
+
+
+COMMANDS = [
+    SimpleNamespace(command=":@", type="basic", response=":@"),
+    SimpleNamespace(command="EPL", type="epltable", response=None),
+]
+
+
+def _load(index, rows) -> bool:
+    with patch("broiestbot.triggers.commands.async_session", return_value=_FakeSession(rows)):
+        return asyncio.run(index.load())
+
+
+def test_commands_are_served_from_memory_once_loaded():
+    index = CommandIndex()
+    assert not index.loaded
+    assert _load(index, COMMANDS)
+    assert index.get(":@").type == "basic"
+    assert len(index) == 2
+
+
+def test_command_lookup_is_case_insensitive():
+    """MySQL matches command names case-insensitively, so the in-memory copy must too."""
+    index = CommandIndex()
+    _load(index, COMMANDS)
+    assert index.get("epl").type == "epltable"
+    assert index.get("Epl").type == "epltable"
+
+
+def test_unknown_command_is_none():
+    index = CommandIndex()
+    _load(index, COMMANDS)
+    assert index.get("__nonexistent_pytest_cmd__") is None
+
+
+def test_failed_reload_keeps_previous_copy():
+    index = CommandIndex()
+    _load(index, COMMANDS)
+    assert not _load(index, SQLAlchemyError("simulated failure"))
+    assert index.get(":@") is not None
+
+
+PHRASES = [
+    SimpleNamespace(phrase="bro?", response="bro!"),
+    SimpleNamespace(phrase="Only On Aclee", response="™"),
+]
+
+
+def _load_phrases(index, rows) -> bool:
+    with patch("broiestbot.triggers.phrases.async_session", return_value=_FakeSession(rows)):
+        return asyncio.run(index.load())
+
+
+def test_phrase_exact_match():
+    index = PhraseIndex()
+    _load_phrases(index, PHRASES)
+    assert index.get("bro?").response == "bro!"
+
+
+def test_phrase_matches_case_folded_chat():
+    index = PhraseIndex()
+    _load_phrases(index, PHRASES)
+    assert index.get("BRO? ").response == "bro!"
+    assert index.get("only on aclee").response == "™"
+
+
+def test_phrase_case_folding_can_be_disabled():
+    index = PhraseIndex(fold_case=False)
+    _load_phrases(index, PHRASES)
+    assert index.get("BRO?") is None
+
+
+def test_every_phrase_lookup_counts_as_an_avoided_query():
+    index = PhraseIndex()
+    avoided = PHRASE_QUERIES_AVOIDED.value()
+    assert index.get("bro?") is None
+    assert PHRASE_QUERIES_AVOIDED.value() == avoided
+    _load_phrases(index, PHRASES)
+    index.get("bro?")
+    index.get("just chatting")
+    assert PHRASE_QUERIES_AVOIDED.value() == avoided + 2
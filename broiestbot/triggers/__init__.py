@@ -0,0 +1,11 @@
+"""In-memory copies of the tables which decide how the bot responds to chats."""
+
+from .commands import CommandIndex, command_index
+from .phrases import PHRASE_QUERIES_AVOIDED, PhraseIndex, normalize_phrase, phrase_index
+from .refresh import (
+    announce_trigger_edit,
+    invalidate_triggers,
+    reload_triggers,
+    start_trigger_refresh,
+    stop_trigger_refresh,
+)
@@ -0,0 +1,62 @@
+"""Serve `!` commands from memory rather than querying the database for every command."""
+
+from typing import Dict, Optional
+
+from logger import LOGGER
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import async_session
+from database.models import Command
+
+
+class CommandIndex:
+    """In-process copy of the `commands` table, keyed on case-folded command name."""
+
+    def __init__(self):
+        self._commands: Optional[Dict[str, Command]] = None
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the `commands` table has been loaded into memory at least once."""
+        return self._commands is not None
+
+    def __len__(self) -> int:
+        return len(self._commands or {})
+
+    def get(self, cmd: str) -> Optional[Command]:
+        """
+        Fetch a command by name; matching is case-insensitive, as MySQL's is.
+
+        :param str cmd: Name of command triggered by a user, without the `!` prefix.
+
+        :returns: Optional[Command]
+        """
+        if self._commands is None:
+            return None
+        return self._commands.get(cmd.lower())
+
+    async def load(self) -> bool:
+        """
+        Replace the in-memory copy of the `commands` table with a fresh one.
+
+        A failed load leaves the previous copy in place.
+
+        :returns: bool
+        """
+        try:
+            async with async_session() as db:
+                result = await db.execute(select(Command))
+                commands = {command.command.lower(): command for command in result.scalars()}
+        except SQLAlchemyError as e:
+            LOGGER.warning(f"SQLAlchemyError while loading commands into memory: {e}")
+            return False
+        except Exception as e:
+            LOGGER.warning(f"Unexpected error while loading commands into memory: {e}")
+            return False
+        self._commands = commands
+        LOGGER.info(f"Loaded {len(commands)} commands into memory")
+        return True
+
+
+command_index = CommandIndex()
@@ -0,0 +1,91 @@
+"""Match chats against trigger phrases in memory rather than querying the database per chat."""
+
+from typing import Dict, Optional
+
+from logger import LOGGER
+from metrics import Counter
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import async_session
+from database.models import Phrase
+
+PHRASE_QUERIES_AVOIDED = Counter(
+    "broiestbot_phrase_queries_avoided_total",
+    "Chats matched against trigger phrases in memory instead of querying the database.",
+)
+
+
+def normalize_phrase(chat_message: str) -> str:
+    """
+    Case-fold a chat and trim surrounding whitespace, as MySQL's default collation compares strings.
+
+    :param str chat_message: Chat or trigger phrase to normalize.
+
+    :returns: str
+    """
+    return chat_message.strip().casefold()
+
+
+class PhraseIndex:
+    """
+    In-process copy of the `phrases` table.
+
+    Chats are matched against an exact-match hash first, then optionally against case-folded
+    keys so that "Bro?" still triggers the `bro?` phrase as it did when matched by MySQL.
+    """
+
+    def __init__(self, fold_case: bool = True):
+        self.fold_case = fold_case
+        self._exact: Optional[Dict[str, Phrase]] = None
+        self._folded: Dict[str, Phrase] = {}
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the `phrases` table has been loaded into memory at least once."""
+        return self._exact is not None
+
+    def __len__(self) -> int:
+        return len(self._exact or {})
+
+    def get(self, chat_message: str) -> Optional[Phrase]:
+        """
+        Fetch the trigger phrase matching a chat, if any.
+
+        :param str chat_message: A non-command chat which may prompt a response.
+
+        :returns: Optional[Phrase]
+        """
+        if self._exact is None:
+            return None
+        PHRASE_QUERIES_AVOIDED.inc()
+        phrase = self._exact.get(chat_message)
+        if phrase is None and self.fold_case:
+            phrase = self._folded.get(normalize_phrase(chat_message))
+        return phrase
+
+    async def load(self) -> bool:
+        """
+        Replace the in-memory copy of the `phrases` table with a fresh one.
+
+        A failed load leaves the previous copy in place.
+
+        :returns: bool
+        """
+        try:
+            async with async_session() as db:
+                result = await db.execute(select(Phrase))
+                phrases = list(result.scalars())
+        except SQLAlchemyError as e:
+            LOGGER.warning(f"SQLAlchemyError while loading phrases into memory: {e}")
+            return False
+        except Exception as e:
+            LOGGER.warning(f"Unexpected error while loading phrases into memory: {e}")
+            return False
+        self._folded = {normalize_phrase(phrase.phrase): phrase for phrase in phrases}
+        self._exact = {phrase.phrase: phrase for phrase in phrases}
+        LOGGER.info(f"Loaded {len(phrases)} phrases into memory")
+        return True
+
+
+phrase_index = PhraseIndex()
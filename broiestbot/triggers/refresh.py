@@ -0,0 +1,99 @@
+"""Keep in-memory trigger tables fresh, both periodically and when an edit is announced."""
+
+import asyncio
+from typing import List, Optional
+
+from logger import LOGGER
+from redis.exceptions import RedisError
+
+from clients import async_r
+from config import TRIGGERS_INVALIDATION_CHANNEL, TRIGGERS_REFRESH_INTERVAL
+
+from .commands import command_index
+from .phrases import phrase_index
+
+_invalidated: Optional[asyncio.Event] = None
+_tasks: List[asyncio.Task] = []
+
+
+async def reload_triggers() -> None:
+    """
+    Reload every in-memory trigger table from the database.
+
+    :returns: None
+    """
+    await asyncio.gather(command_index.load(), phrase_index.load())
+
+
+def invalidate_triggers() -> None:
+    """
+    Mark in-memory trigger tables as stale so they are reloaded right away.
+
+    :returns: None
+    """
+    if _invalidated is not None:
+        _invalidated.set()
+
+
+async def announce_trigger_edit() -> None:
+    """
+    Invalidate trigger tables in this process and every other bot process sharing Redis.
+
+    :returns: None
+    """
+    invalidate_triggers()
+    try:
+        await async_r.publish(TRIGGERS_INVALIDATION_CHANNEL, "invalidate")
+    except RedisError as e:
+        LOGGER.warning(f"RedisError while announcing trigger edit; only this process will reload: {e}")
+
+
+async def start_trigger_refresh() -> None:
+    """
+    Load trigger tables into memory, then keep them fresh in the background.
+
+    :returns: None
+    """
+    global _invalidated
+    _invalidated = asyncio.Event()
+    await reload_triggers()
+    _tasks.append(asyncio.create_task(_refresh_forever(), name="triggers-refresh"))
+    _tasks.append(asyncio.create_task(_listen_for_invalidations(), name="triggers-invalidation"))
+
+
+async def stop_trigger_refresh() -> None:
+    """
+    Cancel background refreshes of trigger tables; called when the bot shuts down.
+
+    :returns: None
+    """
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+
+
+async def _refresh_forever() -> None:
+    """Reload trigger tables every `TRIGGERS_REFRESH_INTERVAL` seconds, or sooner if invalidated."""
+    while True:
+        try:
+            await asyncio.wait_for(_invalidated.wait(), timeout=TRIGGERS_REFRESH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _invalidated.clear()
+        await reload_triggers()
+
+
+async def _listen_for_invalidations() -> None:
+    """Invalidate trigger tables whenever any bot process announces an edit over Redis pub/sub."""
+    while True:
+        try:
+            async with async_r.pubsub() as pubsub:
+                await pubsub.subscribe(TRIGGERS_INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        LOGGER.info("Trigger tables invalidated via Redis; reloading")
+                        invalidate_triggers()
+        except RedisError as e:
+            LOGGER.warning(f"RedisError while listening for trigger edits; retrying in 60s: {e}")
+            await asyncio.sleep(60)
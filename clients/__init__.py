@@ -1,19 +1,9 @@
 """Clients & SDKs for interacting with third-party services."""
 
-import lyricsgenius
-import praw
-import wikipediaapi
-from imdb import Cinemagoer
-from redis import Redis
-from rq_scheduler import Scheduler
-from twilio.rest import Client
-import redgifs
-
 from config import (
     ALPHA_VANTAGE_API_KEY,
     ALPHA_VANTAGE_CHART_BASE_URL,
     ALPHA_VANTAGE_PRICE_BASE_URL,
-    ANTHROPIC_API_KEY,
     GOOGLE_BUCKET_NAME,
     GOOGLE_BUCKET_URL,
     IEX_API_BASE_URL,
@@ -27,68 +17,178 @@ from config import (
     REDIS_HOST,
     REDIS_PASSWORD,
     REDIS_PORT,
-    REDIS_USERNAME,
     TWILIO_ACCOUNT_SID,
     TWILIO_AUTH_TOKEN,
 )
 
-from .crypto import CryptoChartHandler
-from .gcs import GCS
-from .geo import GeoIP
-from .llm import LLMClient
-from .psn import PlaystationClient
-from .stock import StockChartHandler
+from .registry import ClientRegistry, resolve
+
+# Each SDK is imported inside its factory, so importing `clients` costs nothing until a client is used.
+registry = ClientRegistry()
+
+
+def _gcs():
+    from .gcs import GCS
+
+    return GCS(GOOGLE_BUCKET_NAME, GOOGLE_BUCKET_URL)
+
+
+def _stock_charts():
+    from .crypto import set_plotly_credentials
+    from .stock import StockChartHandler
+
+    set_plotly_credentials()
+    return StockChartHandler(token=IEX_API_TOKEN, endpoint=IEX_API_BASE_URL)
+
+
+def _crypto_charts():
+    from .crypto import CryptoChartHandler, set_plotly_credentials
+
+    set_plotly_credentials()
+    return CryptoChartHandler(
+        token=ALPHA_VANTAGE_API_KEY,
+        price_endpoint=ALPHA_VANTAGE_PRICE_BASE_URL,
+        chart_endpoint=ALPHA_VANTAGE_CHART_BASE_URL,
+    )
+
+
+def _wiki():
+    import wikipediaapi
+
+    return wikipediaapi.Wikipedia(
+        "BroiestBot/1.0 (https://github.com/toddbirchard/broiestbot; broiestbot@eample.com)",
+        language="en",
+    )
+
+
+def _sms():
+    from twilio.rest import Client
+
+    return Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+
+
+def _imdb():
+    from imdb import Cinemagoer
+
+    return Cinemagoer()
+
+
+def _reddit():
+    import praw
+
+    return praw.Reddit(
+        client_id=REDDIT_CLIENT_ID,
+        client_secret=REDDIT_CLIENT_SECRET,
+        username=REDDIT_USERNAME,
+        password=REDDIT_PASSWORD,
+        user_agent="bot",
+    )
+
+
+def _geo():
+    from .geo import GeoIP
+
+    return GeoIP(IP_DATA_KEY)
+
+
+def _genius():
+    import lyricsgenius
+
+    client = lyricsgenius.Genius()
+    client.remove_section_headers = True
+    return client
+
+
+def _redis():
+    from redis import Redis
+
+    return Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True, password=REDIS_PASSWORD)
+
+
+def _redis_scheduler():
+    from rq_scheduler import Scheduler
+
+    return Scheduler(connection=resolve(r))
+
+
+def _async_redis():
+    from redis.asyncio import Redis as AsyncRedis
+
+    return AsyncRedis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True, password=REDIS_PASSWORD)
+
+
+def _async_redis_bytes():
+    from redis.asyncio import Redis as AsyncRedis
+
+    # Cached payloads are compressed, so they're returned as bytes rather than decoded.
+    return AsyncRedis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=False, password=REDIS_PASSWORD)
+
+
+def _psn():
+    from .psn import PlaystationClient
+
+    return PlaystationClient(PLAYSTATION_SSO_TOKEN)
+
+
+def _claude():
+    from .llm import LLMClient
+
+    return LLMClient()
+
+
+def _redgifs():
+    import redgifs
+
+    return redgifs.API()
+
 
 # Google Cloud Storage
-gcs = GCS(GOOGLE_BUCKET_NAME, GOOGLE_BUCKET_URL)
+gcs = registry.register("gcs", _gcs)
 
 # IEX Charts
-sch = StockChartHandler(token=IEX_API_TOKEN, endpoint=IEX_API_BASE_URL)
+sch = registry.register("sch", _stock_charts)
 
 # Crypto Charts
-cch = CryptoChartHandler(
-    token=ALPHA_VANTAGE_API_KEY,
-    price_endpoint=ALPHA_VANTAGE_PRICE_BASE_URL,
-    chart_endpoint=ALPHA_VANTAGE_CHART_BASE_URL,
-)
+cch = registry.register("cch", _crypto_charts)
 
 # Wikipedia API Python SDK
-wiki = wikipediaapi.Wikipedia(
-    "BroiestBot/1.0 (https://github.com/toddbirchard/broiestbot; broiestbot@eample.com)",
-    language="en",
-)
+wiki = registry.register("wiki", _wiki)
 
 # Twilio SMS Client
-sms = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+sms = registry.register("sms", _sms)
 
 # IMDB Client
-ia = Cinemagoer()
+ia = registry.register("ia", _imdb)
 
 # Reddit API Python SDK
-reddit = praw.Reddit(
-    client_id=REDDIT_CLIENT_ID,
-    client_secret=REDDIT_CLIENT_SECRET,
-    username=REDDIT_USERNAME,
-    password=REDDIT_PASSWORD,
-    user_agent="bot",
-)
+reddit = registry.register("reddit", _reddit)
 
 # IP Data Client
-geo = GeoIP(IP_DATA_KEY)
+geo = registry.register("geo", _geo)
 
 # Rap Genius
-genius = lyricsgenius.Genius()
-genius.remove_section_headers = True
+genius = registry.register("genius", _genius)
 
 # Redis
-r = Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True, password=REDIS_PASSWORD)
-redis_scheduler = Scheduler(connection=r)
+r = registry.register("r", _redis, close="close")
+redis_scheduler = registry.register("redis_scheduler", _redis_scheduler)
+async_r = registry.register("async_r", _async_redis, close="aclose")
+async_r_bytes = registry.register("async_r_bytes", _async_redis_bytes, close="aclose")
 
 # Playstation
-psn = PlaystationClient(PLAYSTATION_SSO_TOKEN)
+psn = registry.register("psn", _psn)
 
 # Anthropic LLM Client
-claude = LLMClient()
+claude = registry.register("claude", _claude, close="close")
 
 # Redgifs Client
-redgifs_client = redgifs.API()
+redgifs_client = registry.register("redgifs_client", _redgifs)
+
+
+async def close_clients() -> None:
+    """
+    Close the connections of every client which was used; called when the bot shuts down.
+
+    :returns: None
+    """
+    await registry.close()
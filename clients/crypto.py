@@ -1,6 +1,7 @@
 """Create cloud-hosted Candlestick charts of company stock data."""
 
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 
 import chart_studio
@@ -13,8 +14,11 @@ from http_client import get_http_session, request_timeout
 
 from config import PLOTLY_API_KEY, PLOTLY_USERNAME
 
-# Plotly
-chart_studio.tools.set_credentials_file(username=PLOTLY_USERNAME, api_key=PLOTLY_API_KEY)
+
+@lru_cache(maxsize=None)
+def set_plotly_credentials() -> None:
+    """Save Plotly credentials for uploading charts; called once, when a chart client is first built."""
+    chart_studio.tools.set_credentials_file(username=PLOTLY_USERNAME, api_key=PLOTLY_API_KEY)
 
 
 class CryptoChartHandler:
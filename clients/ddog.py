@@ -1,22 +1,45 @@
 """Datadog APM trace"""
 
 from functools import wraps
-from typing import Callable
-
-from ddtrace import config, patch_all
+from typing import Any, Callable, Optional
 
 from config import ENVIRONMENT
 
+try:
+    from ddtrace import config, patch_all, tracer
+except ImportError:
+    # `ddtrace` is optional; without it spans are exported by `tracing` itself.
+    config = patch_all = tracer = None
+
+
+def configure_ddtrace() -> None:
+    """Identify the bot's service to Datadog APM."""
+    config.env = ENVIRONMENT  # the environment the application is in
+    config.service = "broiestbot"  # name of your application
+    config.version = "0.1.0"  # version of your application
+
 
 def ddog_apm_trace(func: Callable):
     """Configure Datadog APM trace."""
 
     @wraps(func)
     def wrap(*args, **kwargs):
-        config.env = ENVIRONMENT  # the environment the application is in
-        config.service = "broiestbot"  # name of your application
-        config.version = "0.1.0"  # version of your application
+        configure_ddtrace()
         patch_all()
         return func(*args, **kwargs)
 
     return wrap
+
+
+def datadog_tracer() -> Optional[Any]:
+    """
+    Datadog's tracer, configured for the bot; `None` when `ddtrace` isn't installed.
+
+    Libraries aren't patched, as the bot's own spans already time its requests & queries.
+
+    :returns: Optional[ddtrace.Tracer]
+    """
+    if tracer is None:
+        return None
+    configure_ddtrace()
+    return tracer
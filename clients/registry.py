@@ -0,0 +1,150 @@
+"""Third-party clients built on first use rather than at import, & closed when the bot shuts down."""
+
+import inspect
+import threading
+from time import perf_counter
+from typing import Any, Callable, Dict, Optional
+
+from metrics import Histogram
+
+CLIENT_BUILD_SECONDS = Histogram(
+    "broiestbot_client_build_seconds",
+    "Time spent importing & constructing a third-party client on first use.",
+    ("client",),
+)
+
+
+class LazyClient:
+    """
+    Stand-in for a third-party client, which imports & constructs it the first time it's used.
+
+    Attribute access is forwarded to the real client, so modules keep importing clients by
+    name (ie: `from clients import genius`) without paying for the SDK until a command needs it.
+    Clients are built at most once, even when first used by several executor threads at once.
+
+    The stand-in's own members are all private, so none of them hide the client's (ie: Redis'
+    `get` & `close`); use `resolve`, `substitute` & `is_built` to manage it instead. Private &
+    dunder names are never forwarded, so probing the stand-in (ie: `mock.patch`) doesn't build it.
+
+    :param str name: Name of the client, as exported by `clients`.
+    :param Callable factory: Function which imports the SDK & returns the client.
+    :param Optional[str] close: Name of the client's method which releases its connections, if any.
+    """
+
+    __slots__ = ("_name", "_factory", "_close_method", "_instance", "_lock")
+
+    def __init__(self, name: str, factory: Callable[[], Any], close: Optional[str] = None):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_close_method", close)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _get(self) -> Any:
+        """Return the client, building it first if this is its first use."""
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    with CLIENT_BUILD_SECONDS.time(self._name):
+                        instance = self._factory()
+                    object.__setattr__(self, "_instance", instance)
+        return instance
+
+    def _use(self, instance: Optional[Any]) -> None:
+        """Serve `instance` in place of building the client; `None` builds the client on next use."""
+        object.__setattr__(self, "_instance", instance)
+
+    async def _close(self) -> None:
+        """Release the client's connections if it was ever built; unused clients are left alone."""
+        if self._instance is None or self._close_method is None:
+            return
+        result = getattr(self._instance, self._close_method)()
+        if inspect.isawaitable(result):
+            await result
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self._get(), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self._get(), attr, value)
+
+    def __repr__(self) -> str:
+        state = "built" if self._instance is not None else "not built"
+        return f"<LazyClient {self._name} ({state})>"
+
+
+def resolve(client: Any) -> Any:
+    """
+    Return the real client behind a `LazyClient`, building it if needed; any other object is returned as is.
+
+    :param Any client: Client, or a `LazyClient` standing in for one.
+
+    :returns: Any
+    """
+    return client._get() if isinstance(client, LazyClient) else client
+
+
+def substitute(client: LazyClient, instance: Optional[Any]) -> None:
+    """
+    Serve `instance` in place of building a client, ie: a stand-in for tests & benchmarks.
+
+    :param LazyClient client: Client to stand in for.
+    :param Optional[Any] instance: Object to forward attribute access to; `None` builds the client on next use.
+
+    :returns: None
+    """
+    client._use(instance)
+
+
+def is_built(client: LazyClient) -> bool:
+    """
+    Whether a client has been constructed (or substituted).
+
+    :param LazyClient client: Client to check.
+
+    :returns: bool
+    """
+    return client._instance is not None
+
+
+class ClientRegistry:
+    """Every lazily-built client, so the ones which were actually used can be closed together."""
+
+    def __init__(self):
+        self.clients: Dict[str, LazyClient] = {}
+
+    def register(self, name: str, factory: Callable[[], Any], close: Optional[str] = None) -> LazyClient:
+        """
+        Declare a client without building it.
+
+        :param str name: Name of the client, as exported by `clients`.
+        :param Callable factory: Function which imports the SDK & returns the client.
+        :param Optional[str] close: Name of the client's method which releases its connections, if any.
+
+        :returns: LazyClient
+        """
+        client = self.clients[name] = LazyClient(name, factory, close=close)
+        return client
+
+    def built(self) -> Dict[str, LazyClient]:
+        """Clients which have been constructed so far."""
+        return {name: client for name, client in self.clients.items() if is_built(client)}
+
+    async def close(self) -> None:
+        """
+        Close every client which was built; called when the bot shuts down.
+
+        :returns: None
+        """
+        for name, client in self.built().items():
+            try:
+                await client._close()
+            except Exception as e:
+                # Imported lazily: `logger` imports `clients`, so a module-level import would cycle.
+                from logger import LOGGER
+
+                LOGGER.warning(f"Failed to close client `{name}`: {e}")
@@ -16,6 +16,25 @@ ENVIRONMENT = getenv("ENVIRONMENT")
 TIMEZONE_US_EASTERN = pytz.timezone("America/New_York")
 HTTP_REQUEST_TIMEOUT = 40
 
+# Connections pooled across every upstream host, & to each host without its own `*_HTTP_LIMITS`.
+HTTP_MAX_CONNECTIONS = 100
+HTTP_CONNECTIONS_PER_HOST = 10
+
+# Requests allowed in flight at once to each host without its own `*_HTTP_LIMITS`, which APIs declare
+# next to their endpoints: the hosts serving the API, connections pooled to each, & requests in flight at once.
+HTTP_CONCURRENCY_PER_HOST = 10
+
+# Event Loop Watchdog
+# -------------------------------------------------
+# Seconds between heartbeats measuring how late the event loop runs scheduled callbacks.
+EVENT_LOOP_WATCHDOG_INTERVAL = 0.1
+
+# Lag (in seconds) at which the callback blocking the event loop is captured & logged.
+EVENT_LOOP_LAG_THRESHOLD = 0.25
+
+# Enable asyncio debug mode (slow callback warnings) outside of production.
+ASYNCIO_DEBUG = getenv("ASYNCIO_DEBUG", "").lower() in ("1", "true")
+
 
 # Chatango
 # -------------------------------------------------
@@ -112,11 +131,145 @@ REDIS_PASSWORD = getenv("REDIS_PASSWORD")
 REDIS_PORT = getenv("REDIS_PORT")
 REDIS_DB = getenv("REDIS_DB")
 
+# Triggers
+# -------------------------------------------------
+# Seconds between reloads of the in-memory copies of the `commands` & `phrases` tables.
+TRIGGERS_REFRESH_INTERVAL = 300
+
+# Redis pub/sub channel on which edits to the trigger tables are announced to every bot process.
+TRIGGERS_INVALIDATION_CHANNEL = "broiestbot:triggers:invalidate"
+
+# Response Cache
+# -------------------------------------------------
+# Command responses kept in memory before the least recently used are evicted.
+RESPONSE_CACHE_MAX_ENTRIES = 500
+
+# Seconds a command's response may be reused, by how often its underlying data changes.
+RESPONSE_CACHE_TTL_LIVE = 30
+RESPONSE_CACHE_TTL_QUOTES = 120
+RESPONSE_CACHE_TTL_TABLES = 600
+RESPONSE_CACHE_TTL_SCHEDULES = 3600
+RESPONSE_CACHE_TTL_REFERENCE = 86400
+
+# HTTP Cache
+# -------------------------------------------------
+# Upstream GET responses kept in memory before the least recently used are evicted, & the largest body kept.
+HTTP_CACHE_MAX_ENTRIES = 512
+HTTP_CACHE_MAX_BODY_BYTES = 1024 * 1024
+
+# Seconds responses without `Cache-Control` or `Expires` may be reused, for hosts which opt in; most of our
+# APIs send neither. Responses from other hosts follow HTTP: without either, they're only reused once
+# revalidated with their `ETag` or `Last-Modified`, so random gifs & images stay random.
+HTTP_CACHE_HOST_TTLS = {
+    "api-football-v1.p.rapidapi.com": 5,
+    "odds.p.rapidapi.com": 5,
+    "pinnacle-odds.p.rapidapi.com": 5,
+    "sportspage-feeds.p.rapidapi.com": 5,
+    "api-american-football.p.rapidapi.com": 5,
+    "api-basketball.p.rapidapi.com": 5,
+    "api-baseball.p.rapidapi.com": 5,
+    "hyprace-api.p.rapidapi.com": 5,
+    "sumo-api.com": 5,
+}
+
+# Request headers which change what an upstream returns, so requests differing in them are cached apart.
+HTTP_CACHE_KEY_HEADERS = (
+    "accept",
+    "accept-language",
+    "authorization",
+    "client-id",
+    "x-apisports-key",
+    "x-rapidapi-host",
+    "x-rapidapi-key",
+)
+
+# HTTP Retries
+# -------------------------------------------------
+# Attempts an idempotent request gets in total, & the backoff before each retry: doubling, fully jittered & capped.
+HTTP_RETRY_ATTEMPTS = 3
+HTTP_RETRY_BACKOFF = 0.25
+HTTP_RETRY_MAX_BACKOFF = 4
+
+# Upstream statuses worth retrying; a `Retry-After` longer than the backoff cap returns the response as is.
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Consecutive failures after which requests to a host fail fast, & seconds until a single request probes it again.
+HTTP_BREAKER_FAILURES = 5
+HTTP_BREAKER_COOLDOWN = 30
+
+# Shared Cache
+# -------------------------------------------------
+# Also cache upstream responses & command responses in Redis, shared by every bot process & surviving restarts.
+SHARED_CACHE_ENABLED = getenv("SHARED_CACHE_ENABLED", "").lower() in ("1", "true")
+SHARED_CACHE_PREFIX = "broiestbot:cache"
+
+# Seconds a Redis call may take before it's abandoned, & Redis is skipped for after it fails.
+SHARED_CACHE_TIMEOUT = 0.25
+SHARED_CACHE_RETRY_AFTER = 30
+
+# Seconds the process building a missing value holds its lock, while other processes wait for the value.
+SHARED_CACHE_LOCK_TTL = 10
+
+# Payloads larger than this many bytes are compressed before they're stored.
+SHARED_CACHE_COMPRESS_BYTES = 512
+
 # Action Log
 # -------------------------------------------------
 PERSIST_USER_DATA = getenv("PERSIST_USER_DATA")
 PERSIST_CHAT_DATA = getenv("PERSIST_CHAT_DATA")
 
+# Chat logs & user data awaiting persistence in the background, and the workers persisting them.
+PERSISTENCE_QUEUE_SIZE = 1000
+PERSISTENCE_WORKERS = 2
+
+# Command Deadlines
+# -------------------------------------------------
+# Seconds a command may take to respond, by its handler's expected latency.
+COMMAND_DEADLINE_FAST = 12
+COMMAND_DEADLINE_SLOW = 30
+
+# Seconds of a command's deadline held back from its HTTP requests, to assemble a partial reply.
+COMMAND_DEADLINE_RESERVE = 1.5
+
+# Command Modules
+# -------------------------------------------------
+# Command modules are imported when their command first fires; set to import them all in the background after startup.
+COMMAND_PRELOAD = getenv("COMMAND_PRELOAD", "").lower() in ("1", "true")
+
+# Command Profiling
+# -------------------------------------------------
+# Directory to which profiles captured by the `!profile` admin command are saved, as `pstats` files.
+PROFILE_DIR = getenv("PROFILE_DIR", f"{BASE_DIR}/logs/profiles")
+
+# Most invocations of a command a single `!profile` may capture, and the slowest functions reported back.
+PROFILE_MAX_INVOCATIONS = 25
+PROFILE_TOP_FUNCTIONS = 8
+
+# Tracing
+# -------------------------------------------------
+# Where spans are exported: `datadog` (requires `ddtrace`), `json`, `memory`, or empty to disable tracing.
+TRACE_EXPORTER = getenv("TRACE_EXPORTER", "").lower()
+
+# File to which the `json` exporter appends one trace per line.
+TRACE_FILE = getenv("TRACE_FILE", f"{BASE_DIR}/logs/traces.jsonl")
+
+# Most recent traces kept by the `memory` exporter, & served at `/traces`.
+TRACE_MEMORY_SIZE = 200
+
+# Outbound Messages
+# -------------------------------------------------
+# Minimum seconds between messages the bot sends to the same room.
+OUTBOUND_SEND_INTERVAL = 0.6
+
+# Replies waiting to be sent to a single room before new replies are dropped.
+OUTBOUND_QUEUE_SIZE = 50
+
+# Replies which haven't been sent within this many seconds are stale & dropped.
+OUTBOUND_MAX_AGE = 20
+
+# Short queued replies are merged into a single message, up to this many characters.
+OUTBOUND_MERGE_MAX_LENGTH = 800
+
 # Google Cloud
 # -------------------------------------------------
 GOOGLE_APPLICATION_CREDENTIALS = "gcloud.json"
@@ -135,6 +288,7 @@ URBAN_DICTIONARY_ENDPOINT = "http://api.urbandictionary.com/v0/define"
 # -------------------------------------------------
 GIPHY_API_KEY = getenv("GIPHY_API_KEY")
 KLIPY_API_KEY = getenv("KLIPY_API_KEY")
+KLIPY_HTTP_LIMITS = {"hosts": ("api.klipy.com",), "connections": 4, "concurrency": 4}
 REDGIFS_ACCESS_KEY = getenv("REDGIFS_ACCESS_KEY")
 REDGIFS_TOKEN_ENDPOINT = "https://weblogin.redgifs.com/oauth/webtoken"
 REDGIFS_IMAGE_SEARCH_ENDPOINT = "https://api.redgifs.com/v2/gifs/search"
@@ -252,6 +406,7 @@ TWITCH_CLIENT_ID = getenv("TWITCH_CLIENT_ID")
 TWITCH_CLIENT_SECRET = getenv("TWITCH_CLIENT_SECRET")
 TWITCH_TOKEN_ENDPOINT = "https://id.twitch.tv/oauth2/token"
 TWITCH_STREAMS_ENDPOINT = "https://api.twitch.tv/helix/streams"
+TWITCH_HTTP_LIMITS = {"hosts": ("id.twitch.tv", "api.twitch.tv"), "connections": 4, "concurrency": 4}
 
 # Twitch usernames and IDs to follow
 TWITCH_BRO_USERNAME = getenv("TWITCH_BRO_USERNAME")
@@ -296,17 +451,20 @@ NFL_HTTP_HEADERS = {
     "x-rapidapi-key": RAPID_API_KEY,
     "x-rapidapi-host": "sportspage-feeds.p.rapidapi.com",
 }
+NFL_HTTP_LIMITS = {"hosts": ("sportspage-feeds.p.rapidapi.com",), "connections": 4, "concurrency": 4}
 NFL_LIVE_GAMES_URL = "https://api-american-football.p.rapidapi.com/games"
 NFL_LIVE_HTTP_HEADERS = {
     "content-type": "application/json",
     "x-rapidapi-key": RAPID_API_KEY,
     "x-rapidapi-host": "api-american-football.p.rapidapi.com",
 }
+NFL_LIVE_HTTP_LIMITS = {"hosts": ("api-american-football.p.rapidapi.com",), "connections": 4, "concurrency": 4}
 
 
 # Sports Odds
 # -------------------------------------------------
 ODDS_API_ENDPOINT = "https://pinnacle-odds.p.rapidapi.com/kit/v1/markets"
+ODDS_HTTP_LIMITS = {"hosts": ("pinnacle-odds.p.rapidapi.com",), "connections": 4, "concurrency": 4}
 
 # SportsGameOdds
 SPORTSGAMEODDS_API_KEY = getenv("SPORTSGAMEODDS_API_KEY")
@@ -349,6 +507,8 @@ FOOTY_HTTP_HEADERS = {
     "x-rapidapi-key": RAPID_API_KEY,
     "x-rapidapi-host": "api-football-v1.p.rapidapi.com",
 }
+# Live & today's fixtures fan out a request per league; the budget caps them all below the plan's rate limit.
+FOOTY_HTTP_LIMITS = {"hosts": ("api-football-v1.p.rapidapi.com",), "connections": 8, "concurrency": 6}
 
 # Footy League IDs
 EPL_LEAGUE_ID = 39
@@ -817,6 +977,7 @@ F1_HTTP_HEADERS = {
     "x-rapidapi-key": RAPID_API_KEY,
     "x-rapidapi-host": "hyprace-api.p.rapidapi.com",
 }
+F1_HTTP_LIMITS = {"hosts": ("hyprace-api.p.rapidapi.com",), "connections": 4, "concurrency": 4}
 # Hyprace pages every collection 10 items at a time (`pageSize` is ignored), keyed on `pageNumber`.
 F1_MAX_PAGES = 20
 # Number of drivers to list in the championship standings.
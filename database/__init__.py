@@ -3,10 +3,11 @@
 import re
 import ssl
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
+from tracing import tracer
 
 from config import DATABASE_ARGS, SQLALCHEMY_DATABASE_URI
 
@@ -38,6 +39,37 @@ engine = create_engine(
 Session = sessionmaker(bind=engine, autoflush=True, autobegin=True)
 
 
+def _trace_queries(sync_engine) -> None:
+    """Time each query as a span of whatever command or message issued it."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def start_query_span(conn, cursor, statement, parameters, context, executemany):
+        if tracer.enabled:
+            context.trace_span = tracer.start(
+                "db.query", resource=statement.split(None, 1)[0].upper(), statement=statement
+            )
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def finish_query_span(conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "trace_span", None)
+        if span is not None:
+            if cursor.rowcount >= 0:
+                span.set_tag("rows", cursor.rowcount)
+            span.finish()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def fail_query_span(exception_context):
+        span = getattr(exception_context.execution_context, "trace_span", None)
+        if span is not None:
+            error = exception_context.original_exception
+            span.set_exc_info(type(error), error, error.__traceback__)
+            span.finish()
+
+
+_trace_queries(async_engine.sync_engine)
+_trace_queries(engine)
+
+
 async def init_db() -> None:
     """Create all tables defined in models if they don't yet exist."""
     from database.models import Base  # noqa: avoid circular import at module load time
@@ -0,0 +1,88 @@
+"""Deadline budgets for bot commands, shared with the HTTP requests & SDK calls they make."""
+
+import asyncio
+from contextvars import ContextVar
+from time import monotonic
+from typing import Optional
+
+from config import COMMAND_DEADLINE_RESERVE
+
+# Monotonic time by which the current command must respond; `None` outside a command.
+_deadline: ContextVar[Optional[float]] = ContextVar("command_deadline", default=None)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """
+    Raised instead of starting work the current command no longer has time for.
+
+    Running out of budget is routine on a busy match day, so logging it as an error sends no SMS.
+    """
+
+    alert = False
+
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left before the current command's deadline, or `None` when there's no deadline.
+
+    :returns: Optional[float]
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - monotonic()
+
+
+def budget_exhausted(reserve: float = COMMAND_DEADLINE_RESERVE) -> bool:
+    """
+    Whether the current command should stop making requests and reply with what it has.
+
+    :param float reserve: Seconds held back to assemble a reply.
+
+    :returns: bool
+    """
+    seconds = remaining()
+    return seconds is not None and seconds <= reserve
+
+
+class Deadline:
+    """
+    Run a block under a deadline, cancelling whatever it's awaiting once time runs out.
+
+    The deadline is published to a context variable so HTTP requests made within the block
+    can shorten their own timeouts to fit, and nested deadlines never outlive their parent.
+
+    :param Optional[float] seconds: Seconds the block may run for; `None` inherits any outer deadline.
+    """
+
+    def __init__(self, seconds: Optional[float]):
+        self.seconds = seconds
+        self.when: Optional[float] = None
+        self._timeout: Optional[asyncio.Timeout] = None
+        self._token = None
+
+    def exhausted(self, reserve: float = COMMAND_DEADLINE_RESERVE) -> bool:
+        """
+        Whether the block used up its budget, ie: replied with partial results or was cancelled.
+
+        :param float reserve: Seconds held back to assemble a reply.
+
+        :returns: bool
+        """
+        return self.when is not None and self.when - monotonic() <= reserve
+
+    async def __aenter__(self) -> "Deadline":
+        seconds, outer = self.seconds, remaining()
+        if outer is not None:
+            seconds = outer if seconds is None else min(seconds, outer)
+        self.when = None if seconds is None else monotonic() + seconds
+        self._token = _deadline.set(self.when)
+        self._timeout = asyncio.timeout(seconds)
+        await self._timeout.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> Optional[bool]:
+        try:
+            return await self._timeout.__aexit__(exc_type, exc, tb)
+        finally:
+            _deadline.reset(self._token)
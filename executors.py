@@ -0,0 +1,156 @@
+"""Bounded thread pools for blocking third-party SDKs, one per integration."""
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Callable, Dict, TypeVar
+
+from metrics import Counter, Gauge, Histogram
+from tracing import tracer
+
+T = TypeVar("T")
+
+# Blocking integrations, each with its own `(threads, queued calls)`; a slow scrape only ever
+# exhausts its own pool rather than the event loop's default executor.
+EXECUTOR_POOLS = {
+    "gcs": (4, 8),  # Google Cloud Storage image commands.
+    "twilio": (2, 4),  # SMS.
+    "genius": (2, 4),  # Lyrics.
+    "wikipedia": (2, 4),  # Wiki summaries & previews.
+    "dictionary": (2, 4),  # English definitions.
+    "geoip": (2, 4),  # IP lookups of new chat users.
+    "psn": (2, 4),  # Playstation Network.
+    "redgifs": (2, 4),  # After-dark gifs.
+    "youtube": (3, 6),  # YouTube search & previews.
+    "scraping": (2, 2),  # Olympic medal tables.
+    "redis": (2, 8),  # Polls & counters backed by the synchronous Redis client.
+}
+
+EXECUTOR_QUEUE_SECONDS = Histogram(
+    "broiestbot_executor_queue_seconds",
+    "Time blocking calls waited for a free thread.",
+    ("executor",),
+)
+EXECUTOR_RUN_SECONDS = Histogram(
+    "broiestbot_executor_run_seconds",
+    "Time blocking calls spent running on a thread.",
+    ("executor",),
+)
+EXECUTOR_PENDING = Gauge(
+    "broiestbot_executor_pending",
+    "Blocking calls queued or running, per executor.",
+    ("executor",),
+)
+EXECUTOR_REJECTED = Counter(
+    "broiestbot_executor_rejected_total",
+    "Blocking calls refused because their executor was saturated.",
+    ("executor",),
+)
+
+
+class ExecutorSaturated(Exception):
+    """Raised instead of queueing a blocking call behind an executor which is already full."""
+
+    def __init__(self, name: str):
+        self.name = name
+        super().__init__(f"Executor `{name}` is saturated")
+
+
+class BoundedExecutor:
+    """
+    Thread pool which fails fast once `max_workers + max_queue` calls are in flight.
+
+    :param str name: Name of the integration the pool is reserved for.
+    :param int max_workers: Threads running calls concurrently.
+    :param int max_queue: Calls allowed to wait for a free thread.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"executor-{name}")
+
+    @property
+    def saturated(self) -> bool:
+        """Whether every thread is busy and the queue is full."""
+        return self.pending >= self.max_workers + self.max_queue
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Run a blocking call on this pool, carrying over context variables like `asyncio.to_thread`.
+
+        :param Callable func: Blocking function to call.
+        :param args: Positional arguments passed to `func`.
+        :param kwargs: Keyword arguments passed to `func`.
+
+        :raises ExecutorSaturated: When the pool can't accept another call.
+
+        :returns: T
+        """
+        if self.saturated:
+            EXECUTOR_REJECTED.inc(self.name)
+            raise ExecutorSaturated(self.name)
+        timings = {}
+
+        def call() -> T:
+            timings["started"] = perf_counter()
+            try:
+                with tracer.span("executor.call", resource=self.name, queue_seconds=timings["started"] - submitted):
+                    return func(*args, **kwargs)
+            finally:
+                timings["finished"] = perf_counter()
+
+        loop = asyncio.get_running_loop()
+        submitted = perf_counter()
+        self.pending += 1
+        EXECUTOR_PENDING.set(self.pending, self.name)
+        future = self._pool.submit(contextvars.copy_context().run, call)
+        # Threads can't be cancelled: a call abandoned by its command (ie: past its deadline) keeps
+        # its slot until it actually finishes, so saturation reflects the threads really in use.
+        future.add_done_callback(
+            lambda _: loop.is_closed() or loop.call_soon_threadsafe(self._release, submitted, timings)
+        )
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def _release(self, submitted: float, timings: Dict[str, float]) -> None:
+        """Free a finished call's slot & record its timings, on the event loop rather than the worker thread."""
+        self.pending -= 1
+        EXECUTOR_PENDING.set(self.pending, self.name)
+        if "started" in timings:
+            EXECUTOR_QUEUE_SECONDS.observe(timings["started"] - submitted, self.name)
+        if "finished" in timings:
+            EXECUTOR_RUN_SECONDS.observe(timings["finished"] - timings["started"], self.name)
+
+    def shutdown(self) -> None:
+        """Stop accepting calls; threads finish whatever they're running in the background."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+executors: Dict[str, BoundedExecutor] = {
+    name: BoundedExecutor(name, max_workers, max_queue) for name, (max_workers, max_queue) in EXECUTOR_POOLS.items()
+}
+
+
+async def run_blocking(executor: str, func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run a blocking SDK call on the executor reserved for its integration.
+
+    :param str executor: Name of the executor, as declared in `EXECUTOR_POOLS`.
+    :param Callable func: Blocking function to call.
+    :param args: Positional arguments passed to `func`.
+    :param kwargs: Keyword arguments passed to `func`.
+
+    :raises ExecutorSaturated: When the executor can't accept another call.
+
+    :returns: T
+    """
+    return await executors[executor].run(func, *args, **kwargs)
+
+
+def shutdown_executors() -> None:
+    """Shut down every executor; called when the bot shuts down."""
+    for executor in executors.values():
+        executor.shutdown()
@@ -0,0 +1,334 @@
+"""Reuse upstream GET responses while they're fresh, and revalidate them once they go stale."""
+
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from functools import partial
+from time import monotonic, time
+from typing import Any, Callable, Dict, Mapping, Optional
+from urllib.parse import urlencode, urlsplit
+
+from aiohttp import ClientResponseError
+from http_json import check_content_type, decode
+from metrics import Counter, Gauge, ratio
+from multidict import CIMultiDict, CIMultiDictProxy
+
+from config import HTTP_CACHE_KEY_HEADERS, HTTP_CACHE_MAX_BODY_BYTES, HTTP_CACHE_MAX_ENTRIES
+
+# Responses which may be stored; anything else (ie: rate limits, server errors) is always fetched again.
+CACHEABLE_STATUSES = (200,)
+
+HTTP_CACHE_HITS = Counter(
+    "broiestbot_http_cache_hits_total",
+    "Upstream GET requests answered from the HTTP cache without a request.",
+    ("host",),
+)
+HTTP_CACHE_MISSES = Counter(
+    "broiestbot_http_cache_misses_total",
+    "Upstream GET requests which had to be fetched in full.",
+    ("host",),
+)
+HTTP_CACHE_REVALIDATED = Counter(
+    "broiestbot_http_cache_revalidated_total",
+    "Stale cached responses which the upstream confirmed unchanged with a `304 Not Modified`.",
+    ("host",),
+)
+HTTP_CACHE_HIT_RATIO = Gauge(
+    "broiestbot_http_cache_hit_ratio",
+    "Share of upstream GET requests served from the HTTP cache, including revalidated responses.",
+    callback=ratio(HTTP_CACHE_HITS, (HTTP_CACHE_HITS, HTTP_CACHE_MISSES, HTTP_CACHE_REVALIDATED)),
+)
+HTTP_CACHE_EVICTIONS = Counter(
+    "broiestbot_http_cache_evictions_total",
+    "Cached upstream responses evicted to keep the HTTP cache within its size.",
+)
+
+
+def cache_key(method: str, url: Any, params: Any = None, headers: Optional[Mapping[str, str]] = None) -> str:
+    """
+    Identify a request by its method, URL, sorted query parameters & the headers which change its response.
+
+    The key is a hash of them all, so it never carries API keys (in headers or the query string) in the clear.
+
+    :param str method: HTTP method of the request.
+    :param Any url: URL of the request, with or without a query string.
+    :param Any params: Query parameters passed alongside the URL, as a mapping or pairs.
+    :param Optional[Mapping[str, str]] headers: Headers sent with the request.
+
+    :returns: str
+    """
+    pairs = params.items() if isinstance(params, Mapping) else (params or ())
+    query = urlencode(sorted((str(name), str(value)) for name, value in pairs))
+    selected = sorted(
+        (name.lower(), str(value)) for name, value in (headers or {}).items() if name.lower() in HTTP_CACHE_KEY_HEADERS
+    )
+    return hashlib.sha1(repr((method.upper(), str(url), query, selected)).encode()).hexdigest()
+
+
+def _directives(headers: Mapping[str, str]) -> Dict[str, Optional[str]]:
+    """`Cache-Control` directives of a response, ie: `{"max-age": "60", "no-cache": None}`."""
+    directives = {}
+    for directive in headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+def _seconds(value: Optional[str]) -> Optional[int]:
+    """Whole seconds of a header or directive, ie: `Age: 30`; `None` if absent or malformed."""
+    value = (value or "").strip()
+    return int(value) if value.isdigit() else None
+
+
+def freshness(headers: Mapping[str, str], default: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds a response may be reused without revalidating it, from its `Cache-Control` or `Expires` headers.
+
+    :param Mapping[str, str] headers: Headers of the response.
+    :param Optional[float] default: Seconds to reuse responses which don't say how long they stay fresh.
+
+    :returns: Optional[float]; `None` when the response mustn't be stored at all.
+    """
+    directives = _directives(headers)
+    if "no-store" in directives or headers.get("Vary", "").strip() == "*":
+        return None
+    if "no-cache" in directives:
+        return 0
+    age = _seconds(headers.get("Age")) or 0
+    max_age = _seconds(directives.get("max-age"))
+    if max_age is not None:
+        return max(max_age - age, 0)
+    if "Expires" in headers:
+        try:
+            expires = parsedate_to_datetime(headers["Expires"]).timestamp()
+            date = parsedate_to_datetime(headers["Date"]).timestamp() if "Date" in headers else time()
+        except (TypeError, ValueError):
+            # Invalid dates (ie: `Expires: 0`) mean the response has already expired.
+            return 0
+        return max(expires - date - age, 0)
+    if default is not None:
+        return default
+    # Responses which don't say how long they stay fresh may only be reused once revalidated.
+    return 0 if "ETag" in headers or "Last-Modified" in headers else None
+
+
+class CachedResponse:
+    """
+    Stored copy of an upstream response, readable like the `aiohttp.ClientResponse` it was copied from.
+
+    :param str url: URL the response was fetched from.
+    :param int status: HTTP status of the response.
+    :param str reason: HTTP reason phrase of the response.
+    :param Mapping[str, str] headers: Headers of the response.
+    :param bytes body: Body of the response.
+    """
+
+    def __init__(self, url: str, status: int, reason: str, headers: Mapping[str, str], body: bytes):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self._body = body
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get("Content-Type", "application/octet-stream").split(";")[0].strip()
+
+    @property
+    def charset(self) -> Optional[str]:
+        _, _, charset = self.headers.get("Content-Type", "").partition("charset=")
+        return charset.split(";")[0].strip().strip('"') or None
+
+    @property
+    def content_length(self) -> int:
+        return len(self._body)
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self, encoding: Optional[str] = None, errors: str = "strict") -> str:
+        return self._body.decode(encoding or self.charset or "utf-8", errors=errors)
+
+    async def json(
+        self,
+        *,
+        encoding: Optional[str] = None,
+        loads: Optional[Callable[[str], Any]] = None,
+        content_type: Optional[str] = "application/json",
+    ) -> Any:
+        check_content_type(self, content_type)
+        return decode(self._body, urlsplit(self.url).hostname or "", encoding or self.charset, loads)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise ClientResponseError(None, (), status=self.status, message=self.reason)
+
+    def release(self) -> None:
+        pass
+
+    def dumps(self) -> bytes:
+        """
+        Serialize the response, ie: to share it through Redis.
+
+        :returns: bytes
+        """
+        meta = {"url": self.url, "status": self.status, "reason": self.reason, "headers": list(self.headers.items())}
+        return json.dumps(meta).encode() + b"\n" + self._body
+
+    @classmethod
+    def loads(cls, data: bytes) -> "CachedResponse":
+        """
+        Deserialize a response serialized by `dumps()`.
+
+        :param bytes data: Serialized response.
+
+        :returns: CachedResponse
+        """
+        meta, _, body = data.partition(b"\n")
+        meta = json.loads(meta)
+        return cls(meta["url"], meta["status"], meta["reason"], CIMultiDict(meta["headers"]), body)
+
+    async def __aenter__(self) -> "CachedResponse":
+        return self
+
+    async def __aexit__(self, *_exc) -> bool:
+        return False
+
+
+@dataclass
+class Entry:
+    """Cached response, when it goes stale, and the validators to revalidate it with once it has."""
+
+    response: CachedResponse
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at > monotonic()
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers asking the upstream to reply `304 Not Modified` if nothing changed."""
+        validators = {}
+        if "ETag" in self.response.headers:
+            validators["If-None-Match"] = self.response.headers["ETag"]
+        if "Last-Modified" in self.response.headers:
+            validators["If-Modified-Since"] = self.response.headers["Last-Modified"]
+        return validators
+
+
+class HttpCache:
+    """
+    Bounded LRU of upstream GET responses, keyed by `cache_key`.
+
+    Stale responses are kept (until evicted) when they carry an `ETag` or `Last-Modified`, so
+    they can be revalidated with a conditional request rather than downloaded again.
+
+    :param int maxsize: Responses kept before the least recently used are evicted.
+    :param int max_body: Largest body, in bytes, worth keeping.
+    """
+
+    def __init__(self, maxsize: int = HTTP_CACHE_MAX_ENTRIES, max_body: int = HTTP_CACHE_MAX_BODY_BYTES):
+        self.maxsize = maxsize
+        self.max_body = max_body
+        self._entries: OrderedDict[str, Entry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Entry]:
+        """
+        Fetch the cached entry for a request, fresh or stale.
+
+        :param str key: Key of the request.
+
+        :returns: Optional[Entry]
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def store(self, key: str, response: CachedResponse, ttl: Optional[float]) -> Optional[Entry]:
+        """
+        Cache a response, evicting the least recently used responses if full.
+
+        :param str key: Key of the request.
+        :param CachedResponse response: Response to cache.
+        :param Optional[float] ttl: Seconds the response stays fresh; `None` if it mustn't be stored.
+
+        :returns: Optional[Entry]
+        """
+        if ttl is None or response.content_length > self.max_body:
+            self._entries.pop(key, None)
+            return None
+        if ttl <= 0 and not Entry(response, 0).validators:
+            # Already stale, and no way to revalidate it: storing it would never save a request.
+            self._entries.pop(key, None)
+            return None
+        entry = self._entries[key] = Entry(response, monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            HTTP_CACHE_EVICTIONS.inc()
+        return entry
+
+    def refresh(
+        self, entry: Entry, headers: Mapping[str, str], ttl: Optional[float] = None, default: Optional[float] = None
+    ) -> None:
+        """
+        Mark an entry the upstream confirmed unchanged (`304 Not Modified`) as fresh again.
+
+        :param Entry entry: Entry which was revalidated.
+        :param Mapping[str, str] headers: Headers of the `304` response, which replace those stored.
+        :param Optional[float] ttl: Seconds the entry stays fresh; derived from its headers when omitted.
+        :param Optional[float] default: Seconds to reuse it for when its headers don't say, as in `freshness`.
+
+        :returns: None
+        """
+        merged = CIMultiDict(entry.response.headers)
+        merged.update(headers)
+        entry.response.headers = CIMultiDictProxy(merged)
+        if ttl is None:
+            ttl = freshness(merged, default)
+        entry.expires_at = monotonic() + (ttl or 0)
+
+    def clear(self) -> None:
+        """Drop every cached response."""
+        self._entries.clear()
+
+
+http_cache = HttpCache()
+
+HTTP_CACHE_ENTRIES = Gauge(
+    "broiestbot_http_cache_entries",
+    "Upstream responses currently held by the HTTP cache.",
+    callback=partial(len, http_cache),
+)
+
+
+def copy_response(response: Any, body: bytes) -> CachedResponse:
+    """
+    Copy a response whose body has been read, so it can be served again after the connection is released.
+
+    :param Any response: `aiohttp.ClientResponse` which was read.
+    :param bytes body: Body of the response.
+
+    :returns: CachedResponse
+    """
+    headers = getattr(response, "headers", None) or {}
+    return CachedResponse(str(getattr(response, "url", "")), response.status, response.reason, headers, body)
+
+
+def merge_headers(headers: Optional[Mapping[str, str]], extra: Mapping[str, str]) -> Optional[Dict[str, str]]:
+    """Request headers with `extra` added, leaving the caller's headers (often a shared constant) untouched."""
+    if not extra:
+        return headers
+    return {**(headers or {}), **extra}
@@ -1,17 +1,408 @@
 """Shared `aiohttp` session used for all outbound HTTP requests made by bot commands."""
 
 import asyncio
-from typing import Optional
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic
+from typing import Any, Dict, Iterator, Mapping, Optional
+from urllib.parse import urlsplit
 
 import aiohttp
+from deadlines import DeadlineExceeded, remaining
+from http_cache import (
+    CACHEABLE_STATUSES,
+    HTTP_CACHE_HITS,
+    HTTP_CACHE_MISSES,
+    HTTP_CACHE_REVALIDATED,
+    CachedResponse,
+    Entry,
+    cache_key,
+    copy_response,
+    freshness,
+    http_cache,
+    merge_headers,
+)
+from http_json import JsonResponse
+from http_limits import HostLimits, host_limits
+from http_resilience import (
+    OPEN,
+    UPSTREAM_RETRIES,
+    CircuitBreakers,
+    RetryPolicy,
+    circuit_breakers,
+    retry_after,
+    retry_policy,
+)
+from metrics import Counter
+from shared_cache import Claim, shared_cache
+from tracing import tracer
 
-from config import HTTP_REQUEST_TIMEOUT
+from config import (
+    COMMAND_DEADLINE_RESERVE,
+    HTTP_CACHE_HOST_TTLS,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_REQUEST_TIMEOUT,
+)
 
 _session: Optional[aiohttp.ClientSession] = None
+_pools: Dict[str, aiohttp.ClientSession] = {}
 _session_lock = asyncio.Lock()
 
+UPSTREAM_REQUESTS = Counter(
+    "broiestbot_upstream_requests_total",
+    "HTTP requests made to upstream APIs, per host & the command type which made them.",
+    ("host", "method", "cmd_type"),
+)
 
-async def get_http_session() -> aiohttp.ClientSession:
+# `Type` of the command whose requests are being sent; "none" outside commands, ie: scheduled jobs.
+_cmd_type: ContextVar[str] = ContextVar("upstream_cmd_type", default="none")
+
+
+@contextmanager
+def attribute_requests(cmd_type: str) -> Iterator[None]:
+    """
+    Attribute upstream requests made within the block (and tasks it starts) to a command type.
+
+    :param str cmd_type: `Type` of command as stored in the `commands` table.
+
+    :returns: Iterator[None]
+    """
+    token = _cmd_type.set(cmd_type)
+    try:
+        yield
+    finally:
+        _cmd_type.reset(token)
+
+
+class HttpSession:
+    """
+    Wrapper around the shared `aiohttp.ClientSession` used by bot commands.
+
+    Requests made while a command is running have their timeout shortened to fit the
+    command's remaining deadline, less a reserve for assembling a (partial) reply. Once the
+    budget is spent, new requests fail immediately rather than starting at all.
+
+    GET responses are kept in `http_cache` for as long as their headers (or their host's entry
+    in `HTTP_CACHE_HOST_TTLS`) allow, so a command repeating a request another made seconds
+    earlier is answered without one. Pass `cache_ttl` to a request to override how long its
+    response is reused for; `cache_ttl=0` always fetches it afresh.
+
+    Requests wait for a slot in their API's concurrency budget before they're sent, and go
+    out through the API's own connection pool when it declares one, so a command fanning out
+    to one API can't starve requests to another.
+
+    GETs which fail with a connection error, timeout or retryable status are retried with
+    backoff. Once a host fails repeatedly its circuit opens, and requests to it raise
+    `CircuitOpenError` immediately until a probe finds it responding again.
+
+    `resp.json()` reads the raw body once & decodes it with `orjson` when it's installed.
+
+    :param aiohttp.ClientSession session: Underlying session which pools connections.
+    :param Optional[Mapping[str, aiohttp.ClientSession]] pools: Sessions pooling connections to a single host.
+    :param HostLimits limits: Concurrency budgets of upstream hosts.
+    :param RetryPolicy retry: When & how long to wait before retrying a failed request.
+    :param CircuitBreakers breakers: Circuit breaker of every upstream host.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        pools: Optional[Mapping[str, aiohttp.ClientSession]] = None,
+        limits: HostLimits = host_limits,
+        retry: RetryPolicy = retry_policy,
+        breakers: CircuitBreakers = circuit_breakers,
+    ):
+        self._session = session
+        self._pools = pools or {}
+        self._limits = limits
+        self._retry = retry
+        self._breakers = breakers
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._session, name)
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method: str, url: str, cache_ttl: Optional[float] = None, **kwargs):
+        if method.upper() == "GET" and cache_ttl != 0:
+            return _CachedRequest(self, url, cache_ttl, kwargs)
+        return self._send(method, url, **kwargs)
+
+    def _send(self, method: str, url: str, **kwargs):
+        return _RetriedRequest(self, method, url, kwargs)
+
+    def _open(self, method: str, url: str, kwargs: Dict[str, Any], queue_seconds: float):
+        """Send a request which holds a slot in its host's budget."""
+        parts = urlsplit(str(url))
+        host = parts.hostname or ""
+        UPSTREAM_REQUESTS.inc(host, method, _cmd_type.get())
+        request = self._pools.get(host, self._session).request(method, url, **kwargs)
+        if not tracer.enabled:
+            return request
+        # Only the path is recorded: query strings may carry API keys.
+        span = tracer.start(
+            "http.request",
+            resource=f"{method} {host}",
+            host=host,
+            method=method,
+            path=parts.path,
+            queue_seconds=queue_seconds,
+        )
+        return _TracedRequest(request, span)
+
+
+class _RetriedRequest:
+    """
+    Request retried while it fails & its policy allows, which fails fast while its host's circuit is open.
+
+    Connection errors, timeouts & 5xx responses count against the host's circuit, and retries
+    stop once it opens; the response returned is the last one received, whether or not it succeeded.
+    Timeouts shortened to fit the command's deadline are given up on without counting against it.
+    Its `json()` decodes the raw body with `http_json`, recording size & decode time per host.
+
+    :param HttpSession session: Session which sends the request.
+    :param str method: HTTP method of the request.
+    :param str url: URL of the request.
+    :param Dict[str, Any] kwargs: Keyword arguments of the request.
+    """
+
+    def __init__(self, session: HttpSession, method: str, url: str, kwargs: Dict[str, Any]):
+        self._session = session
+        self._method = method
+        self._url = url
+        self._kwargs = kwargs
+        self._request = None
+
+    async def __aenter__(self):
+        host = urlsplit(str(self._url)).hostname or ""
+        breaker = self._session._breakers[host]
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker.check()
+            request = _LimitedRequest(self._session, self._method, self._url, dict(self._kwargs))
+            try:
+                response = await request.__aenter__()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                # Running out of the command's time says nothing about the host's health.
+                if isinstance(e, DeadlineExceeded) or (isinstance(e, asyncio.TimeoutError) and request.fitted):
+                    breaker.abandoned()
+                    raise
+                breaker.failed()
+                delay = self._session._retry.delay(self._method, attempt)
+                if delay is None or breaker.state == OPEN:
+                    raise
+                UPSTREAM_RETRIES.inc(host, type(e).__name__)
+            except BaseException:
+                breaker.abandoned()
+                raise
+            else:
+                if response.status >= 500:
+                    breaker.failed()
+                else:
+                    breaker.succeeded()
+                delay = None
+                if response.status in self._session._retry.statuses:
+                    headers = getattr(response, "headers", None) or {}
+                    delay = self._session._retry.delay(self._method, attempt, retry_after(headers))
+                if delay is None or breaker.state == OPEN:
+                    self._request = request
+                    return JsonResponse(response, host)
+                UPSTREAM_RETRIES.inc(host, str(response.status))
+                await request.__aexit__(None, None, None)
+            await asyncio.sleep(delay)
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> bool:
+        request, self._request = self._request, None
+        if request is None:
+            return False
+        return await request.__aexit__(exc_type, exc_value, traceback)
+
+
+class _LimitedRequest:
+    """
+    Request sent once a slot in its host's concurrency budget frees up, holding the slot until it's released.
+
+    The request's timeout is fitted to the command's deadline after the wait, so time spent
+    queueing comes out of the request's budget rather than overrunning the deadline.
+
+    :param HttpSession session: Session which sends the request.
+    :param str method: HTTP method of the request.
+    :param str url: URL of the request.
+    :param Dict[str, Any] kwargs: Keyword arguments of the request.
+    """
+
+    def __init__(self, session: HttpSession, method: str, url: str, kwargs: Dict[str, Any]):
+        self._session = session
+        self._method = method
+        self._url = url
+        self._kwargs = kwargs
+        self._slot = None
+        self._request = None
+        # Whether the request's timeout was shortened to fit the command's deadline.
+        self.fitted = False
+
+    async def __aenter__(self):
+        self._slot = self._session._limits.slot(urlsplit(str(self._url)).hostname or "")
+        queue_seconds = await self._slot.__aenter__()
+        try:
+            kwargs = _fit_to_deadline(dict(self._kwargs))
+            self.fitted = kwargs.get("timeout") is not self._kwargs.get("timeout")
+            self._request = self._session._open(self._method, self._url, kwargs, queue_seconds)
+            return await self._request.__aenter__()
+        except BaseException:
+            self._request = None
+            await self._release_slot()
+            raise
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> bool:
+        request, self._request = self._request, None
+        try:
+            return bool(request is not None and await request.__aexit__(exc_type, exc_value, traceback))
+        finally:
+            await self._release_slot()
+
+    async def _release_slot(self) -> None:
+        slot, self._slot = self._slot, None
+        if slot is not None:
+            await slot.__aexit__(None, None, None)
+
+
+class _CachedRequest:
+    """
+    GET answered from `http_cache` while fresh, revalidated once stale, and stored once fetched.
+
+    :param HttpSession session: Session which sends the request on a miss.
+    :param str url: URL of the request.
+    :param Optional[float] ttl: Seconds to reuse the response for; derived from its headers when `None`.
+    :param Dict[str, Any] kwargs: Keyword arguments of the request.
+    """
+
+    def __init__(self, session: HttpSession, url: str, ttl: Optional[float], kwargs: Dict[str, Any]):
+        self._session = session
+        self._url = url
+        self._ttl = ttl
+        self._kwargs = kwargs
+        self._host = urlsplit(str(url)).hostname or ""
+        self._request = None
+
+    async def __aenter__(self):
+        key = cache_key("GET", self._url, self._kwargs.get("params"), self._kwargs.get("headers"))
+        entry = http_cache.get(key)
+        if entry is not None and entry.fresh:
+            HTTP_CACHE_HITS.inc(self._host)
+            return entry.response
+        if not shared_cache.available:
+            return await self._fetch(key, entry, None)
+        async with shared_cache.claim("http", key) as claim:
+            if claim.value is not None:
+                response = CachedResponse.loads(claim.value)
+                http_cache.store(key, response, claim.ttl)
+                return response
+            return await self._fetch(key, entry, claim)
+
+    async def _fetch(self, key: str, entry: Optional[Entry], claim: Optional[Claim]):
+        """Request the response, revalidating `entry` if there is one, & cache it in both tiers if allowed."""
+        kwargs = self._kwargs
+        if entry is not None:
+            kwargs = {**kwargs, "headers": merge_headers(kwargs.get("headers"), entry.validators)}
+        self._request = self._session._send("GET", self._url, **kwargs)
+        response = await self._request.__aenter__()
+        try:
+            headers = getattr(response, "headers", None) or {}
+            if entry is not None and response.status == 304:
+                HTTP_CACHE_REVALIDATED.inc(self._host)
+                http_cache.refresh(entry, headers, self._ttl, HTTP_CACHE_HOST_TTLS.get(self._host))
+                await self._release(None, None, None)
+                response = entry.response
+            else:
+                HTTP_CACHE_MISSES.inc(self._host)
+                ttl = self._ttl if self._ttl is not None else freshness(headers, HTTP_CACHE_HOST_TTLS.get(self._host))
+                if response.status not in CACHEABLE_STATUSES or ttl is None:
+                    return response
+                entry = http_cache.store(key, copy_response(response, await response.read()), ttl)
+            if claim is not None and entry is not None:
+                await claim.set(entry.response.dumps(), entry.expires_at - monotonic())
+        except BaseException:
+            await self._release(*sys.exc_info())
+            raise
+        return response
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> bool:
+        return await self._release(exc_type, exc_value, traceback)
+
+    async def _release(self, exc_type, exc_value, traceback) -> bool:
+        request, self._request = self._request, None
+        if request is None:
+            return False
+        return await request.__aexit__(exc_type, exc_value, traceback)
+
+
+class _TracedRequest:
+    """
+    Request whose span lasts until its response has been read & released, recording its status & size.
+
+    :param request: Request as returned by `aiohttp.ClientSession.request`, used as an async context manager.
+    :param span: Span timing the request.
+    """
+
+    def __init__(self, request, span):
+        self._request = request
+        self._span = span
+        self._response = None
+
+    async def __aenter__(self):
+        try:
+            self._response = await self._request.__aenter__()
+        except BaseException as e:
+            self._span.set_exc_info(type(e), e, e.__traceback__)
+            self._span.finish()
+            raise
+        self._span.set_tag("status", self._response.status)
+        return self._response
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> bool:
+        try:
+            return await self._request.__aexit__(exc_type, exc_value, traceback)
+        finally:
+            content = getattr(self._response, "content", None)
+            size = getattr(content, "total_bytes", None) or getattr(self._response, "content_length", None)
+            if size is not None:
+                self._span.set_tag("bytes", size)
+            if exc_type is not None:
+                self._span.set_exc_info(exc_type, exc_value, traceback)
+            self._span.finish()
+
+
+def _fit_to_deadline(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Shorten a request's timeout to the time left before the current command's deadline.
+
+    :param Dict[str, Any] kwargs: Keyword arguments of the request.
+
+    :raises DeadlineExceeded: When the command has no time left for another request.
+
+    :returns: Dict[str, Any]
+    """
+    seconds = remaining()
+    if seconds is None:
+        return kwargs
+    seconds -= COMMAND_DEADLINE_RESERVE
+    if seconds <= 0:
+        raise DeadlineExceeded("Command deadline exhausted before request was sent")
+    timeout = kwargs.get("timeout")
+    total = timeout.total if isinstance(timeout, aiohttp.ClientTimeout) and timeout.total else HTTP_REQUEST_TIMEOUT
+    if seconds < total:
+        kwargs["timeout"] = aiohttp.ClientTimeout(total=seconds)
+    return kwargs
+
+
+async def get_http_session() -> HttpSession:
     """
     Return the process-wide `aiohttp` session, creating it on first use.
 
@@ -19,17 +410,31 @@ async def get_http_session() -> aiohttp.ClientSession:
     lookups are cached across requests. The session is bound to the running event loop,
     hence it is created lazily rather than at import time.
 
-    :returns: aiohttp.ClientSession
+    :returns: HttpSession
     """
-    global _session
+    global _session, _pools
     if _session is None or _session.closed:
         async with _session_lock:
             if _session is None or _session.closed:
-                _session = aiohttp.ClientSession(
-                    timeout=aiohttp.ClientTimeout(total=HTTP_REQUEST_TIMEOUT),
-                    raise_for_status=False,
-                )
-    return _session
+                _session = _new_session(HTTP_MAX_CONNECTIONS, host_limits.default_connections)
+                _pools = {host: _new_session(connections) for host, connections in host_limits.pools.items()}
+    return HttpSession(_session, _pools)
+
+
+def _new_session(limit: int, limit_per_host: int = 0) -> aiohttp.ClientSession:
+    """
+    Create a session whose connection pool is capped in total & per host.
+
+    :param int limit: Connections the session may hold open at once.
+    :param int limit_per_host: Connections the session may hold open to any single host; 0 for no cap.
+
+    :returns: aiohttp.ClientSession
+    """
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=limit, limit_per_host=limit_per_host),
+        timeout=aiohttp.ClientTimeout(total=HTTP_REQUEST_TIMEOUT),
+        raise_for_status=False,
+    )
 
 
 def request_timeout(seconds: float) -> aiohttp.ClientTimeout:
@@ -45,11 +450,14 @@ def request_timeout(seconds: float) -> aiohttp.ClientTimeout:
 
 async def close_http_session() -> None:
     """
-    Close the shared `aiohttp` session; called when the bot shuts down.
+    Close the shared `aiohttp` session & per-host pools; called when the bot shuts down.
 
     :returns: None
     """
-    global _session
-    if _session is not None and not _session.closed:
-        await _session.close()
+    global _session, _pools
+    for session in (_session, *_pools.values()):
+        if session is not None and not session.closed:
+            await session.close()
     _session = None
+    _pools = {}
+    host_limits.reset()
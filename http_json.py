@@ -0,0 +1,104 @@
+"""Decode upstream JSON straight from the raw body, with `orjson` when it's installed."""
+
+import json
+from time import perf_counter
+from typing import Any, Callable, Optional
+
+from aiohttp import ContentTypeError
+from metrics import Histogram
+
+try:
+    import orjson
+except ImportError:
+    # `orjson` is optional; without it the stdlib decodes every body.
+    orjson = None
+
+# Parses JSON from bytes; the stdlib detects the encoding of bytes itself, `orjson` requires UTF-8.
+loads: Callable[[bytes], Any] = orjson.loads if orjson is not None else json.loads
+
+UPSTREAM_JSON_BYTES = Histogram(
+    "broiestbot_upstream_json_bytes",
+    "Size of upstream JSON bodies decoded, per host.",
+    ("host",),
+    buckets=(1024, 8192, 32768, 131072, 524288, 1048576, 4194304),
+)
+UPSTREAM_JSON_SECONDS = Histogram(
+    "broiestbot_upstream_json_seconds",
+    "Time spent decoding upstream JSON bodies, per host.",
+    ("host",),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+
+def decode(body: bytes, host: str, encoding: Optional[str] = None, parse: Optional[Callable[[Any], Any]] = None) -> Any:
+    """
+    Decode a JSON body, recording its size & the time taken against its host.
+
+    :param bytes body: Raw body of the response.
+    :param str host: Host the response came from.
+    :param Optional[str] encoding: Charset of the body, if the response declared one.
+    :param Optional[Callable] parse: Parser to use instead of `loads`; it's passed text, as `aiohttp` does.
+
+    :returns: Any; `None` for an empty body, as `aiohttp` returns.
+    """
+    stripped = body.strip()
+    if not stripped:
+        return None
+    started = perf_counter()
+    if parse is not None or (encoding and encoding.lower().replace("-", "") != "utf8"):
+        value = (parse or loads)(stripped.decode(encoding or "utf-8"))
+    else:
+        value = loads(stripped)
+    UPSTREAM_JSON_SECONDS.observe(perf_counter() - started, host)
+    UPSTREAM_JSON_BYTES.observe(len(body), host)
+    return value
+
+
+def check_content_type(response: Any, content_type: Optional[str]) -> None:
+    """
+    Refuse to decode a response whose `Content-Type` isn't JSON, as `aiohttp.ClientResponse.json()` does.
+
+    :param Any response: Response to decode.
+    :param Optional[str] content_type: Expected content type; `None` to decode any response.
+
+    :raises ContentTypeError: When the response has another content type.
+
+    :returns: None
+    """
+    actual = getattr(response, "content_type", None)
+    if content_type and actual and content_type not in actual:
+        raise ContentTypeError(
+            getattr(response, "request_info", None),
+            getattr(response, "history", ()),
+            status=response.status,
+            message=f"Attempt to decode JSON with unexpected mimetype: {actual}",
+        )
+
+
+class JsonResponse:
+    """
+    Upstream response whose `json()` reads the raw body once & decodes it with `loads`.
+
+    Everything else is the wrapped `aiohttp.ClientResponse`'s own.
+
+    :param Any response: Response to wrap.
+    :param str host: Host the response came from.
+    """
+
+    def __init__(self, response: Any, host: str):
+        self._response = response
+        self._host = host
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+
+    async def json(
+        self,
+        *,
+        encoding: Optional[str] = None,
+        loads: Optional[Callable[[str], Any]] = None,
+        content_type: Optional[str] = "application/json",
+    ) -> Any:
+        check_content_type(self._response, content_type)
+        body = await self._response.read()
+        return decode(body, self._host, encoding or getattr(self._response, "charset", None), loads)
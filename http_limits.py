@@ -0,0 +1,105 @@
+"""Connection pools & concurrency budgets per upstream API, so one busy API can't starve requests to the others."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from time import monotonic
+from typing import Any, AsyncIterator, Dict, Iterable, Mapping, Tuple
+
+from metrics import Gauge, Histogram
+
+from config import (
+    F1_HTTP_LIMITS,
+    FOOTY_HTTP_LIMITS,
+    HTTP_CONCURRENCY_PER_HOST,
+    HTTP_CONNECTIONS_PER_HOST,
+    KLIPY_HTTP_LIMITS,
+    NFL_HTTP_LIMITS,
+    NFL_LIVE_HTTP_LIMITS,
+    ODDS_HTTP_LIMITS,
+    TWITCH_HTTP_LIMITS,
+)
+
+# Limits declared next to each API's endpoints in config.py.
+API_LIMITS = (
+    FOOTY_HTTP_LIMITS,
+    NFL_HTTP_LIMITS,
+    NFL_LIVE_HTTP_LIMITS,
+    ODDS_HTTP_LIMITS,
+    F1_HTTP_LIMITS,
+    TWITCH_HTTP_LIMITS,
+    KLIPY_HTTP_LIMITS,
+)
+
+UPSTREAM_QUEUE_SECONDS = Histogram(
+    "broiestbot_upstream_queue_seconds",
+    "Time requests waited for a slot in their API's concurrency budget before being sent, per host.",
+    ("host",),
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "broiestbot_upstream_in_flight",
+    "Requests to upstream APIs currently holding a slot in their budget, per host.",
+    ("host",),
+)
+
+
+class HostLimits:
+    """
+    Connection pool size & concurrency budget of every upstream host.
+
+    Hosts serving the same API share its budget, since providers rate limit the API rather than
+    a hostname. Hosts no API declares get a budget of their own with the default limits.
+
+    :param Iterable[Mapping[str, Any]] apis: Limits of each API: its `hosts`, `connections` & `concurrency`.
+    :param int connections: Connections pooled to a host no API declares.
+    :param int concurrency: Requests allowed in flight at once to a host no API declares.
+    """
+
+    def __init__(
+        self,
+        apis: Iterable[Mapping[str, Any]] = API_LIMITS,
+        connections: int = HTTP_CONNECTIONS_PER_HOST,
+        concurrency: int = HTTP_CONCURRENCY_PER_HOST,
+    ):
+        self.default_connections = connections
+        self.default_concurrency = concurrency
+        self._apis: Dict[str, Mapping[str, Any]] = {host: api for api in apis for host in api["hosts"]}
+        self._budgets: Dict[Tuple[str, ...], asyncio.Semaphore] = {}
+
+    @property
+    def pools(self) -> Dict[str, int]:
+        """Connections to pool for each host an API declares."""
+        return {host: api["connections"] for host, api in self._apis.items()}
+
+    def _budget(self, host: str) -> asyncio.Semaphore:
+        api = self._apis.get(host)
+        hosts, concurrency = (api["hosts"], api["concurrency"]) if api else ((host,), self.default_concurrency)
+        budget = self._budgets.get(hosts)
+        if budget is None:
+            budget = self._budgets[hosts] = asyncio.Semaphore(concurrency)
+        return budget
+
+    @asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[float]:
+        """
+        Wait for a slot in a host's concurrency budget, held until the request is done with.
+
+        :param str host: Host the request is sent to.
+
+        :returns: AsyncIterator[float]; seconds spent waiting for the slot.
+        """
+        queued_at = monotonic()
+        async with self._budget(host):
+            waited = monotonic() - queued_at
+            UPSTREAM_QUEUE_SECONDS.observe(waited, host)
+            UPSTREAM_IN_FLIGHT.inc(host)
+            try:
+                yield waited
+            finally:
+                UPSTREAM_IN_FLIGHT.dec(host)
+
+    def reset(self) -> None:
+        """Drop every budget, which is bound to the event loop it was first waited on."""
+        self._budgets.clear()
+
+
+host_limits = HostLimits()
@@ -0,0 +1,214 @@
+"""Retries with backoff for idempotent upstream requests, and circuit breakers failing fast while a host is down."""
+
+import random
+from email.utils import parsedate_to_datetime
+from time import monotonic, time
+from typing import Dict, Mapping, Optional
+
+from aiohttp import ClientConnectionError
+from deadlines import remaining
+from logger import LOGGER
+from metrics import Counter, Gauge
+
+from config import (
+    COMMAND_DEADLINE_RESERVE,
+    HTTP_BREAKER_COOLDOWN,
+    HTTP_BREAKER_FAILURES,
+    HTTP_RETRY_ATTEMPTS,
+    HTTP_RETRY_BACKOFF,
+    HTTP_RETRY_MAX_BACKOFF,
+    HTTP_RETRY_STATUSES,
+)
+
+# Requests which can safely be sent twice.
+IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+# Circuit states, as exported by `UPSTREAM_CIRCUIT_STATE`.
+CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+UPSTREAM_RETRIES = Counter(
+    "broiestbot_upstream_retries_total",
+    "Upstream requests retried after a failure, per host & reason (status code or exception).",
+    ("host", "reason"),
+)
+UPSTREAM_SHORT_CIRCUITED = Counter(
+    "broiestbot_upstream_short_circuited_total",
+    "Upstream requests failed immediately because their host's circuit was open.",
+    ("host",),
+)
+UPSTREAM_CIRCUIT_STATE = Gauge(
+    "broiestbot_upstream_circuit_state",
+    "State of each upstream host's circuit breaker: 0 closed, 1 half-open (probing), 2 open (failing fast).",
+    ("host",),
+)
+
+
+class CircuitOpenError(ClientConnectionError):
+    """
+    Raised instead of sending a request to a host which is failing.
+
+    Subclasses `aiohttp.ClientConnectionError`, so commands handle it like the host being unreachable.
+    It doesn't page anyone: the circuit opening is logged once, as a warning.
+    """
+
+    alert = False
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"{host} is failing; not sending requests to it for another {retry_in:.0f}s")
+        self.host = host
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Seconds an upstream asked us to wait before retrying, from its `Retry-After` header.
+
+    :param Mapping[str, str] headers: Headers of the response.
+
+    :returns: Optional[float]
+    """
+    value = (headers.get("Retry-After") or "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    When & how long to wait before retrying a failed idempotent request.
+
+    Retries back off exponentially with full jitter, so requests failing together don't retry
+    together. An upstream's `Retry-After` is honored in place of the backoff, unless it asks
+    for longer than `max_backoff`. No retry is made which the command's deadline can't fit.
+
+    :param int attempts: Attempts a request gets in total.
+    :param float backoff: Upper bound of the delay before the first retry, doubling for each retry after.
+    :param float max_backoff: Longest delay before any retry.
+    :param tuple statuses: Response statuses worth retrying.
+    """
+
+    def __init__(
+        self,
+        attempts: int = HTTP_RETRY_ATTEMPTS,
+        backoff: float = HTTP_RETRY_BACKOFF,
+        max_backoff: float = HTTP_RETRY_MAX_BACKOFF,
+        statuses: tuple = HTTP_RETRY_STATUSES,
+    ):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+
+    def delay(self, method: str, attempt: int, wait: Optional[float] = None) -> Optional[float]:
+        """
+        Seconds to wait before retrying a request which failed.
+
+        :param str method: HTTP method of the request.
+        :param int attempt: Attempts made so far, starting at 1.
+        :param Optional[float] wait: Seconds the upstream asked us to wait via `Retry-After`, if it did.
+
+        :returns: Optional[float]; `None` when the request shouldn't be retried.
+        """
+        if method.upper() not in IDEMPOTENT_METHODS or attempt >= self.attempts:
+            return None
+        if wait is None:
+            wait = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+        elif wait > self.max_backoff:
+            return None
+        seconds = remaining()
+        if seconds is not None and wait >= seconds - COMMAND_DEADLINE_RESERVE:
+            return None
+        return wait
+
+
+class CircuitBreaker:
+    """
+    Fails requests to a host fast once it has failed `failures` times in a row.
+
+    After `cooldown` seconds, a single request is let through to probe the host: the circuit
+    closes if it succeeds, and opens for another `cooldown` if it fails.
+
+    :param str host: Host the breaker guards.
+    :param int failures: Consecutive failures which open the circuit.
+    :param float cooldown: Seconds the circuit stays open before probing the host.
+    """
+
+    def __init__(self, host: str, failures: int = HTTP_BREAKER_FAILURES, cooldown: float = HTTP_BREAKER_COOLDOWN):
+        self.host = host
+        self.failures = failures
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self._failed = 0
+        self._opened_at = 0.0
+
+    def check(self) -> None:
+        """
+        Let a request through, or refuse it while the circuit is open or already being probed.
+
+        :raises CircuitOpenError: When the request mustn't be sent.
+
+        :returns: None
+        """
+        if self.state == CLOSED:
+            return
+        retry_in = self._opened_at + self.cooldown - monotonic()
+        if self.state == OPEN and retry_in <= 0:
+            self._transition(HALF_OPEN)
+            return
+        UPSTREAM_SHORT_CIRCUITED.inc(self.host)
+        raise CircuitOpenError(self.host, max(retry_in, 0))
+
+    def succeeded(self) -> None:
+        """Record a request the host answered, closing the circuit if it was being probed."""
+        self._failed = 0
+        if self.state != CLOSED:
+            LOGGER.info(f"{self.host} is responding again; resuming requests")
+            self._transition(CLOSED)
+
+    def failed(self) -> None:
+        """Record a request the host failed, opening the circuit if it's failed too often."""
+        self._failed += 1
+        if self.state == HALF_OPEN or (self.state == CLOSED and self._failed >= self.failures):
+            LOGGER.warning(
+                f"{self.host} failed {self._failed} requests in a row; failing requests to it fast for {self.cooldown}s"
+            )
+            self._opened_at = monotonic()
+            self._transition(OPEN)
+
+    def abandoned(self) -> None:
+        """Record a request which never completed (ie: cancelled), so another may probe the host."""
+        if self.state == HALF_OPEN:
+            self._opened_at = monotonic() - self.cooldown
+            self._transition(OPEN)
+
+    def _transition(self, state: int) -> None:
+        self.state = state
+        UPSTREAM_CIRCUIT_STATE.set(state, self.host)
+
+
+class CircuitBreakers:
+    """
+    Circuit breaker of every upstream host, created on first request.
+
+    :param int failures: Consecutive failures which open a host's circuit.
+    :param float cooldown: Seconds a host's circuit stays open before probing it.
+    """
+
+    def __init__(self, failures: int = HTTP_BREAKER_FAILURES, cooldown: float = HTTP_BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def __getitem__(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(host, self.failures, self.cooldown)
+        return breaker
+
+
+retry_policy = RetryPolicy()
+circuit_breakers = CircuitBreakers()
@@ -2,6 +2,7 @@
 
 import json
 import re
+import sys
 from datetime import datetime
 from sys import stdout
 
@@ -127,10 +128,17 @@ def sms_error_handler(log: dict) -> None:
     """
     Trigger error log SMS notification.
 
+    Errors caused by an exception with `alert = False` (ie: an upstream's circuit being open,
+    which is already logged as a warning once) are not sent.
+
     :param dict log: Log object containing log metadata & message.
 
     :returns: None
     """
+    # Errors logged with `LOGGER.error()` from within an `except` block don't carry the exception.
+    error = log["exception"].value if log.get("exception") else sys.exc_info()[1]
+    if not getattr(error, "alert", True):
+        return
     sms.messages.create(
         body=f'BROBOT ERROR: {log["time"]} | {log["message"]}',
         from_=TWILIO_SENDER_PHONE,
@@ -0,0 +1,122 @@
+"""Watchdog which measures event loop lag and pinpoints the callbacks blocking it."""
+
+import asyncio
+import sys
+import threading
+import traceback
+from time import monotonic
+from typing import Optional
+
+from logger import LOGGER
+from metrics import Counter, Gauge, Histogram
+
+from config import (
+    ASYNCIO_DEBUG,
+    ENVIRONMENT,
+    EVENT_LOOP_LAG_THRESHOLD,
+    EVENT_LOOP_WATCHDOG_INTERVAL,
+)
+
+EVENT_LOOP_LAG = Gauge(
+    "broiestbot_event_loop_lag_seconds",
+    "How late the event loop ran the watchdog's most recent heartbeat.",
+)
+EVENT_LOOP_LAG_HISTOGRAM = Histogram(
+    "broiestbot_event_loop_lag_distribution_seconds",
+    "How late the event loop ran each of the watchdog's heartbeats.",
+)
+EVENT_LOOP_STALLS = Counter(
+    "broiestbot_event_loop_stalls_total",
+    "Times a callback blocked the event loop for longer than the lag threshold.",
+)
+
+
+class LoopWatchdog:
+    """
+    Measure scheduling lag on the event loop, and capture whatever is blocking it.
+
+    A heartbeat task sleeps for `interval` and records how late it woke up. A separate
+    thread watches the heartbeat: when it stops for longer than `threshold`, the loop is
+    stuck in a synchronous call, so the thread grabs the loop thread's current stack and
+    logs it once per stall.
+
+    :param float interval: Seconds between heartbeats.
+    :param float threshold: Lag in seconds at which a stall is reported.
+    """
+
+    def __init__(self, interval: float = EVENT_LOOP_WATCHDOG_INTERVAL, threshold: float = EVENT_LOOP_LAG_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self._heartbeat = monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """
+        Start watching the running event loop; optionally enable asyncio debug mode outside of production.
+
+        :returns: None
+        """
+        loop = asyncio.get_running_loop()
+        if ASYNCIO_DEBUG and ENVIRONMENT != "production":
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.threshold
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._beat(), name="loop-watchdog-heartbeat")
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        """
+        Stop the heartbeat task & watcher thread; called when the bot shuts down.
+
+        :returns: None
+        """
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    async def _beat(self) -> None:
+        """Record how late each heartbeat runs, forever."""
+        while True:
+            expected = monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            self._heartbeat = now = monotonic()
+            lag = max(now - expected, 0.0)
+            EVENT_LOOP_LAG.set(lag)
+            EVENT_LOOP_LAG_HISTOGRAM.observe(lag)
+
+    def _watch(self) -> None:
+        """Runs on its own thread: log the loop thread's stack whenever the heartbeat stalls."""
+        reported = None
+        while not self._stopped.wait(self.interval):
+            heartbeat = self._heartbeat
+            stalled_for = monotonic() - heartbeat - self.interval
+            if stalled_for < self.threshold or heartbeat == reported:
+                continue
+            reported = heartbeat
+            EVENT_LOOP_STALLS.inc()
+            LOGGER.warning(f"Event loop blocked for {stalled_for:.2f}s, currently running:\n{self.loop_stack()}")
+
+    def loop_stack(self) -> str:
+        """
+        Format the stack of whatever the event loop thread is running right now.
+
+        :returns: str
+        """
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return "<event loop thread not found>"
+        return "".join(traceback.format_stack(frame))
+
+
+loop_watchdog = LoopWatchdog()
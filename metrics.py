@@ -0,0 +1,224 @@
+"""In-process metrics collected across the bot."""
+
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+Sample = Tuple[str, Dict[str, str], float]
+
+REGISTRY: List["Metric"] = []
+
+# Upper bounds (in seconds) of latency histogram buckets; spans cache hits through slow upstream fan-outs.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Metric:
+    """Base for metrics which are identified by name and partitioned by label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def _labels(self, labelvalues: Sequence[str]) -> Tuple[str, ...]:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"`{self.name}` expects labels {self.labelnames}, got {tuple(labelvalues)}")
+        return tuple(str(value) for value in labelvalues)
+
+    def samples(self) -> Iterator[Sample]:
+        """Yield `(name, labels, value)` for every label combination recorded."""
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Value which only ever goes up, such as a number of requests."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = defaultdict(float)
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        """
+        Increment the counter for a combination of label values.
+
+        :param labelvalues: One value per label name, in order.
+        :param float amount: Amount to increment by.
+
+        :returns: None
+        """
+        self._values[self._labels(labelvalues)] += amount
+
+    def value(self, *labelvalues: str) -> float:
+        """Current value of the counter for a combination of label values."""
+        return self._values.get(self._labels(labelvalues), 0.0)
+
+    def total(self) -> float:
+        """Sum of the counter across every combination of label values."""
+        return sum(self._values.values())
+
+    def samples(self) -> Iterator[Sample]:
+        for labelvalues, value in list(self._values.items()):
+            yield self.name, dict(zip(self.labelnames, labelvalues)), value
+
+
+class Gauge(Metric):
+    """
+    Value which goes up and down, such as a queue's depth.
+
+    Gauges without labels may read their value from `callback` whenever they are collected.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self._values: Dict[Tuple[str, ...], float] = defaultdict(float)
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        """Set the gauge for a combination of label values."""
+        self._values[self._labels(labelvalues)] = value
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        """Increment the gauge for a combination of label values."""
+        self._values[self._labels(labelvalues)] += amount
+
+    def dec(self, *labelvalues: str, amount: float = 1) -> None:
+        """Decrement the gauge for a combination of label values."""
+        self._values[self._labels(labelvalues)] -= amount
+
+    def value(self, *labelvalues: str) -> float:
+        """Current value of the gauge for a combination of label values."""
+        if self.callback is not None:
+            return float(self.callback())
+        return self._values.get(self._labels(labelvalues), 0.0)
+
+    def samples(self) -> Iterator[Sample]:
+        if self.callback is not None:
+            yield self.name, {}, float(self.callback())
+            return
+        for labelvalues, value in list(self._values.items()):
+            yield self.name, dict(zip(self.labelnames, labelvalues)), value
+
+
+class Histogram(Metric):
+    """Distribution of observed values, such as latencies, counted into cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = defaultdict(float)
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        """
+        Record a single observation for a combination of label values.
+
+        :param float value: Observed value, such as a duration in seconds.
+        :param labelvalues: One value per label name, in order.
+
+        :returns: None
+        """
+        labels = self._labels(labelvalues)
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    @contextmanager
+    def time(self, *labelvalues: str) -> Iterator[None]:
+        """Observe the duration of the wrapped block, in seconds."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, *labelvalues)
+
+    def count(self, *labelvalues: str) -> int:
+        """Number of observations for a combination of label values."""
+        return sum(self._counts.get(self._labels(labelvalues), ()))
+
+    def sum(self, *labelvalues: str) -> float:
+        """Sum of observations for a combination of label values."""
+        return self._sums.get(self._labels(labelvalues), 0.0)
+
+    def samples(self) -> Iterator[Sample]:
+        for labelvalues, counts in list(self._counts.items()):
+            labels = dict(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                yield f"{self.name}_bucket", {**labels, "le": le}, cumulative
+            yield f"{self.name}_sum", labels, self._sums[labelvalues]
+            yield f"{self.name}_count", labels, cumulative
+
+
+def ratio(numerator: Counter, denominator: Sequence[Counter]) -> Callable[[], float]:
+    """
+    Build a gauge callback reporting one counter's share of several, ie: a cache's hit ratio.
+
+    :param Counter numerator: Counter whose share is reported.
+    :param Sequence[Counter] denominator: Counters which together make up the whole.
+
+    :returns: Callable[[], float]
+    """
+
+    def share() -> float:
+        whole = sum(counter.total() for counter in denominator)
+        return numerator.total() / whole if whole else 0.0
+
+    return share
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render() -> str:
+    """
+    Render every registered metric in Prometheus' text exposition format.
+
+    :returns: str
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            if labels:
+                label_pairs = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_pairs}}} {_format_value(value)}")
+            else:
+                lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,250 @@
+"""Second cache tier in Redis, shared by every bot process & surviving restarts."""
+
+import asyncio
+import hashlib
+import math
+import struct
+import zlib
+from time import monotonic, time
+from typing import Any, Optional, Tuple
+
+from logger import LOGGER
+from metrics import Counter
+from redis.exceptions import RedisError
+
+from clients import async_r_bytes
+from clients.registry import resolve
+from config import (
+    SHARED_CACHE_COMPRESS_BYTES,
+    SHARED_CACHE_ENABLED,
+    SHARED_CACHE_LOCK_TTL,
+    SHARED_CACHE_PREFIX,
+    SHARED_CACHE_RETRY_AFTER,
+    SHARED_CACHE_TIMEOUT,
+)
+
+# Stored values are prefixed with when they expire (Unix time) & whether they're compressed.
+_HEADER = struct.Struct("!d?")
+
+SHARED_CACHE_HITS = Counter(
+    "broiestbot_shared_cache_hits_total",
+    "Values missing from this process' cache which were found in Redis.",
+    ("kind",),
+)
+SHARED_CACHE_MISSES = Counter(
+    "broiestbot_shared_cache_misses_total",
+    "Values missing from both this process' cache and Redis.",
+    ("kind",),
+)
+SHARED_CACHE_WAITS = Counter(
+    "broiestbot_shared_cache_waits_total",
+    "Misses which waited for another process already building the same value, rather than building it again.",
+    ("kind",),
+)
+SHARED_CACHE_ERRORS = Counter(
+    "broiestbot_shared_cache_errors_total",
+    "Redis calls which failed or timed out, after which Redis is skipped for a while.",
+)
+
+
+def encode(value: bytes, ttl: float, compress_over: int = SHARED_CACHE_COMPRESS_BYTES) -> bytes:
+    """
+    Pack a value with its expiry, compressing it if it's large.
+
+    :param bytes value: Value to store.
+    :param float ttl: Seconds the value stays fresh.
+    :param int compress_over: Values larger than this many bytes are compressed.
+
+    :returns: bytes
+    """
+    compressed = len(value) > compress_over
+    if compressed:
+        value = zlib.compress(value)
+    return _HEADER.pack(time() + ttl, compressed) + value
+
+
+def decode(data: bytes) -> Tuple[bytes, float]:
+    """
+    Unpack a stored value & the seconds it stays fresh for.
+
+    :param bytes data: Value as stored in Redis.
+
+    :returns: Tuple[bytes, float]
+    """
+    expires_at, compressed = _HEADER.unpack_from(data)
+    value = data[_HEADER.size :]
+    return zlib.decompress(value) if compressed else value, expires_at - time()
+
+
+class Claim:
+    """
+    Lookup of a single key, which also claims the right to build its value when it's missing.
+
+    After `acquire()`, `value` holds the cached value (and `ttl` the seconds it stays fresh) if
+    Redis or another process had it. Otherwise this process builds the value, `set()`s it, and
+    `release()`s the claim so processes waiting on it stop waiting.
+
+    :param SharedCache cache: Cache the key belongs to.
+    :param str kind: Kind of value, ie: `http` or `command`, to record metrics against.
+    :param str key: Key of the value in Redis.
+    """
+
+    def __init__(self, cache: "SharedCache", kind: str, key: str):
+        self.cache = cache
+        self.kind = kind
+        self.key = key
+        self.value: Optional[bytes] = None
+        self.ttl: float = 0
+        self._locked = False
+
+    async def acquire(self) -> "Claim":
+        """
+        Fetch the value, or lock its key while building it; if another process holds the lock, wait for its value.
+
+        :returns: Claim
+        """
+        if not self.cache.available:
+            return self
+        if await self._load():
+            SHARED_CACHE_HITS.inc(self.kind)
+            return self
+        SHARED_CACHE_MISSES.inc(self.kind)
+        self._locked = bool(await self.cache.call("set", self._lock_key, b"1", nx=True, px=self.cache.lock_ttl_ms))
+        if not self._locked and self.cache.available:
+            SHARED_CACHE_WAITS.inc(self.kind)
+            await self._wait()
+        return self
+
+    async def set(self, value: bytes, ttl: float) -> None:
+        """
+        Share a value this process built, for `ttl` seconds.
+
+        :param bytes value: Value to store.
+        :param float ttl: Seconds the value stays fresh.
+
+        :returns: None
+        """
+        if ttl > 0:
+            await self.cache.call("set", self.key, encode(value, ttl), px=math.ceil(ttl * 1000))
+
+    async def release(self) -> None:
+        """Drop the lock taken to build the value, if this process holds it."""
+        if self._locked:
+            self._locked = False
+            await self.cache.call("delete", self._lock_key)
+
+    @property
+    def _lock_key(self) -> str:
+        return f"{self.key}:lock"
+
+    async def _load(self) -> bool:
+        data = await self.cache.call("get", self.key)
+        if not data:
+            return False
+        try:
+            self.value, self.ttl = decode(data)
+        except (struct.error, zlib.error) as e:
+            LOGGER.warning(f"Ignoring unreadable shared cache value `{self.key}`: {e}")
+            return False
+        return self.ttl > 0
+
+    async def _wait(self) -> None:
+        """
+        Poll for the value another process is building, until its lock is released or would have expired.
+
+        The builder may release its lock without storing anything (ie: an error response, or a reply
+        not worth caching), in which case waiting any longer would only delay building it here.
+        """
+        give_up_at = monotonic() + self.cache.lock_ttl_ms / 1000
+        delay = 0.05
+        while monotonic() < give_up_at and self.cache.available:
+            await asyncio.sleep(delay)
+            # Checked before loading: builders store their value before releasing the lock.
+            locked = await self.cache.call("exists", self._lock_key)
+            if await self._load():
+                return
+            if not locked:
+                break
+            delay = min(delay * 2, 0.5)
+        self.value = None
+
+    async def __aenter__(self) -> "Claim":
+        return await self.acquire()
+
+    async def __aexit__(self, *_exc) -> bool:
+        await self.release()
+        return False
+
+
+class SharedCache:
+    """
+    Values cached in Redis with a TTL, so one process (or a restarted one) reuses what another already fetched.
+
+    Every call to Redis is bounded by a short timeout. When Redis is down or slow, the cache
+    logs a warning & is skipped for `retry_after` seconds, so callers carry on as if it missed.
+
+    :param Any client: Async Redis client returning bytes, or the `LazyClient` standing in for one.
+    :param bool enabled: Whether to use Redis at all.
+    :param str prefix: Prefix of every key, namespacing the cache within Redis.
+    :param float timeout: Seconds a Redis call may take.
+    :param float retry_after: Seconds Redis is skipped for after a call fails.
+    :param float lock_ttl: Seconds a process building a missing value holds its lock.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        enabled: bool = SHARED_CACHE_ENABLED,
+        prefix: str = SHARED_CACHE_PREFIX,
+        timeout: float = SHARED_CACHE_TIMEOUT,
+        retry_after: float = SHARED_CACHE_RETRY_AFTER,
+        lock_ttl: float = SHARED_CACHE_LOCK_TTL,
+    ):
+        self.client = client
+        self.enabled = enabled
+        self.prefix = prefix
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.lock_ttl_ms = math.ceil(lock_ttl * 1000)
+        self._down_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        """Whether Redis is enabled & hasn't failed recently."""
+        return self.enabled and self._down_until <= monotonic()
+
+    def claim(self, kind: str, key: Any) -> Claim:
+        """
+        Look up a value by its key, claiming the right to build it if it's missing.
+
+        :param str kind: Kind of value, ie: `http` or `command`; values of different kinds never collide.
+        :param Any key: Key of the value in this process' cache, hashed into a Redis key.
+
+        :returns: Claim
+        """
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return Claim(self, kind, f"{self.prefix}:{kind}:{digest}")
+
+    async def call(self, command: str, *args, **kwargs) -> Optional[Any]:
+        """
+        Run a Redis command, giving up on Redis for a while if it fails or takes too long.
+
+        :param str command: Name of the client's method, ie: `get`.
+        :param args: Positional arguments of the command.
+        :param kwargs: Keyword arguments of the command.
+
+        :returns: Optional[Any]; `None` while Redis is unavailable.
+        """
+        if not self.available:
+            return None
+        try:
+            return await asyncio.wait_for(getattr(resolve(self.client), command)(*args, **kwargs), self.timeout)
+        except (RedisError, OSError, asyncio.TimeoutError) as e:
+            SHARED_CACHE_ERRORS.inc()
+            if self.available:
+                LOGGER.warning(f"Shared cache unavailable, skipping Redis for {self.retry_after}s: {e!r}")
+            self._down_until = monotonic() + self.retry_after
+            return None
+
+
+shared_cache = SharedCache(async_r_bytes)
@@ -0,0 +1,325 @@
+"""Spans timing how each chat message is handled, down to the requests, queries & thread hops it fans out to."""
+
+import json
+import os
+import queue
+import threading
+from collections import deque
+from contextvars import ContextVar
+from random import getrandbits
+from time import perf_counter, time
+from typing import Any, Deque, Dict, List, Optional
+
+SERVICE = "broiestbot"
+
+# Exporters selectable with `TRACE_EXPORTER`.
+EXPORTER_DATADOG = "datadog"
+EXPORTER_JSON = "json"
+EXPORTER_MEMORY = "memory"
+
+# Span which work started in the current context becomes a child of; `None` outside a trace.
+_current: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    A single timed operation within a trace, ie: a command, or one of the upstream requests it makes.
+
+    Implements the subset of `ddtrace.Span` the bot instruments with (`set_tag`, `set_exc_info`,
+    `finish` & use as a context manager), so call sites work the same with either tracer.
+
+    :param Tracer tracer: Tracer which exports the span once its trace finishes.
+    :param str name: Kind of operation, ie: `http.request`.
+    :param Optional[str] resource: What the operation acted on, ie: the command type or upstream host.
+    :param Dict[str, Any] tags: Attributes of the operation.
+    :param Optional[Span] parent: Span the operation was started within, if any.
+    """
+
+    __slots__ = (
+        "name",
+        "resource",
+        "tags",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start",
+        "duration",
+        "error",
+        "_tracer",
+        "_started",
+        "_token",
+    )
+
+    def __init__(
+        self, tracer: "Tracer", name: str, resource: Optional[str], tags: Dict[str, Any], parent: Optional["Span"]
+    ):
+        self.name = name
+        self.resource = resource
+        self.tags = tags
+        self.trace_id = parent.trace_id if parent is not None else getrandbits(63)
+        self.span_id = getrandbits(63)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start = time()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self._tracer = tracer
+        self._started = perf_counter()
+        self._token = None
+
+    def set_tag(self, key: str, value: Any) -> None:
+        self.tags[key] = value
+
+    def set_exc_info(self, exc_type, exc_value, _traceback) -> None:
+        self.error = f"{exc_type.__name__}: {exc_value}"
+
+    def finish(self) -> None:
+        """Stop timing the operation; the span is exported along with the rest of its trace."""
+        if self.duration is None:
+            self.duration = perf_counter() - self._started
+            self._tracer._finish(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "resource": self.resource,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration": self.duration,
+            "error": self.error,
+            "tags": self.tags,
+        }
+
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if exc_type is not None:
+            self.set_exc_info(exc_type, exc_value, traceback)
+        _current.reset(self._token)
+        self.finish()
+        return False
+
+
+class _NoopSpan:
+    """Span returned while tracing is disabled, which records nothing."""
+
+    def set_tag(self, key: str, value: Any) -> None:
+        pass
+
+    def set_exc_info(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *_exc) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class MemoryExporter:
+    """
+    Keep the most recent traces in memory, ie: for `/traces` during local runs, tests & benchmarks.
+
+    :param int size: Number of traces kept before the oldest are discarded.
+    """
+
+    def __init__(self, size: int):
+        self.traces: Deque[List[Dict[str, Any]]] = deque(maxlen=size)
+
+    def export(self, spans: List[Span]) -> None:
+        self.traces.append([span.to_dict() for span in spans])
+
+    def close(self) -> None:
+        pass
+
+
+class JsonExporter:
+    """
+    Append each finished trace to a file, as a line of JSON.
+
+    Traces are handed to a background thread which serializes & writes them, so finishing a
+    span never waits on the disk. Traces arriving while `maxsize` are already waiting are dropped.
+
+    :param str filepath: File to append traces to; its directory is created if needed.
+    :param int maxsize: Most traces waiting to be written at once.
+    """
+
+    def __init__(self, filepath: str, maxsize: int = 1000):
+        self.filepath = filepath
+        self._pending: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write, name="trace-writer", daemon=True)
+                self._writer.start()
+        try:
+            self._pending.put_nowait({"trace_id": spans[0].trace_id, "spans": [span.to_dict() for span in spans]})
+        except queue.Full:
+            pass
+
+    def close(self) -> None:
+        """Write the traces still waiting, then stop the writer."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._pending.put(None)
+            writer.join(timeout=5)
+
+    def _write(self) -> None:
+        """Append waiting traces to the file, a batch at a time, until `close` queues `None`."""
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        with open(self.filepath, "a", encoding="utf-8") as file:
+            while True:
+                batch = [self._pending.get()]
+                while batch[-1] is not None and not self._pending.empty():
+                    batch.append(self._pending.get_nowait())
+                file.writelines(json.dumps(trace, default=str) + "\n" for trace in batch if trace is not None)
+                file.flush()
+                if batch[-1] is None:
+                    return
+
+
+class Tracer:
+    """
+    Start spans with `ddtrace` when it's configured, otherwise with the bot's own exporters.
+
+    Spans follow the work they time through tasks & executor threads via a context variable,
+    so a command's spans form a tree, ie: `footy_live_fixtures` → each league → each request.
+    A trace is exported whole once its root span finishes; spans finishing after their root
+    (ie: a background task outliving the message which started it) are exported on their own.
+    While tracing is disabled, every span is a shared no-op.
+    """
+
+    def __init__(self):
+        self.exporter = None
+        self._datadog = None
+        self._traces: Dict[int, List[Span]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether spans are being recorded."""
+        return self.exporter is not None or self._datadog is not None
+
+    def configure(self, exporter: Optional[str], filepath: Optional[str] = None, size: int = 200) -> None:
+        """
+        Select where spans are exported, replacing the current exporter.
+
+        :param Optional[str] exporter: One of `datadog`, `json` or `memory`; empty to disable tracing.
+        :param Optional[str] filepath: File traces are appended to by the `json` exporter.
+        :param int size: Traces kept by the `memory` exporter.
+
+        :raises ValueError: When `exporter` isn't a known exporter, or is `datadog` without `ddtrace` installed.
+
+        :returns: None
+        """
+        self.close()
+        self._datadog = None
+        self.exporter = None
+        self._traces.clear()
+        if not exporter:
+            return
+        if exporter == EXPORTER_DATADOG:
+            # Imported lazily: `ddtrace` is optional, and only needed when spans are sent to Datadog.
+            from clients.ddog import datadog_tracer
+
+            self._datadog = datadog_tracer()
+            if self._datadog is None:
+                raise ValueError("`ddtrace` must be installed to export spans to Datadog")
+        elif exporter == EXPORTER_JSON:
+            self.exporter = JsonExporter(filepath)
+        elif exporter == EXPORTER_MEMORY:
+            self.exporter = MemoryExporter(size)
+        else:
+            raise ValueError(f"Unknown trace exporter `{exporter}`")
+
+    def span(self, name: str, resource: Optional[str] = None, **tags):
+        """
+        Start a span which becomes the parent of work started within its `with` block.
+
+        :param str name: Kind of operation, ie: `command`.
+        :param Optional[str] resource: What the operation acted on, ie: the command type.
+        :param tags: Attributes of the operation.
+
+        :returns: Union[Span, ddtrace.Span]
+        """
+        if self._datadog is not None:
+            span = self._datadog.trace(name, service=SERVICE, resource=resource)
+            for key, value in tags.items():
+                span.set_tag(key, value)
+            return span
+        if self.exporter is None:
+            return NOOP_SPAN
+        return self._new_span(name, resource, tags)
+
+    def start(self, name: str, resource: Optional[str] = None, **tags):
+        """
+        Start a span for an operation with no children, ie: a query; the caller calls `finish()` once it ends.
+
+        :param str name: Kind of operation, ie: `db.query`.
+        :param Optional[str] resource: What the operation acted on.
+        :param tags: Attributes of the operation.
+
+        :returns: Union[Span, ddtrace.Span]
+        """
+        if self._datadog is not None:
+            span = self._datadog.start_span(
+                name, child_of=self._datadog.current_span(), service=SERVICE, resource=resource, activate=False
+            )
+            for key, value in tags.items():
+                span.set_tag(key, value)
+            return span
+        if self.exporter is None:
+            return NOOP_SPAN
+        return self._new_span(name, resource, tags)
+
+    def current(self):
+        """
+        Span the caller is running within, to tag it; a no-op span outside of a trace.
+
+        :returns: Union[Span, ddtrace.Span]
+        """
+        if self._datadog is not None:
+            return self._datadog.current_span() or NOOP_SPAN
+        return _current.get() or NOOP_SPAN
+
+    def close(self) -> None:
+        """Flush & close the exporter; called when the bot shuts down."""
+        if self.exporter is not None:
+            self.exporter.close()
+
+    def _new_span(self, name: str, resource: Optional[str], tags: Dict[str, Any]) -> Span:
+        span = Span(self, name, resource, tags, _current.get())
+        if span.parent_id is None:
+            with self._lock:
+                self._traces[span.trace_id] = []
+        return span
+
+    def _finish(self, span: Span) -> None:
+        """Hold a finished span until its trace's root finishes, then export the whole trace."""
+        exporter = self.exporter
+        with self._lock:
+            if span.parent_id is None:
+                spans = [span, *self._traces.pop(span.trace_id, ())]
+            elif span.trace_id in self._traces:
+                self._traces[span.trace_id].append(span)
+                return
+            else:
+                spans = [span]
+        if exporter is not None:
+            exporter.export(spans)
+
+
+tracer = Tracer()